@@ -0,0 +1,5 @@
+import { callBackend } from "@/lib/backend";
+
+export async function POST(_req: Request, { params }: { params: { id: string } }) {
+  return callBackend(`/jobs/${encodeURIComponent(params.id)}/cancel`, { method: "POST" });
+}
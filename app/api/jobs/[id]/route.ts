@@ -0,0 +1,6 @@
+import { callBackend } from "@/lib/backend";
+
+// État du job : { status, done, total, progress, partial, result, error }
+export async function GET(_req: Request, { params }: { params: { id: string } }) {
+  return callBackend(`/jobs/${encodeURIComponent(params.id)}`);
+}
@@ -0,0 +1,16 @@
+import { callBackend } from "@/lib/backend";
+
+// Job asynchrone : { kind: "simulate_mc" | "sweep", params } -> { id, status }
+export async function POST(req: Request) {
+  try {
+    const body = await req.json();
+    return callBackend("/jobs", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(body),
+    });
+  } catch (e: any) {
+    console.error("proxy /jobs error:", e?.message || e);
+    return Response.json({ error: "proxy_fail", detail: String(e) }, { status: 502 });
+  }
+}
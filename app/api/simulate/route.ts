@@ -71,9 +71,12 @@ export async function POST(req: Request) {
     if (!Array.isArray(payload.sess_windows)) payload.sess_windows = [];
 
     console.log("proxy /simulate payload →", payload);
-    return callBackend("/simulate", {
+    // ?downsample=N&dtype=float32 et Accept: application/octet-stream relayés tels quels
+    const search = new URL(req.url).search;
+    const accept = req.headers.get("accept");
+    return callBackend(`/simulate${search}`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: { "Content-Type": "application/json", ...(accept ? { Accept: accept } : {}) },
       body: JSON.stringify(payload),
     });
   } catch (e: any) {
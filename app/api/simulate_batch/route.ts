@@ -0,0 +1,21 @@
+import { toBackend } from "@/app/api/_lib/toBackend";
+import { callBackend } from "@/lib/backend";
+
+// Plusieurs presets en une requête : { items, base?, fields?, workers? }
+// Sans base, chaque item est un preset complet (format UI converti comme /simulate).
+export async function POST(req: Request) {
+  try {
+    const body = await req.json();
+    const items = Array.isArray(body?.items) ? body.items : [];
+    const payload = body?.base ? body : { ...body, items: items.map((item: any) => toBackend(item)) };
+    const search = new URL(req.url).search;
+    return callBackend(`/simulate_batch${search}`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(payload),
+    });
+  } catch (e: any) {
+    console.error("proxy /simulate_batch error:", e?.message || e);
+    return Response.json({ error: "proxy_fail", detail: String(e) }, { status: 502 });
+  }
+}
@@ -0,0 +1,24 @@
+import { toBackend } from "@/app/api/_lib/toBackend";
+import { callBackend } from "@/lib/backend";
+
+// Proxy NDJSON : le corps de la réponse backend est relayé tel quel (ligne par ligne)
+export async function POST(req: Request) {
+  try {
+    const raw = await req.json(); // attendu: { payload, n, base_seed, every? }
+    const body = {
+      payload: toBackend(raw.payload ?? raw),
+      n: Number(raw.n ?? 100),
+      base_seed: Number(raw.base_seed ?? 12345),
+      every: Number(raw.every ?? 100),
+    };
+
+    return callBackend("/simulate_mc/stream", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(body),
+    });
+  } catch (e: any) {
+    console.error("proxy /simulate_mc/stream error:", e?.message || e);
+    return Response.json({ error: "proxy_fail", detail: String(e) }, { status: 502 });
+  }
+}
@@ -0,0 +1,16 @@
+import { callBackend } from "@/lib/backend";
+
+// Grid search serveur : { base, ranges, n, base_seed, objective, top_k, workers }
+export async function POST(req: Request) {
+  try {
+    const body = await req.json();
+    return callBackend("/sweep", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(body),
+    });
+  } catch (e: any) {
+    console.error("proxy /sweep error:", e?.message || e);
+    return Response.json({ error: "proxy_fail", detail: String(e) }, { status: 502 });
+  }
+}
@@ -79,3 +79,95 @@ export async function simulateMc(payload: any, n = 100, base_seed = 777, presetN
   
   return data;
 }
+
+// MC en streaming : onProgress reçoit chaque snapshot { done, n, final, mc }
+export async function simulateMcStream(
+  payload: any,
+  n = 1000,
+  base_seed = 777,
+  onProgress: (snap: { done: number; n: number; final: boolean; mc: any }) => void,
+  every = 100,
+) {
+  const r = await fetch("/api/simulate_mc/stream", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ payload, n, base_seed, every }),
+    cache: "no-store",
+  });
+  if (!r.body) throw new Error("stream indisponible");
+
+  const reader = r.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = "";
+  let last: any = null;
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buf += decoder.decode(value, { stream: true });
+    let nl: number;
+    while ((nl = buf.indexOf("\n")) >= 0) {
+      const line = buf.slice(0, nl).trim();
+      buf = buf.slice(nl + 1);
+      if (!line) continue;
+      last = JSON.parse(line);
+      onProgress(last);
+    }
+  }
+  return last; // dernier snapshot (final=true)
+}
+
+// Format binaire de /simulate : [u32 LE taille][en-tête JSON][colonnes little-endian]
+const SERIES_ARRAYS: Record<string, any> = { "<f8": Float64Array, "<f4": Float32Array, "<u4": Uint32Array };
+
+export function decodeSimBinary(buf: ArrayBuffer) {
+  const size = new DataView(buf).getUint32(0, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 4, size)));
+  const base = 4 + size; // buffers alignés sur 8 octets
+  const series: Record<string, Float64Array | Float32Array | Uint32Array> = {};
+  for (const [name, d] of Object.entries<any>(header.series ?? {})) {
+    series[name] = new SERIES_ARRAYS[d.dtype](buf, base + d.offset, d.length);
+  }
+  return { ...header, series };
+}
+
+// Simu avec série binaire (float32 par défaut) et sous-échantillonnage LTTB optionnel
+export async function simulateBinary(payload: any, opts: { downsample?: number; dtype?: "float32" | "float64" } = {}) {
+  const qs = new URLSearchParams({ dtype: opts.dtype ?? "float32" });
+  if (opts.downsample) qs.set("downsample", String(opts.downsample));
+  const r = await fetch(`/api/simulate?${qs}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "application/octet-stream" },
+    body: JSON.stringify(payload),
+    cache: "no-store",
+  });
+  if (!r.ok) throw new Error(`simulate ${r.status}`);
+  return decodeSimBinary(await r.arrayBuffer());
+}
+
+// Job asynchrone (MC / sweep) : soumission puis polling ; onProgress reçoit l'état courant
+export async function runJob(
+  kind: "simulate_mc" | "sweep",
+  params: any,
+  onProgress?: (job: { status: string; done: number; total: number; progress: number; partial: any }) => void,
+  pollMs = 500,
+) {
+  const r = await fetch("/api/jobs", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ kind, params }),
+    cache: "no-store",
+  });
+  if (!r.ok) throw new Error(`jobs ${r.status}`);
+  const { id } = await r.json();
+  for (;;) {
+    const job = await (await fetch(`/api/jobs/${id}`, { cache: "no-store" })).json();
+    onProgress?.(job);
+    if (job.status === "done") return job.result;
+    if (job.status === "failed" || job.status === "cancelled") throw new Error(job.error || job.status);
+    await new Promise((res) => setTimeout(res, pollMs));
+  }
+}
+
+export async function cancelJob(id: string) {
+  return (await fetch(`/api/jobs/${id}/cancel`, { method: "POST", cache: "no-store" })).json();
+}
@@ -0,0 +1,101 @@
+"""
+Monte Carlo adaptatif : runs par lots (seeds base_seed, base_seed+1, ...) jusqu'à ce que
+les intervalles de confiance demandés soient assez étroits, ou jusqu'au budget max_n.
+
+- pass_rate / pass_rate_full : intervalle de Wilson
+- dd_p95 : intervalle sans hypothèse de loi, par statistiques d'ordre (rangs binomiaux)
+Les lots sont des plages de seeds contiguës : le résultat à n_used runs est identique
+à un /simulate_mc classique avec n = n_used.
+"""
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Tuple
+import math
+
+from backend.app.main import mc_stats
+from backend.app.parallel import run_mc_counts
+
+
+def z_value(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + min(max(confidence, 0.5), 0.999999) / 2.0)
+
+
+def wilson_interval(successes: int, n: int, z: float) -> Tuple[float, float]:
+    if n <= 0:
+        return 0.0, 1.0
+    p = successes / n
+    denom = 1.0 + z * z / n
+    center = (p + z * z / (2.0 * n)) / denom
+    half = z * math.sqrt(p * (1.0 - p) / n + z * z / (4.0 * n * n)) / denom
+    lo = 0.0 if successes <= 0 else max(0.0, center - half)
+    hi = 1.0 if successes >= n else min(1.0, center + half)
+    return lo, hi
+
+
+def quantile_interval(sorted_xs: List[float], q: float, z: float) -> Tuple[float, float]:
+    """IC du quantile q par rangs binomiaux n*q ± z*sqrt(n*q*(1-q))."""
+    n = len(sorted_xs)
+    if n == 0:
+        return 0.0, 0.0
+    spread = z * math.sqrt(n * q * (1.0 - q))
+    lo = max(0, int(math.floor(n * q - spread)) - 1)
+    hi = min(n - 1, int(math.ceil(n * q + spread)))
+    return sorted_xs[lo], sorted_xs[hi]
+
+
+def confidence_intervals(pass_ftmo: int, pass_full: int, dds_sorted: List[float], n: int,
+                         z: float) -> Dict[str, Tuple[float, float]]:
+    return {
+        "pass_rate": wilson_interval(pass_ftmo, n, z),
+        "pass_rate_full": wilson_interval(pass_full, n, z),
+        "dd_p95": quantile_interval(dds_sorted, 0.95, z),
+    }
+
+
+def run_adaptive_mc(payload, base_seed: int, spec, engine: str = "batch", workers: int = 1,
+                    chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """'spec' : AdaptiveMC (tolérances en demi-largeur, confidence, batch, min_n, max_n)."""
+    tolerances = {name: tol for name, tol in (
+        ("pass_rate", spec.tol_pass_rate),
+        ("pass_rate_full", spec.tol_pass_rate_full),
+        ("dd_p95", spec.tol_dd_p95),
+    ) if tol is not None}
+    z = z_value(spec.confidence)
+    max_n = max(1, int(spec.max_n))
+    batch = max(1, int(spec.batch))
+
+    pass_ftmo = pass_full = 0
+    dds: List[float] = []
+    n = 0
+    converged = False
+    half_width: Dict[str, float] = {}
+    ci: Dict[str, Tuple[float, float]] = {}
+
+    while n < max_n:
+        step = min(batch, max_n - n)
+        counts = run_mc_counts(payload, range(base_seed + n, base_seed + n + step),
+                               engine=engine, workers=workers, chunk_size=chunk_size)
+        pass_ftmo += counts["pass_ftmo"]
+        pass_full += counts["pass_full"]
+        dds.extend(counts["dds"])
+        n += step
+
+        dds.sort()  # presque trié d'un lot à l'autre : tri quasi linéaire
+        ci = confidence_intervals(pass_ftmo, pass_full, dds, n, z)
+        half_width = {name: (hi - lo) / 2.0 for name, (lo, hi) in ci.items()}
+        if n >= spec.min_n and all(half_width[name] <= tol for name, tol in tolerances.items()):
+            converged = True
+            break
+
+    return {
+        "n": n,
+        "mc": mc_stats(pass_ftmo, pass_full, dds, n),
+        "adaptive": {
+            "converged": converged,
+            "n_used": n,
+            "max_n": max_n,
+            "confidence": spec.confidence,
+            "ci": {name: list(bounds) for name, bounds in ci.items()},
+            "half_width": half_width,
+            "tolerances": tolerances,
+        },
+    }
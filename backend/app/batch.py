@@ -0,0 +1,292 @@
+"""
+Moteur batch (NumPy) : avance N chemins Monte Carlo en parallèle, état en tableaux (N,).
+
+Même logique que simulate_equity (VT EWMA, KellyCap, SoftBarrier, CPPI floor/freeze,
+pacing, HWM, cible de profit) et mêmes tirages : le chemin de seed s consomme le flux
+random.Random(s).gauss (ou le flux Philox de s si rng="philox"), donc les résultats sont
+identiques bit à bit au moteur scalaire.
+Avec rng="legacy" (défaut), le tirage gauss élément par élément domine le temps de calcul ;
+le gain de vitesse complet demande rng="philox" (tirages en bloc).
+Les chocs standardisés viennent du SHOCK_STORE partagé (réutilisés d'une config à l'autre) ;
+un profil de rendements non gaussien (RunConfig.returns) est tiré en bloc par generators.
+"""
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Union
+import math
+
+import numpy as np
+
+from backend.app.generators import generate_returns
+from backend.app.main import RunConfig, SimInput, as_run_config
+from backend.app.shocks import SHOCK_STORE, standard_normals  # noqa: F401 (ré-export)
+
+# Nombre de chemins simulés ensemble (borne la mémoire des tirages : steps x chunk floats)
+DEFAULT_CHUNK_PATHS = 4096
+
+
+# Champs qui changent la structure de la boucle (identiques dans un batch empilé)
+STRUCTURAL_FIELDS = ("use_cppi", "use_vt", "use_kelly_cap", "use_soft_barrier", "total_steps", "steps_per_day")
+# Champs numériques empilables (un paramètre par colonne)
+NUMERIC_FIELDS = ("mu", "sigma", "cppi_alpha", "cppi_freeze_frac", "vt_target_vol", "kelly_cap",
+                  "soft_barrier", "daily_limit", "total_limit", "spend_rate", "target_profit", "max_days")
+
+
+def structural_key(p: RunConfig) -> tuple:
+    # un profil de rendements fixe les chocs eux-mêmes : mu / sigma identiques dans le groupe
+    shocks = None if p.returns is None else (p.returns, p.mu, p.sigma)
+    return tuple(getattr(p, name) for name in STRUCTURAL_FIELDS) + (p.rng, shocks)
+
+
+def _ewma_lambda(p: RunConfig) -> float:
+    return math.exp(math.log(0.5)/max(1, p.vt_halflife)) if p.use_vt else 0.5  # demi-vie → lambda
+
+
+def stack_params(ps: List[RunConfig], reps: int) -> SimpleNamespace:
+    """
+    Paramètres résolus de plusieurs configs en colonnes : chaque config occupe
+    'reps' colonnes consécutives. Les champs structurels doivent être identiques.
+    """
+    q = SimpleNamespace(**{name: getattr(ps[0], name) for name in STRUCTURAL_FIELDS})
+    for name in NUMERIC_FIELDS:
+        q.__dict__[name] = np.repeat(np.array([float(getattr(p, name)) for p in ps]), reps)
+    q.lam = np.repeat(np.array([_ewma_lambda(p) for p in ps]), reps)
+    return q
+
+
+def _simulate_chunk(p, z: np.ndarray, keep_equity: bool, raw: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Boucle de simu vectorisée sur un bloc de chemins. 'p' est un RunConfig
+    (paramètres scalaires) ou un stack_params (un paramètre par colonne).
+    z : chocs N(0,1) (base_r = mu + z*sigma), ou rendements base_r déjà tirés si raw.
+    """
+    T, n = z.shape
+
+    eq = np.ones(n)
+    hwm = np.ones(n)
+    floor = np.ones(n) * (1.0 - p.cppi_alpha) if p.use_cppi else np.zeros(n)
+
+    vol_est = np.ones(n) * p.sigma
+    lam = getattr(p, "lam", None)
+    if lam is None:
+        lam = _ewma_lambda(p)
+
+    use_soft = p.use_soft_barrier and np.any(np.asarray(p.soft_barrier) > 0.0)
+    soft_on = np.asarray(p.soft_barrier) > 0.0
+    floor_mult = 1.0 - p.cppi_alpha
+    total_mult = 1.0 - p.total_limit
+    daily_mult = 1.0 - p.daily_limit
+    target_level = 1.0 + p.target_profit
+    spd = p.steps_per_day if p.steps_per_day > 0 else T + 1  # 1 "journée" = tout (fallback)
+
+    # Diagnostics
+    kelly_cap_hits = np.zeros(n, dtype=np.int64)
+    cppi_freeze_events = np.zeros(n, dtype=np.int64)
+    no_upsize_after_loss = np.ones(n, dtype=bool)
+    used_default_expo = np.zeros(n, dtype=bool)
+    last_position = np.zeros(n)
+    last_step_was_loss = np.zeros(n, dtype=bool)
+    first_cross_step = np.full(n, -1, dtype=np.int64)
+
+    # DD & violations (mis à jour en ligne, sans garder la série)
+    max_dd_total = np.zeros(n)
+    max_dd_daily = np.zeros(n)
+    max_loss_daily = np.zeros(n)     # pire 1 - eq / ouverture du jour (ce que teste violations_daily)
+    violations_daily = np.zeros(n, dtype=np.int64)
+    violations_total = np.zeros(n, dtype=np.int64)
+    in_violation = np.zeros(n, dtype=bool)
+    day_peak = eq.copy()
+    day_open = eq.copy()
+    day_threshold = eq * daily_mult
+    day_violated = np.zeros(n, dtype=bool)
+
+    equity = None
+    if keep_equity:
+        equity = np.empty((T + 1, n))
+        equity[0] = eq
+
+    for t in range(1, T + 1):
+        base_r = z[t - 1] if raw else p.mu + z[t - 1] * p.sigma
+
+        # Sizers "min aggregator" (inf = pas de contrainte)
+        f_raw = np.full(n, np.inf)
+        has_size = np.zeros(n, dtype=bool)
+        if p.use_vt:
+            f_raw = p.vt_target_vol / np.maximum(1e-8, vol_est)
+            has_size[:] = True
+        if p.use_kelly_cap:
+            f_raw = np.minimum(f_raw, p.kelly_cap)
+            has_size[:] = True
+        if use_soft:
+            dd_now = (hwm - eq) / np.maximum(hwm, 1e-8)
+            soft_hit = (dd_now > p.soft_barrier) & soft_on
+            f_raw = np.where(soft_hit, np.minimum(f_raw, np.maximum(0.0, 1.0 - dd_now)), f_raw)
+            has_size |= soft_hit
+
+        # strict opt-in: pas d'expo si aucun sizer
+        used_default_expo = ~has_size
+        f_raw = np.where(has_size, f_raw, 0.0)
+
+        # Pacing
+        f = np.maximum(0.0, np.minimum(1.0, f_raw * p.spend_rate))
+
+        # Règle d'or (diagnostic seulement)
+        no_upsize_after_loss &= ~(last_step_was_loss & (f > last_position))
+
+        # CPPI (hwm >= 1e-9 > 0 par construction)
+        if p.use_cppi:
+            cushion_ratio = np.maximum(0.0, eq - floor) / hwm
+            frozen = cushion_ratio < p.cppi_freeze_frac
+            f = np.where(frozen, 0.0, f)
+            cppi_freeze_events += frozen
+
+        if p.use_kelly_cap:
+            kelly_cap_hits += np.abs(f - p.kelly_cap) < 1e-12
+
+        # PnL step (linéarisé)
+        new_eq = np.maximum(1e-9, eq * (1.0 + f * base_r))
+
+        crossed = (first_cross_step < 0) & (new_eq >= target_level)
+        first_cross_step[crossed] = t
+
+        # Mises à jour HWM / floor
+        new_high = new_eq > hwm
+        hwm = np.where(new_high, new_eq, hwm)
+        if p.use_cppi:
+            floor = np.where(new_high, hwm * floor_mult, floor)
+
+        if p.use_vt:
+            vol_est = np.sqrt(lam * (vol_est * vol_est) + (1-lam) * (base_r * base_r))
+
+        last_step_was_loss = new_eq < eq
+        last_position = f
+        eq = new_eq
+        if keep_equity:
+            equity[t] = eq
+
+        # DD total (peak = hwm)
+        max_dd_total = np.maximum(max_dd_total, (hwm - eq) / hwm)
+
+        # Violations total (occurrences distinctes sous HWM*(1 - total_limit))
+        now_viol = eq < hwm * total_mult
+        violations_total += now_viol & ~in_violation
+        in_violation = now_viol
+
+        # Fenêtres journalières (redémarrent à equity_open)
+        if t % spd == 0:
+            day_peak = eq.copy()
+            day_open = eq.copy()
+            day_threshold = eq * daily_mult
+            day_violated = np.zeros(n, dtype=bool)
+        day_peak = np.maximum(day_peak, eq)
+        max_dd_daily = np.maximum(max_dd_daily, (day_peak - eq) / day_peak)
+        max_loss_daily = np.maximum(max_loss_daily, 1.0 - eq / day_open)
+        hit = ~day_violated & (eq < day_threshold)
+        violations_daily += hit
+        day_violated |= hit
+
+    # --- Cible de profit -> days_to_target & target_pass ---
+    crossed = first_cross_step >= 0
+    if p.steps_per_day > 0:
+        days_to_target = np.where(crossed, np.ceil(first_cross_step / p.steps_per_day), -1).astype(np.int64)
+    else:
+        crossed = np.zeros(n, dtype=bool)
+        days_to_target = np.full(n, -1, dtype=np.int64)
+    target_pass = crossed & (days_to_target <= p.max_days) & (violations_daily == 0) & (violations_total == 0)
+
+    out = {
+        "max_dd_total": max_dd_total,
+        "max_dd_daily": max_dd_daily,
+        "max_loss_daily": max_loss_daily,
+        "violations_daily": violations_daily,
+        "violations_total": violations_total,
+        "days_to_target": days_to_target,   # -1 si cible non atteinte
+        "target_pass": target_pass,
+        "kelly_cap_hits": kelly_cap_hits,
+        "cppi_freeze_events": cppi_freeze_events,
+        "no_upsize_after_loss": no_upsize_after_loss,
+        "used_default_expo": used_default_expo,
+    }
+    if keep_equity:
+        out["equity"] = np.ascontiguousarray(equity.T)
+    return out
+
+
+def simulate_batch(p: Union[SimInput, RunConfig], seeds: Iterable[int], keep_equity: bool = False,
+                   chunk_paths: int = DEFAULT_CHUNK_PATHS, store_shocks: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Simule un chemin par seed et retourne des tableaux (N,) par métrique
+    (+ 'equity' de forme (N, total_steps+1) si keep_equity).
+    store_shocks=False : chocs tirés sans être ajoutés au SHOCK_STORE (voir ShockStore.get).
+    """
+    p = as_run_config(p)
+
+    seeds = list(seeds)
+    chunk_paths = max(1, int(chunk_paths))
+    parts: List[Dict[str, np.ndarray]] = []
+    for c0 in range(0, len(seeds), chunk_paths):
+        chunk = seeds[c0:c0 + chunk_paths]
+        if p.returns is not None:
+            r = generate_returns(p.returns, chunk, p.total_steps, p.mu, p.sigma, p.rng)
+            parts.append(_simulate_chunk(p, r, keep_equity, raw=True))
+        else:
+            parts.append(_simulate_chunk(p, SHOCK_STORE.get(chunk, p.total_steps, p.rng, store=store_shocks),
+                                         keep_equity))
+
+    if not parts:
+        return _simulate_chunk(p, np.empty((p.total_steps, 0)), keep_equity)
+    return {k: np.concatenate([part[k] for part in parts]) for k in parts[0]}
+
+
+def simulate_points(ps: List[Union[SimInput, RunConfig]], seeds: Iterable[int], z: Optional[np.ndarray] = None,
+                    chunk_paths: int = DEFAULT_CHUNK_PATHS) -> List[Dict[str, np.ndarray]]:
+    """
+    Évalue plusieurs configs sur les mêmes seeds (nombres aléatoires communs) : les tirages
+    sont générés une seule fois (par flux rng) et les configs de même structure sont
+    empilées en colonnes. 'z' : chocs déjà tirés, valables si toutes les configs sans
+    profil partagent le même rng. Retourne, dans l'ordre de 'ps', un dict de tableaux (n,) par config.
+    """
+    resolved = [as_run_config(p) for p in ps]
+    seeds = list(seeds)
+    n = len(seeds)
+    if not resolved or n == 0:
+        return [_simulate_chunk(p, np.empty((p.total_steps, 0)), False) for p in resolved]
+    zs: Dict[str, np.ndarray] = {}
+    for rng in sorted({p.rng for p in resolved if p.returns is None}):
+        if z is not None:
+            if len(zs) or any(p.rng != rng for p in resolved if p.returns is None):
+                raise ValueError("z fourni mais configs sur plusieurs flux rng")
+            zs[rng] = z
+        else:
+            zs[rng] = SHOCK_STORE.get(seeds, max(p.total_steps for p in resolved if p.returns is None and p.rng == rng),
+                                      rng)
+
+    groups: Dict[tuple, List[int]] = {}
+    for i, p in enumerate(resolved):
+        groups.setdefault(structural_key(p), []).append(i)
+
+    results: List[Optional[Dict[str, np.ndarray]]] = [None] * len(resolved)
+    per_chunk = max(1, int(chunk_paths) // n)
+    for idxs in groups.values():
+        head = resolved[idxs[0]]
+        if head.returns is not None:
+            # rendements tirés une fois par groupe (même profil, mu, sigma)
+            zt = generate_returns(head.returns, seeds, head.total_steps, head.mu, head.sigma, head.rng)
+        else:
+            # préfixe des flux : un chemin plus court consomme les mêmes premiers tirages
+            zt = zs[head.rng][:head.total_steps]
+        for c0 in range(0, len(idxs), per_chunk):
+            sub = idxs[c0:c0 + per_chunk]
+            res = _simulate_chunk(stack_params([resolved[i] for i in sub], n), np.tile(zt, (1, len(sub))), False,
+                                  raw=head.returns is not None)
+            for k, i in enumerate(sub):
+                results[i] = {name: arr[k * n:(k + 1) * n] for name, arr in res.items()}
+    return results
+
+
+def mc_counts(res: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Compteurs MC (pass FTMO / pass complet) et échantillon de max_dd_total."""
+    return {
+        "pass_ftmo": int(((res["violations_daily"] == 0) & (res["violations_total"] == 0)).sum()),
+        "pass_full": int(res["target_pass"].sum()),
+        "dds": res["max_dd_total"].tolist(),
+    }
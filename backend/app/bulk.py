@@ -0,0 +1,104 @@
+"""
+/simulate_batch : plusieurs simulations (presets, variantes) en une requête.
+
+Items = payloads SimInput complets, ou surcharges d'une base commune : clés SimInput,
+chemins pointés "modules.<Module>.<clé>" (comme /sweep) ou bloc modules fusionné module
+par module. Chaque item est résolu une fois (RunConfig) et lu dans le cache de /simulate
+(même clé) ; les items manquants (dédupliqués) sont simulés en série ou par chunks sur le
+pool de processus partagé. Résultats dans l'ordre des items, identiques à /simulate pour
+le même payload et les mêmes 'fields' (projection, groupes non demandés non calculés).
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import os
+
+from pydantic import ValidationError
+
+from backend.app.main import RunConfig, SimInput, resolve_config, simulate_equity
+from backend.app.parallel import MAX_WORKERS, get_pool
+
+MAX_ITEMS = int(os.environ.get("SIM_BATCH_MAX_ITEMS", 1000))
+
+
+class ItemError(ValueError):
+    """Item invalide : index dans la requête + erreurs de validation."""
+
+    def __init__(self, index: int, errors: Any):
+        super().__init__(f"item {index}: {errors}")
+        self.index = index
+        self.errors = errors
+
+
+def merge_item(base: Dict[str, Any], item: Dict[str, Any]) -> Dict[str, Any]:
+    """Surcharges 'item' appliquées à 'base' (sans muter l'un ni l'autre)."""
+    d = dict(base)
+    d["modules"] = {name: dict(cfg) for name, cfg in (base.get("modules") or {}).items()}
+    for key, value in item.items():
+        parts = key.split(".")
+        if parts[0] == "modules" and len(parts) == 3:
+            d["modules"].setdefault(parts[1], {})[parts[2]] = value
+        elif key == "modules" and isinstance(value, dict):
+            for name, cfg in value.items():
+                d["modules"][name] = {**d["modules"].get(name, {}), **cfg} if isinstance(cfg, dict) else cfg
+        else:
+            d[key] = value
+    return d
+
+
+def build_inputs(items: Sequence[Dict[str, Any]], base: Optional[Dict[str, Any]] = None) -> List[SimInput]:
+    """SimInput de chaque item (ItemError au premier item invalide)."""
+    if len(items) > MAX_ITEMS:
+        raise ValueError(f"trop d'items: {len(items)} (max {MAX_ITEMS})")
+    out = []
+    for i, item in enumerate(items):
+        try:
+            out.append(SimInput(**(merge_item(base, item) if base is not None else item)))
+        except ValidationError as e:
+            raise ItemError(i, e.errors(include_url=False, include_context=False))
+        except (TypeError, ValueError) as e:
+            raise ItemError(i, str(e))
+    return out
+
+
+def simulate_configs(cfgs: List[RunConfig], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """simulate_equity de chaque config (tâche exécutable dans un worker)."""
+    return [simulate_equity(cfg, fields) for cfg in cfgs]
+
+
+def run_batch(ps: List[SimInput], workers: int = 1, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Résultats /simulate de chaque payload, dans l'ordre ; items identiques calculés une fois."""
+    from backend.app.cache import RESULT_CACHE, cache_key, config_params
+
+    cfgs = [resolve_config(p) for p in ps]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(cfgs)
+    pending: Dict[str, List[int]] = {}   # clé de cache -> items à calculer
+    for i, cfg in enumerate(cfgs):
+        if cfg.seed is None:
+            pending[f"unseeded:{i}"] = [i]   # tirage non reproductible, jamais mis en cache
+            continue
+        params = config_params(cfg)
+        if fields is not None:
+            params["fields"] = sorted(set(fields))   # même clé que /simulate?fields=...
+        key = cache_key("simulate", params)
+        value = RESULT_CACHE.get(key) if RESULT_CACHE.enabled else None
+        if value is None:
+            pending.setdefault(key, []).append(i)
+        else:
+            results[i] = value
+
+    keys = list(pending)
+    todo = [cfgs[pending[key][0]] for key in keys]
+    workers = max(1, min(int(workers or 1), MAX_WORKERS))
+    if workers == 1 or len(todo) <= 1:
+        computed = simulate_configs(todo, fields)
+    else:
+        size = -(-len(todo) // (workers * 4))
+        pool = get_pool(workers)
+        futures = [pool.submit(simulate_configs, todo[c0:c0 + size], fields) for c0 in range(0, len(todo), size)]
+        computed = [res for fut in futures for res in fut.result()]
+
+    for key, value in zip(keys, computed):
+        if RESULT_CACHE.enabled and not key.startswith("unseeded:"):
+            RESULT_CACHE.put(key, value)
+        for i in pending[key]:
+            results[i] = value
+    return results
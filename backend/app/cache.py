@@ -0,0 +1,213 @@
+"""
+Cache de résultats adressé par contenu pour /simulate et /simulate_mc.
+
+Clé = sha256 du payload normalisé (après extraction modules.* et clamps, donc deux
+presets équivalents partagent la même entrée). Deux niveaux :
+  - mémoire : LRU (SIM_CACHE_SIZE entrées, 0 = désactivé), borné aussi en octets
+    (SIM_CACHE_MEM_BYTES, taille estimée des objets Python : les séries equity longues
+    comptent à leur poids ; une entrée plus grosse que la borne ne reste que sur disque)
+  - disque (optionnel) : SIM_CACHE_DIR, fichiers JSON, éviction des plus anciens
+    au-delà de SIM_CACHE_MAX_BYTES
+Les résultats en cache sont partagés : ne pas les muter.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import dataclasses
+import hashlib
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+from backend.app.main import RUN_FIELDS, RunConfig, SimInput, resolve_config
+
+
+def normalized_params(p: SimInput, drop_seed: bool = False) -> Dict[str, Any]:
+    """Paramètres effectifs d'une simu (modules.* extraits, clamps appliqués et tracés)."""
+    return config_params(resolve_config(p), drop_seed)
+
+
+def config_params(cfg: RunConfig, drop_seed: bool = False) -> Dict[str, Any]:
+    """normalized_params d'une config déjà résolue."""
+    out = {name: getattr(cfg, name) for name in RUN_FIELDS if not (drop_seed and name == "seed")}
+    out["returns"] = dataclasses.asdict(cfg.returns) if cfg.returns is not None else None
+    out["param_clamps"] = cfg.clamps_dict()
+    return out
+
+
+def cache_key(kind: str, params: Dict[str, Any]) -> str:
+    blob = json.dumps({"kind": kind, "params": params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def approx_bytes(value: Any) -> int:
+    """Taille mémoire approximative d'un résultat (dict / list / scalaires / ndarray)."""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approx_bytes(k) + approx_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(approx_bytes(v) for v in value)
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + (0 if value.base is None else value.nbytes)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    def __init__(self, max_items: int = 256, disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = 256 * 1024 * 1024, mem_max_bytes: int = 64 * 1024 * 1024):
+        self.max_items = max(0, int(max_items))
+        self.mem_max_bytes = int(mem_max_bytes)
+        self.mem_bytes = 0
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = int(disk_max_bytes)
+        self._mem: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_items > 0 or bool(self.disk_dir)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return self._mem[key]
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._mem_put(key, value)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._mem_put(key, value)
+        self._disk_put(key, value)
+
+    def _mem_put(self, key: str, value: Any) -> None:
+        if self.max_items <= 0:
+            return
+        size = approx_bytes(value)
+        self._mem_drop(key)
+        if size > self.mem_max_bytes:
+            return
+        self._mem[key] = value
+        self._sizes[key] = size
+        self.mem_bytes += size
+        while len(self._mem) > self.max_items or self.mem_bytes > self.mem_max_bytes:
+            self._mem_drop(next(iter(self._mem)))
+
+    def _mem_drop(self, key: str) -> None:
+        if key in self._mem:
+            del self._mem[key]
+            self.mem_bytes -= self._sizes.pop(key)
+
+    def _disk_get(self, key: str) -> Optional[Any]:
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                value = json.load(fh)
+            os.utime(path)  # LRU approximatif via mtime
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key: str, value: Any) -> None:
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(value, fh, separators=(",", ":"))
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self._disk_evict()
+
+    def _disk_evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.disk_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._sizes.clear()
+            self.mem_bytes = 0
+            self.hits = self.disk_hits = self.misses = 0
+        if self.disk_dir:
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.disk_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "items": len(self._mem),
+                "max_items": self.max_items,
+                "bytes": self.mem_bytes,
+                "max_bytes": self.mem_max_bytes,
+                "disk": bool(self.disk_dir),
+            }
+
+
+RESULT_CACHE = ResultCache(
+    max_items=int(os.environ.get("SIM_CACHE_SIZE", 256)),
+    disk_dir=os.environ.get("SIM_CACHE_DIR") or None,
+    disk_max_bytes=int(os.environ.get("SIM_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+    mem_max_bytes=int(os.environ.get("SIM_CACHE_MEM_BYTES", 64 * 1024 * 1024)),
+)
+
+
+def cached(kind: str, params: Dict[str, Any], compute):
+    """Retourne le résultat en cache pour (kind, params) ou le calcule et le stocke."""
+    if not RESULT_CACHE.enabled:
+        return compute()
+    key = cache_key(kind, params)
+    value = RESULT_CACHE.get(key)
+    if value is None:
+        value = compute()
+        RESULT_CACHE.put(key, value)
+    return value
@@ -0,0 +1,161 @@
+"""
+Moteur CPPI avec freeze (hard / soft), vectorisé sur une matrice de trades (chemins x trades).
+
+Même logique que l'ancien run_strategy par trade (tests/test_freeze_modes.py) :
+  - cushion C = max(W - F, 0), ratio C/W ; freeze si ratio < tau
+  - hors freeze : exposition E = lam * f * C, W += E * ret, HWM et plancher F = HWM*(1-alpha)
+  - soft : un chemin gelé se dégèle dès que ratio >= tau (et trade au même step)
+Tous les chemins avancent ensemble ; l'état est en tableaux (n,), pas d'événements dict.
+Résultats identiques bit à bit à la boucle scalaire (mêmes opérations flottantes).
+"""
+from typing import Any, Dict, Literal
+import math
+
+import numpy as np
+
+FreezeMode = Literal["hard", "soft"]
+
+
+def run_cppi(trades, W0: float = 100_000, alpha: float = 0.10, f: float = 0.1, lam: float = 0.5,
+             freeze_mode: FreezeMode = "hard", tau: float = 0.05,
+             keep_history: bool = True) -> Dict[str, np.ndarray]:
+    """
+    trades : (n_paths, n_trades) ou (n_trades,) — résultats en % du capital engagé.
+    Retourne des tableaux par chemin (n,) : final_capital, total_return, max_drawdown (<= 0),
+    volatility (annualisée, 252), freeze_count, defreeze_count, first_freeze (-1 si jamais),
+    max_capital, min_capital ; + si keep_history : capital, exposure, frozen (n, n_trades).
+    """
+    trades = np.asarray(trades, dtype=float)
+    if trades.ndim == 1:
+        trades = trades[None, :]
+    n, T = trades.shape
+    soft = freeze_mode == "soft"
+    k = lam * f
+    floor_mult = 1 - alpha
+
+    W = np.full(n, float(W0))
+    HWM = W.copy()
+    F = HWM * floor_mult
+    frozen = np.zeros(n, dtype=bool)
+
+    freeze_count = np.zeros(n, dtype=np.int64)
+    defreeze_count = np.zeros(n, dtype=np.int64)
+    first_freeze = np.full(n, -1, dtype=np.int64)
+
+    # métriques en ligne sur la série de capital (après chaque trade)
+    peak = np.full(n, -np.inf)
+    max_dd = np.zeros(n)
+    max_cap = np.full(n, -np.inf)
+    min_cap = np.full(n, np.inf)
+    prev = np.zeros(n)
+    r_mean = np.zeros(n)   # Welford sur les rendements step à step
+    r_m2 = np.zeros(n)
+
+    if keep_history:
+        capital = np.empty((n, T))
+        exposure = np.empty((n, T))
+        frozen_hist = np.empty((n, T), dtype=bool)
+
+    for i in range(T):
+        C = np.maximum(W - F, 0)
+        positive = W > 0
+        ratio = np.where(positive, C / np.where(positive, W, 1.0), 0)
+
+        if soft:
+            thaw = frozen & (ratio >= tau)
+            frozen &= ~thaw
+            defreeze_count += thaw
+        hit = ~frozen & (ratio < tau)
+        frozen |= hit
+        freeze_count += hit
+        first_freeze[hit & (first_freeze < 0)] = i
+
+        E = np.where(frozen, 0.0, k * C)
+        W = np.where(frozen, W, W + E * trades[:, i])
+        HWM = np.maximum(HWM, W)
+        F = HWM * floor_mult
+
+        peak = np.maximum(peak, W)
+        max_dd = np.minimum(max_dd, (W - peak) / peak)
+        max_cap = np.maximum(max_cap, W)
+        min_cap = np.minimum(min_cap, W)
+        if i > 0:
+            r = (W - prev) / prev
+            delta = r - r_mean
+            r_mean += delta / i
+            r_m2 += delta * (r - r_mean)
+        prev = W
+
+        if keep_history:
+            capital[:, i] = W
+            exposure[:, i] = E
+            frozen_hist[:, i] = frozen
+
+    if T > 2:
+        volatility = np.sqrt(r_m2 / (T - 1)) * math.sqrt(252)
+    else:
+        volatility = np.zeros(n)
+
+    out = {
+        "final_capital": W,
+        "total_return": (W - W0) / W0,
+        "max_drawdown": max_dd,
+        "volatility": volatility,
+        "freeze_count": freeze_count,
+        "defreeze_count": defreeze_count,
+        "first_freeze": first_freeze,
+        "max_capital": max_cap,
+        "min_capital": min_cap,
+    }
+    if keep_history:
+        out["capital"] = capital
+        out["exposure"] = exposure
+        out["frozen"] = frozen_hist
+    return out
+
+
+def compare_modes(trades, **params) -> Dict[str, Dict[str, float]]:
+    """Hard vs soft sur tous les chemins : moyennes / quantiles par mode."""
+    summary = {}
+    for mode in ("hard", "soft"):
+        res = run_cppi(trades, freeze_mode=mode, keep_history=False, **params)
+        summary[mode] = {
+            "final_capital_mean": float(res["final_capital"].mean()),
+            "final_capital_p50": float(np.median(res["final_capital"])),
+            "max_drawdown_p95": float(np.quantile(res["max_drawdown"], 0.05)),  # DD <= 0 : queue basse
+            "freeze_rate": float((res["freeze_count"] > 0).mean()),
+            "defreeze_rate": float((res["defreeze_count"] > 0).mean()),
+        }
+    return summary
+
+
+def run_strategy(trades, W0=100_000, alpha=0.10, f=0.1, lam=0.5, freeze_mode="hard", tau=0.05) -> Dict[str, Any]:
+    """Compat un seul chemin : même format que l'ancien run_strategy (historiques en listes)."""
+    res = run_cppi(trades, W0=W0, alpha=alpha, f=f, lam=lam, freeze_mode=freeze_mode, tau=tau)
+    capital, exposure, frozen = res["capital"][0], res["exposure"][0], res["frozen"][0]
+    # événements reconstruits depuis le masque (transitions), état d'avant le step
+    was = np.concatenate(([False], frozen[:-1]))
+    before = np.concatenate(([float(W0)], capital[:-1]))
+    hwm_before = np.maximum.accumulate(before)
+    events = []
+    for i in np.flatnonzero(frozen != was):
+        W = float(before[i])
+        C = max(W - float(hwm_before[i]) * (1 - alpha), 0)
+        events.append({"step": int(i), "action": "freeze" if frozen[i] else "defreeze",
+                       "cushion_ratio": C / W if W > 0 else 0, "capital": W})
+    return {
+        "capital_history": capital.tolist(),
+        "exposure_history": exposure.tolist(),
+        "freeze_events": events,
+        "metrics": {
+            "initial_capital": W0,
+            "final_capital": float(res["final_capital"][0]),
+            "total_return": float(res["total_return"][0]),
+            "max_drawdown": float(res["max_drawdown"][0]),
+            "volatility": float(res["volatility"][0]),
+            "freeze_count": int(res["freeze_count"][0]),
+            "defreeze_count": int(res["defreeze_count"][0]),
+            "max_capital": float(res["max_capital"][0]),
+            "min_capital": float(res["min_capital"][0]),
+        },
+    }
@@ -0,0 +1,169 @@
+"""
+Générateurs de rendements (profils de presets/profiles.json) tirés en bloc avec NumPy.
+
+Un profil décrit le processus des chocs base_r consommés par les moteurs :
+- sampler    : "gaussian" ou "student_t" (t de Student réduit à variance 1, nu > 2)
+- vol_process: "none" (sigma constant) ou "ewma" (volatilité conditionnelle en grappes) :
+               s2[t+1] = lam*s2[t] + (1-lam)*(r[t]-mu)^2, départ sigma0, plafond 'shock'
+- jumps      : saut N(0, jump_sigma) avec probabilité p_jump à chaque pas
+- p_tail / tail_mult : mélange de queue, l'innovation est multipliée par tail_mult
+               avec probabilité p_tail (grille heavy_tail de backend.app.stress.STRESS_PARAMS)
+
+generate_returns retourne une matrice (steps, n) : colonne j = flux du seed seeds[j]
+(numpy.random.default_rng, ou blocs Philox de backend.app.streams si rng="philox"),
+indépendant de la composition du batch. Le moteur scalaire et le moteur batch consomment
+la même colonne pour un seed donné, donc restent identiques. Le profil gaussien sans vol
+ni sauts n'utilise pas ce module : les moteurs prennent les chocs du SHOCK_STORE.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+import json
+import math
+import os
+
+import numpy as np
+
+from backend.app.streams import BLOCK_STEPS, block_generator, block_range, stream_key
+
+SAMPLERS = ("gaussian", "student_t")
+VOL_PROCESSES = ("none", "ewma")
+
+# presets/profiles.json à la racine du repo (surchargeable par SIM_PROFILES)
+PROFILES_PATH = os.environ.get("SIM_PROFILES") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "presets", "profiles.json")
+
+
+@dataclass(frozen=True)
+class ReturnProfile:
+    sampler: str = "gaussian"
+    nu: float = 4.0
+    vol_process: str = "none"
+    ewma_lambda: float = 0.94
+    sigma0: Optional[float] = None    # None = sigma de la simu
+    shock: Optional[float] = None     # plafond de la vol conditionnelle (None = pas de plafond)
+    p_jump: float = 0.0
+    jump_sigma: float = 0.0
+    p_tail: float = 0.0
+    tail_mult: float = 1.0
+
+    @property
+    def is_plain_gaussian(self) -> bool:
+        return (self.sampler == "gaussian" and self.vol_process == "none" and self.p_jump <= 0.0
+                and self.p_tail <= 0.0)
+
+
+def flatten_profile(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Format profiles.json (blocs ewma / jumps imbriqués) -> champs plats de ReturnProfile + mu/sigma."""
+    out = {k: raw[k] for k in ("sampler", "nu", "vol_process", "mu", "sigma") if k in raw}
+    ewma = raw.get("ewma") or {}
+    for key, field in (("lambda", "ewma_lambda"), ("sigma0", "sigma0"), ("shock", "shock")):
+        if key in ewma:
+            out[field] = ewma[key]
+    jumps = raw.get("jumps") or {}
+    if jumps.get("enabled"):
+        out["p_jump"] = jumps.get("p_jump", 0.0)
+        out["jump_sigma"] = jumps.get("jump_sigma", 0.0)
+    return out
+
+
+@lru_cache(maxsize=None)
+def _load_profiles(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as fh:
+        return {name: flatten_profile(raw) for name, raw in json.load(fh).items()}
+
+
+def load_profiles(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Profils nommés (champs plats), lus une fois par chemin."""
+    return dict(_load_profiles(os.path.abspath(path or PROFILES_PATH)))
+
+
+def make_profile(**fields: Any) -> ReturnProfile:
+    """ReturnProfile validé (ValueError si sampler / vol_process / paramètres invalides)."""
+    prof = ReturnProfile(**fields)
+    if prof.sampler not in SAMPLERS:
+        raise ValueError(f"sampler inconnu: {prof.sampler!r} (attendu: {', '.join(SAMPLERS)})")
+    if prof.vol_process not in VOL_PROCESSES:
+        raise ValueError(f"vol_process inconnu: {prof.vol_process!r} (attendu: {', '.join(VOL_PROCESSES)})")
+    if prof.sampler == "student_t" and not prof.nu > 2:
+        raise ValueError("student_t: nu doit être > 2 (variance finie)")
+    if not 0.0 <= prof.ewma_lambda < 1.0:
+        raise ValueError("ewma_lambda doit être dans [0, 1)")
+    if not 0.0 <= prof.p_jump <= 1.0 or prof.jump_sigma < 0.0:
+        raise ValueError("p_jump doit être dans [0, 1] et jump_sigma >= 0")
+    if not 0.0 <= prof.p_tail <= 1.0 or prof.tail_mult < 0.0:
+        raise ValueError("p_tail doit être dans [0, 1] et tail_mult >= 0")
+    return prof
+
+
+def _path_rng(seed: Optional[int]) -> np.random.Generator:
+    return np.random.default_rng(None if seed is None else seed % (1 << 64))
+
+
+def _draw(prof: ReturnProfile, rng: np.random.Generator, size: int, t_scale: float):
+    """Innovations réduites et sauts (ou None) de 'size' pas, dans l'ordre de tirage du profil."""
+    if prof.sampler == "student_t":
+        eps = rng.standard_t(prof.nu, size) * t_scale
+    else:
+        eps = rng.standard_normal(size)
+    jumps = None
+    if prof.p_jump > 0.0:
+        hit = rng.random(size) < prof.p_jump
+        jumps = np.where(hit, rng.standard_normal(size) * prof.jump_sigma, 0.0)
+    if prof.p_tail > 0.0:  # tiré en dernier : flux des autres profils inchangés
+        eps *= np.where(rng.random(size) < prof.p_tail, prof.tail_mult, 1.0)
+    return eps, jumps
+
+
+def _innovations(prof: ReturnProfile, seeds: list, steps: int, rng: str = "legacy"):
+    """
+    Innovations réduites eps (n, steps) et sauts (n, steps) ; un flux par seed.
+    rng="philox" : tirages par blocs de compteur (streams.BLOCK_STEPS), même ordre dans chaque bloc.
+    """
+    n = len(seeds)
+    eps = np.empty((n, steps))
+    jumps = np.zeros((n, steps)) if prof.p_jump > 0.0 else None
+    t_scale = math.sqrt((prof.nu - 2.0) / prof.nu) if prof.sampler == "student_t" else 1.0
+    for j, seed in enumerate(seeds):
+        if rng == "philox":
+            key = stream_key(seed)
+            parts = [_draw(prof, block_generator(key, b), BLOCK_STEPS, t_scale) for b in block_range(steps)]
+            e = np.concatenate([part[0] for part in parts])[:steps] if parts else np.empty(0)
+            jp = np.concatenate([part[1] for part in parts])[:steps] if parts and jumps is not None else None
+        else:
+            e, jp = _draw(prof, _path_rng(seed), steps, t_scale)
+        eps[j] = e
+        if jumps is not None:
+            jumps[j] = jp
+    return eps, jumps
+
+
+def generate_returns(prof: ReturnProfile, seeds: Iterable[Optional[int]], steps: int,
+                     mu: float, sigma: float, rng: str = "legacy") -> np.ndarray:
+    """Rendements base_r de forme (steps, n) pour le profil 'prof' (colonne j = seeds[j])."""
+    seeds = list(seeds)
+    steps = max(0, int(steps))
+    eps, jumps = _innovations(prof, seeds, steps, rng)
+    eps = np.ascontiguousarray(eps.T)
+    if jumps is not None:
+        jumps = np.ascontiguousarray(jumps.T)
+
+    if prof.vol_process == "none":
+        r = mu + eps * sigma
+        if jumps is not None:
+            r += jumps
+        return r
+
+    # EWMA : récurrence en temps, vectorisée sur les chemins
+    lam = prof.ewma_lambda
+    cap2 = prof.shock * prof.shock if prof.shock is not None else math.inf
+    s0 = prof.sigma0 if prof.sigma0 is not None else sigma
+    s2 = np.full(len(seeds), min(s0 * s0, cap2))
+    r = np.empty((steps, len(seeds)))
+    for t in range(steps):
+        dev = np.sqrt(s2) * eps[t]
+        if jumps is not None:
+            dev = dev + jumps[t]
+        r[t] = mu + dev
+        s2 = np.minimum(lam * s2 + (1.0 - lam) * (dev * dev), cap2)
+    return r
@@ -0,0 +1,204 @@
+"""
+Jobs asynchrones pour les MC et sweeps longs.
+
+POST /jobs -> id ; le travail tourne sur un exécuteur borné (SIM_JOB_WORKERS threads,
+au plus SIM_JOB_MAX_PENDING jobs en attente/en cours), distinct du threadpool des
+endpoints : une requête interactive n'attend jamais un thread occupé par un job.
+Les jobs multi-process utilisent leur propre groupe de pools ("jobs", voir
+backend.app.parallel.pool_group), avec au plus SIM_JOB_MAX_WORKERS workers par job :
+ils ne prennent pas les workers de /simulate_batch, /sweep ou /simulate_mc, mais
+partagent toujours les CPU de la machine.
+Le job avance par blocs (seeds ou points de grille) ; après chaque bloc, la
+progression et un résultat partiel sont écrits et l'annulation est vérifiée.
+
+États : queued -> running -> done | failed | cancelled. Les jobs sont stockés en
+SQLite (SIM_JOBS_DB, ':memory:' par défaut) et les jobs terminés expirent après
+SIM_JOBS_TTL secondes.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from backend.app.main import MCInput, SweepInput, mc_cache_params, mc_stats, _simulate_mc
+from backend.app.parallel import MAX_WORKERS, merge_counts, pool_group, run_mc_counts
+
+# Nombre de blocs visés par job (granularité de la progression / de l'annulation)
+TARGET_BLOCKS = 20
+
+# Workers max par job (sous la taille des pools des endpoints par défaut)
+JOB_MAX_WORKERS = int(os.environ.get("SIM_JOB_MAX_WORKERS", max(1, MAX_WORKERS // 2)))
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobStore:
+    """Table SQLite des jobs (état, progression, résultat partiel / final), avec TTL."""
+
+    def __init__(self, path: str = ":memory:", ttl: float = 3600.0):
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY, kind TEXT, status TEXT, done INTEGER, total INTEGER,
+            partial TEXT, result TEXT, error TEXT, created REAL, updated REAL)""")
+        # jobs d'un process précédent : jamais terminés
+        self._db.execute("UPDATE jobs SET status='failed', error='interrompu (redémarrage)', updated=? "
+                         "WHERE status IN ('queued', 'running')", (time.time(),))
+
+    def create(self, kind: str, total: int) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT INTO jobs VALUES (?, ?, 'queued', 0, ?, NULL, NULL, NULL, ?, ?)",
+                             (job_id, kind, total, now, now))
+        return job_id
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        for name in ("partial", "result"):
+            if name in fields and fields[name] is not None:
+                fields[name] = json.dumps(fields[name], separators=(",", ":"))
+        cols = ", ".join(f"{name}=?" for name in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE jobs SET {cols}, updated=? WHERE id=?",
+                             (*fields.values(), time.time(), job_id))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self.evict()
+        with self._lock:
+            row = self._db.execute("SELECT id, kind, status, done, total, partial, result, error, created, updated "
+                                   "FROM jobs WHERE id=?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(("id", "kind", "status", "done", "total", "partial", "result", "error", "created", "updated"), row))
+        job["partial"] = json.loads(job["partial"]) if job["partial"] else None
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["progress"] = job["done"] / job["total"] if job["total"] else 0.0
+        return job
+
+    def evict(self) -> int:
+        """Supprime les jobs terminés depuis plus de ttl secondes."""
+        with self._lock:
+            cur = self._db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND updated < ?",
+                                   (time.time() - self.ttl,))
+        return cur.rowcount
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs WHERE status=?", (status,)).fetchone()[0]
+
+
+def _mc_blocks(inp: MCInput) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """MC par blocs de seeds contigus : (runs faits, total, {n, mc} partiel) ; le dernier = /simulate_mc."""
+    if inp.adaptive is not None or inp.variance is not None or inp.rare is not None:
+        # arrêt anticipé (nombre de runs décidé en route), réduction de variance (tirages
+        # groupés, contrôles) ou événements rares (pilotes + tirages décalés) : un seul bloc
+        out = _simulate_mc(inp)
+        yield out["n"], out["n"], out
+        return
+    block = max(1, -(-inp.n // TARGET_BLOCKS))
+    parts = []
+    done = 0
+    for start in range(0, max(1, inp.n), block):
+        seeds = range(inp.base_seed + start, inp.base_seed + min(inp.n, start + block))
+        parts.append(run_mc_counts(inp.payload, seeds, engine=inp.engine, workers=inp.workers,
+                                   chunk_size=inp.chunk_size))
+        done += len(seeds)
+        c = merge_counts(parts)
+        yield done, inp.n, {"n": done, "mc": mc_stats(c["pass_ftmo"], c["pass_full"], c["dds"], done)}
+
+
+def _sweep_blocks(inp: SweepInput, n_points: int) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """Sweep par blocs de points : (points évalués, total, classement partiel)."""
+    from backend.app.sweep import iter_sweep
+    for done, partial in iter_sweep(inp.base, inp.ranges, n=inp.n, base_seed=inp.base_seed,
+                                    objective=inp.objective, top_k=inp.top_k, workers=inp.workers,
+                                    max_points=inp.max_points, block_points=-(-n_points // TARGET_BLOCKS)):
+        yield done, n_points, partial
+
+
+class JobManager:
+    def __init__(self, store: JobStore, workers: int = 2, max_pending: int = 32):
+        self.store = store
+        self.max_pending = max(1, int(max_pending))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="sim-job")
+        self._cancel: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, inp) -> str:
+        """Enregistre et planifie un job ; ValueError si la grille est invalide, JobQueueFull si saturé."""
+        # workers ne change pas le résultat (ni la clé de cache) : plafonné pour les jobs
+        inp = inp.model_copy(update={"workers": max(1, min(int(inp.workers or 1), JOB_MAX_WORKERS))})
+        if kind == "simulate_mc":
+            total = inp.adaptive.max_n if inp.adaptive is not None else inp.n
+            blocks = lambda: _mc_blocks(inp)
+        else:
+            from backend.app.sweep import expand_grid
+            total = len(expand_grid(inp.ranges, inp.max_points))  # valide la grille avant la file
+            blocks = lambda: _sweep_blocks(inp, total)
+        with self._lock:
+            if len(self._cancel) >= self.max_pending:
+                raise JobQueueFull(f"trop de jobs en cours (max {self.max_pending})")
+            job_id = self.store.create(kind, total)
+            self._cancel[job_id] = threading.Event()
+        self._executor.submit(self._run, job_id, kind, inp, blocks)
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            event = self._cancel.get(job_id)
+        if event is None:
+            return False
+        event.set()
+        job = self.store.get(job_id)
+        if job is not None and job["status"] == "queued":
+            self.store.update(job_id, status="cancelled")  # pas encore démarré
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": self.store.count("queued"), "running": self.store.count("running"),
+                "max_pending": self.max_pending}
+
+    def _run(self, job_id: str, kind: str, inp, blocks) -> None:
+        from backend.app.cache import RESULT_CACHE, cache_key
+        cancel = self._cancel[job_id]
+        try:
+            if cancel.is_set():
+                self.store.update(job_id, status="cancelled")
+                return
+            key = cache_key("simulate_mc", mc_cache_params(inp)) if kind == "simulate_mc" else None
+            hit = RESULT_CACHE.get(key) if key and RESULT_CACHE.enabled else None
+            if hit is not None:
+                self.store.update(job_id, status="done", done=hit["n"], total=hit["n"], result=hit)
+                return
+
+            self.store.update(job_id, status="running")
+            result = None
+            with pool_group("jobs"):
+                for done, total, partial in blocks():
+                    result = partial
+                    self.store.update(job_id, done=done, total=total, partial=partial)
+                    if cancel.is_set():
+                        self.store.update(job_id, status="cancelled")
+                        return
+            if key and RESULT_CACHE.enabled:
+                RESULT_CACHE.put(key, result)
+            self.store.update(job_id, status="done", result=result, partial=None)
+        except Exception as e:  # l'erreur est rapportée par GET /jobs/{id}
+            self.store.update(job_id, status="failed", error=f"{type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                self._cancel.pop(job_id, None)
+
+
+JOBS = JobManager(
+    JobStore(path=os.environ.get("SIM_JOBS_DB") or ":memory:", ttl=float(os.environ.get("SIM_JOBS_TTL", 3600))),
+    workers=int(os.environ.get("SIM_JOB_WORKERS", 2)),
+    max_pending=int(os.environ.get("SIM_JOB_MAX_PENDING", 32)),
+)
@@ -0,0 +1,284 @@
+"""
+Noyau compilé (optionnel) de la boucle de pas de simulate_equity.
+
+step_kernel reprend la boucle scalaire (agrégateur min des sizers, pacing, CPPI
+floor/freeze, VT EWMA, HWM, détection de cible) et l'accumulation en ligne des KPIs
+(KpiAccumulator.push / _close_day : DD, violations, KPIs de base et étendus) dans un
+sous-ensemble compilable : scalaires et tableaux NumPy, pas d'objets Python.
+L'état de la boucle et celui des KPIs vivent dans deux tableaux float64 : les chocs
+sont tirés et traités par blocs de BLOCK_STEPS (mémoire O(BLOCK_STEPS) sans série),
+la série d'equity n'est allouée que si return_series. Chocs identiques (flux
+rng.gauss, Philox ou profil) et mêmes opérations que la boucle Python : sortie
+identique bit à bit.
+
+Sélection à l'import : si Numba est installé (extra "fast"), KERNEL = step_kernel
+compilé (njit) ; sinon KERNEL = None et simulate_equity garde sa boucle Python.
+SIM_KERNEL=python force la boucle Python même si Numba est présent.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import math
+import os
+
+import numpy as np
+
+from backend.app.main import KpiAccumulator
+from backend.app.timing import stage
+
+try:  # accélérateur optionnel
+    import numba
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    numba = None
+
+# Pas par bloc de chocs (tirage + noyau)
+BLOCK_STEPS = 4096
+
+# État de la boucle (st)
+(S_EQ, S_HWM, S_FLOOR, S_VOL, S_KELLY_HITS, S_FREEZES, S_NO_UPSIZE, S_DEFAULT_EXPO,
+ S_LAST_POS, S_LAST_LOSS, S_FIRST_CROSS, S_T) = range(12)
+
+# État des KPIs (k) : champs de KpiAccumulator, None <-> NaN
+KPI_SLOTS = (
+    "n", "first", "prev", "hwm", "max_dd_total", "in_violation", "violations_total",
+    "day_open", "day_peak", "day_threshold", "day_violated", "violations_daily", "max_dd_daily",
+    "r_n", "r_mean", "r_m2", "wins", "gp", "gl",
+    "d_n", "d_sum", "d_mean", "d_m2", "dn_mean", "dn_m2", "best_day", "worst_day",
+    "loss_run", "max_consec_losses",
+    "c_n", "c_peak", "c_peak_idx", "c_max_dd", "c_trough_idx", "c_recover",
+)
+(K_N, K_FIRST, K_PREV, K_HWM, K_MAX_DD, K_IN_VIOL, K_VIOL_TOTAL,
+ K_DAY_OPEN, K_DAY_PEAK, K_DAY_THR, K_DAY_VIOL, K_VIOL_DAILY, K_MAX_DD_DAILY,
+ K_R_N, K_R_MEAN, K_R_M2, K_WINS, K_GP, K_GL,
+ K_D_N, K_D_SUM, K_D_MEAN, K_D_M2, K_DN_MEAN, K_DN_M2, K_BEST, K_WORST,
+ K_LOSS_RUN, K_MAX_CONSEC,
+ K_C_N, K_C_PEAK, K_C_PEAK_IDX, K_C_MAX_DD, K_C_TROUGH_IDX, K_C_RECOVER) = range(len(KPI_SLOTS))
+INT_SLOTS = frozenset(("n", "violations_total", "violations_daily", "r_n", "wins", "d_n", "loss_run",
+                       "max_consec_losses", "c_n", "c_peak_idx", "c_trough_idx", "c_recover"))
+BOOL_SLOTS = frozenset(("in_violation", "day_violated"))
+
+
+def step_kernel(base_r, out, keep, st, k, use_vt, use_kelly_cap, use_soft, use_cppi,
+                vt_target_vol, kelly_cap, soft_barrier, spend_rate, cppi_alpha, cppi_freeze_frac,
+                lam, target_level, daily_mult, total_mult, spd, basic, extended):
+    """
+    Avance de len(base_r) pas à partir de l'état (st, k), mis à jour en place ;
+    out[i] = equity du pas i du bloc si keep.
+    """
+    for i in range(base_r.shape[0]):
+        r = base_r[i]
+        eq = st[S_EQ]
+        hwm = st[S_HWM]
+        t = int(st[S_T]) + 1
+        st[S_T] = t
+
+        # Sizers "min aggregator" (inf = pas de contrainte)
+        f_raw = math.inf
+        has_size = False
+        if use_vt:
+            f_raw = vt_target_vol / max(1e-8, st[S_VOL])
+            has_size = True
+        if use_kelly_cap:
+            f_raw = min(f_raw, kelly_cap)
+            has_size = True
+        if use_soft:
+            dd_now = (hwm - eq) / max(hwm, 1e-8)
+            if dd_now > soft_barrier:
+                f_raw = min(f_raw, max(0.0, 1.0 - dd_now))
+                has_size = True
+        st[S_DEFAULT_EXPO] = 0.0 if has_size else 1.0
+        if not has_size:
+            f_raw = 0.0
+
+        # Pacing
+        f = max(0.0, min(1.0, f_raw * spend_rate))
+
+        if st[S_LAST_LOSS] != 0.0 and f > st[S_LAST_POS]:
+            st[S_NO_UPSIZE] = 0.0
+
+        # CPPI
+        if use_cppi:
+            cushion = max(0.0, eq - st[S_FLOOR])
+            cushion_ratio = (cushion / hwm) if hwm > 0 else 0.0
+            if cushion_ratio < cppi_freeze_frac:
+                f = 0.0
+                st[S_FREEZES] += 1.0
+
+        if use_kelly_cap and abs(f - kelly_cap) < 1e-12:
+            st[S_KELLY_HITS] += 1.0
+
+        # PnL step (linéarisé)
+        x = max(1e-9, eq * (1.0 + f * r))
+        if keep:
+            out[i] = x
+
+        if st[S_FIRST_CROSS] < 0 and x >= target_level:
+            st[S_FIRST_CROSS] = t
+
+        if x > hwm:
+            st[S_HWM] = x
+            if use_cppi:
+                st[S_FLOOR] = x * (1.0 - cppi_alpha)
+
+        if use_vt:
+            vol = st[S_VOL]
+            st[S_VOL] = math.sqrt(lam * (vol * vol) + (1 - lam) * (r * r))
+
+        st[S_LAST_LOSS] = 1.0 if x < eq else 0.0
+        st[S_EQ] = x
+        st[S_LAST_POS] = f
+
+        # ---- KpiAccumulator.push(x) (jamais le premier point : push(1.0) fait avant) ----
+        n = int(k[K_N])
+        k[K_N] = n + 1
+        if basic:
+            rs = (x / k[K_PREV]) - 1.0
+            k[K_R_N] += 1.0
+            delta = rs - k[K_R_MEAN]
+            k[K_R_MEAN] += delta / k[K_R_N]
+            k[K_R_M2] += delta * (rs - k[K_R_MEAN])
+            if rs > 0.0:
+                k[K_WINS] += 1.0
+                k[K_GP] += rs
+            elif rs < 0.0:
+                k[K_GL] -= rs
+
+        if x > k[K_HWM]:
+            k[K_HWM] = x
+        dd = (k[K_HWM] - x) / k[K_HWM]
+        if dd > k[K_MAX_DD]:
+            k[K_MAX_DD] = dd
+        now_viol = x < k[K_HWM] * total_mult
+        if now_viol and k[K_IN_VIOL] == 0.0:
+            k[K_VIOL_TOTAL] += 1.0
+        k[K_IN_VIOL] = 1.0 if now_viol else 0.0
+
+        if spd > 0 and n % spd == 0:
+            if extended:
+                # _close_day(prev)
+                close = k[K_PREV]
+                eo = k[K_DAY_OPEN]
+                if eo > 0:
+                    rd = (close / eo) - 1.0
+                    k[K_D_N] += 1.0
+                    k[K_D_SUM] += rd
+                    delta = rd - k[K_D_MEAN]
+                    k[K_D_MEAN] += delta / k[K_D_N]
+                    k[K_D_M2] += delta * (rd - k[K_D_MEAN])
+                    dn = rd if rd < 0.0 else 0.0
+                    delta = dn - k[K_DN_MEAN]
+                    k[K_DN_MEAN] += delta / k[K_D_N]
+                    k[K_DN_M2] += delta * (dn - k[K_DN_MEAN])
+                    if math.isnan(k[K_BEST]) or rd > k[K_BEST]:
+                        k[K_BEST] = rd
+                    if math.isnan(k[K_WORST]) or rd < k[K_WORST]:
+                        k[K_WORST] = rd
+                    if rd < 0:
+                        k[K_LOSS_RUN] += 1.0
+                        if k[K_LOSS_RUN] > k[K_MAX_CONSEC]:
+                            k[K_MAX_CONSEC] = k[K_LOSS_RUN]
+                    else:
+                        k[K_LOSS_RUN] = 0.0
+                j = k[K_C_N]
+                k[K_C_N] = j + 1.0
+                if math.isnan(k[K_C_PEAK]):
+                    k[K_C_PEAK] = close
+                if math.isnan(k[K_C_RECOVER]) and j > k[K_C_TROUGH_IDX] and close >= k[K_C_PEAK]:
+                    k[K_C_RECOVER] = j - k[K_C_TROUGH_IDX]
+                if close > k[K_C_PEAK]:
+                    k[K_C_PEAK] = close
+                    k[K_C_PEAK_IDX] = j
+                cp = k[K_C_PEAK]
+                dd = (cp - close) / cp if cp > 0 else 0.0
+                if dd > k[K_C_MAX_DD]:
+                    k[K_C_MAX_DD] = dd
+                    k[K_C_TROUGH_IDX] = j
+                    k[K_C_RECOVER] = math.nan
+            k[K_DAY_OPEN] = x
+            k[K_DAY_PEAK] = x
+            k[K_DAY_THR] = x * daily_mult
+            k[K_DAY_VIOL] = 0.0
+        if x > k[K_DAY_PEAK]:
+            k[K_DAY_PEAK] = x
+        dp = k[K_DAY_PEAK]
+        dd = (dp - x) / dp if dp > 0 else 0.0
+        if dd > k[K_MAX_DD_DAILY]:
+            k[K_MAX_DD_DAILY] = dd
+        if k[K_DAY_VIOL] == 0.0 and x < k[K_DAY_THR]:
+            k[K_VIOL_DAILY] += 1.0
+            k[K_DAY_VIOL] = 1.0
+
+        k[K_PREV] = x
+
+
+def _select_kernel():
+    if numba is None or os.environ.get("SIM_KERNEL", "").lower() == "python":
+        return None
+    return numba.njit(cache=True, nogil=True)(step_kernel)
+
+
+KERNEL = _select_kernel()
+
+
+def kpi_state(acc: KpiAccumulator) -> np.ndarray:
+    """Champs de l'accumulateur -> tableau k (None -> NaN)."""
+    return np.array([math.nan if getattr(acc, name) is None else float(getattr(acc, name))
+                     for name in KPI_SLOTS])
+
+
+def load_kpi_state(acc: KpiAccumulator, k: np.ndarray) -> None:
+    """Tableau k -> champs de l'accumulateur (types d'origine)."""
+    for name, v in zip(KPI_SLOTS, k.tolist()):
+        if math.isnan(v):
+            v = None
+        elif name in BOOL_SLOTS:
+            v = v != 0.0
+        elif name in INT_SLOTS:
+            v = int(v)
+        setattr(acc, name, v)
+
+
+def gauss_blocks(gauss: Callable[[float, float], float], mu: float, sigma: float) -> Callable[[int, int], np.ndarray]:
+    """draw() du flux historique : blocs successifs de tirages gauss(mu, sigma) (appels dans l'ordre)."""
+    return lambda start, m: np.fromiter((gauss(mu, sigma) for _ in range(m)), dtype=float, count=m)
+
+
+def run_step_kernel(kernel, p, draw: Callable[[int, int], Any], basic: bool = True,
+                    extended: bool = True) -> Tuple[Optional[List[float]], Dict[str, Any], Tuple]:
+    """
+    Simulation de p par 'kernel' ; draw(start, m) -> chocs base_r des pas [start, start + m).
+    Retourne (série equity si p.return_series sinon None, métriques de KpiAccumulator.result(),
+    (kelly_cap_hits, cppi_freeze_events, no_upsize_after_loss, used_default_expo, first_cross_step)).
+    """
+    T = p.total_steps
+    acc = KpiAccumulator(p.daily_limit, p.total_limit, p.steps_per_day, basic, extended)
+    acc.push(1.0)
+    k = kpi_state(acc)
+    st = np.zeros(12)
+    st[S_EQ] = st[S_HWM] = 1.0
+    st[S_FLOOR] = (1.0 - p.cppi_alpha) if p.use_cppi else 0.0
+    st[S_VOL] = p.sigma
+    st[S_NO_UPSIZE] = 1.0
+    st[S_FIRST_CROSS] = -1.0
+    lam = math.exp(math.log(0.5)/max(1, p.vt_halflife)) if p.use_vt else 0.5  # demi-vie → lambda
+    equity = np.empty(T + 1) if p.return_series else None
+    if equity is not None:
+        equity[0] = 1.0
+    no_out = np.empty(0)
+    flags = (bool(p.use_vt), bool(p.use_kelly_cap), bool(p.use_soft_barrier and p.soft_barrier > 0.0),
+             bool(p.use_cppi))
+    params = (float(p.vt_target_vol), float(p.kelly_cap), float(p.soft_barrier), float(p.spend_rate),
+              float(p.cppi_alpha), float(p.cppi_freeze_frac), lam, 1.0 + p.target_profit,
+              acc.daily_mult, acc.total_mult, acc.spd, bool(basic), bool(extended))
+    for start in range(0, T, BLOCK_STEPS):
+        m = min(BLOCK_STEPS, T - start)
+        with stage("shocks"):
+            base_r = np.ascontiguousarray(draw(start, m), dtype=np.float64)
+        with stage("loop"):
+            out = equity[start + 1:start + 1 + m] if equity is not None else no_out
+            kernel(base_r, out, equity is not None, st, k, *flags, *params)
+    with stage("kpis"):
+        load_kpi_state(acc, k)
+        metrics = acc.result()
+    first_cross = int(st[S_FIRST_CROSS])
+    diag = (int(st[S_KELLY_HITS]), int(st[S_FREEZES]), st[S_NO_UPSIZE] != 0.0, st[S_DEFAULT_EXPO] != 0.0,
+            first_cross if first_cross >= 0 else None)
+    return (equity.tolist() if equity is not None else None), metrics, diag
@@ -1,9 +1,14 @@
-from typing import Dict, Any, List, Optional
-from fastapi import FastAPI, Body
-from pydantic import BaseModel
+from dataclasses import dataclass, replace
+from typing import Dict, Any, List, Literal, Optional, Tuple, Union
+from fastapi import FastAPI, Body, Request
+from pydantic import BaseModel, model_validator
 import math
+import time
+
+from backend.app.timing import RequestStart, stage
 
 app = FastAPI()
+app.add_middleware(RequestStart)
 
 # -----------------------------
 # Helpers (stables & lisibles)
@@ -27,37 +32,73 @@ def drawdowns(equity: List[float]) -> Dict[str, Any]:
 
     return {"max_dd_total": max_dd_total}
 
-def daily_violations(equity: List[float], daily_limit: float, steps_per_day: int) -> Dict[str, Any]:
+class DayBuckets:
+    """
+    Index des journées d'une série equity, construit en une passe (sans slices) :
+    par jour open / close / low / peak et DD intrajournalier max (pic courant du jour).
+    Partagé par daily_violations, _daily_returns et compute_extended_kpis.
+    steps_per_day <= 0 : une seule "journée" (fallback historique).
+    """
+    __slots__ = ("opens", "closes", "lows", "peaks", "max_dds")
+
+    def __init__(self, equity: List[float], steps_per_day: int):
+        self.opens: List[float] = []
+        self.closes: List[float] = []
+        self.lows: List[float] = []
+        self.peaks: List[float] = []
+        self.max_dds: List[float] = []
+        spd = int(steps_per_day or 0)
+        if spd <= 0:
+            spd = len(equity)
+        left = 0  # steps restants dans la journée courante
+        eo = low = peak = dd_max = prev = x = None
+        for x in equity:
+            if left == 0:
+                if eo is not None:
+                    self._close(eo, prev, low, peak, dd_max)
+                eo = low = peak = x
+                dd_max = 0.0
+                left = spd
+            left -= 1
+            if x > peak:
+                peak = x
+            elif x < low:
+                low = x
+            dd = (peak - x)/peak if peak > 0 else 0.0
+            if dd > dd_max:
+                dd_max = dd
+            prev = x
+        if eo is not None:
+            self._close(eo, x, low, peak, dd_max)
+
+    def _close(self, eo, ec, low, peak, dd_max) -> None:
+        self.opens.append(eo)
+        self.closes.append(ec)
+        self.lows.append(low)
+        self.peaks.append(peak)
+        self.max_dds.append(dd_max)
+
+    def __len__(self) -> int:
+        return len(self.opens)
+
+    def violations(self, daily_limit: float) -> int:
+        """Journées passées sous open*(1 - daily_limit) (au plus une par jour)."""
+        return sum(1 for eo, low in zip(self.opens, self.lows) if low < eo * (1.0 - daily_limit))
+
+    def returns(self) -> List[float]:
+        """Rendements journaliers close/open - 1 (jours à open <= 0 ignorés)."""
+        return [(ec / eo) - 1.0 for eo, ec in zip(self.opens, self.closes) if eo and eo > 0]
+
+def daily_violations(equity: List[float], daily_limit: float, steps_per_day: int,
+                     days: Optional[DayBuckets] = None) -> Dict[str, Any]:
     """
     On interprète 'daily' comme une fenêtre qui redémarre au début de chaque journée (equity_open).
     Violation dès que equity descend sous equity_open*(1 - daily_limit).
+    'days' : index déjà construit (sinon une passe sur equity).
     """
-    if steps_per_day <= 0:
-        steps_per_day = len(equity)  # 1 "journée" = tout (fallback)
-
-    violations_daily = 0
-    max_dd_daily = 0.0
-
-    for day_start in range(0, len(equity), steps_per_day):
-        day_end = min(day_start + steps_per_day, len(equity))
-        eq_open = equity[day_start]
-        peak = eq_open
-        local_max_dd = 0.0
-
-        violated = False
-        threshold = eq_open * (1.0 - daily_limit)
-
-        for x in equity[day_start:day_end]:
-            peak = max(peak, x)
-            dd = (peak - x)/peak if peak > 0 else 0.0
-            local_max_dd = max(local_max_dd, dd)
-            if (not violated) and x < threshold:
-                violations_daily += 1
-                violated = True
-
-        max_dd_daily = max(max_dd_daily, local_max_dd)
-
-    return {"max_dd_daily": max_dd_daily, "violations_daily": violations_daily}
+    if days is None:
+        days = DayBuckets(equity, steps_per_day)
+    return {"max_dd_daily": max(days.max_dds, default=0.0), "violations_daily": days.violations(daily_limit)}
 
 def total_violations(equity: List[float], total_limit: float) -> int:
     """
@@ -147,28 +188,21 @@ def safe_num(x):
     except Exception:
         return None
 
-def _daily_returns(equity, steps_per_day: int):
+def _daily_returns(equity, steps_per_day: int, days: Optional[DayBuckets] = None):
     """Agrège en 'jours' à partir d'une série equity par step.
        Retourne une liste (peut être vide) de rendements journaliers."""
-    n = len(equity)
-    if n < 2:
+    if len(equity) < 2:
         return []
-    spd = int(steps_per_day or 0)
-    if spd <= 0:
-        spd = n  # 1 "jour" = tout
-    out = []
-    for d0 in range(0, n, spd):
-        d1 = min(d0 + spd, n)
-        eo = equity[d0]
-        ec = equity[d1 - 1]
-        if eo and eo > 0:
-            out.append((ec / eo) - 1.0)
-    return out
+    if days is None:
+        days = DayBuckets(equity, steps_per_day)
+    return days.returns()
 
-def compute_extended_kpis(equity, steps_per_day: int):
+def compute_extended_kpis(equity, steps_per_day: int, days: Optional[DayBuckets] = None):
     """Toujours retourner un DICT (jamais None) et des nombres sûrs ou None."""
     try:
-        rd = _daily_returns(equity, steps_per_day)
+        if days is None:
+            days = DayBuckets(equity, steps_per_day)
+        rd = _daily_returns(equity, steps_per_day, days)
         if not rd:
             return {
                 "cagr": None, "sharpe": None, "sortino": None,
@@ -209,14 +243,11 @@ def compute_extended_kpis(equity, steps_per_day: int):
         # CAGR
         eq0 = equity[0] if equity else 1.0
         eq1 = equity[-1] if equity else 1.0
-        days = len(rd)
-        cagr = (eq1/eq0)**(252.0/max(1.0, days)) - 1.0 if (eq0 and eq0 > 0) else None
+        n_days = len(rd)
+        cagr = (eq1/eq0)**(252.0/max(1.0, n_days)) - 1.0 if (eq0 and eq0 > 0) else None
 
-        # days_to_recover (sur equity quotidienne reconstruite)
-        spd = int(steps_per_day or 0)
-        if spd <= 0:
-            spd = len(equity)
-        eq_daily = [equity[min(i + spd, len(equity)) - 1] for i in range(0, len(equity), spd)]
+        # days_to_recover (sur les clôtures journalières de l'index)
+        eq_daily = days.closes
         peak = eq_daily[0]
         peak_idx = 0
         trough_idx = 0
@@ -259,9 +290,307 @@ def safe_merge_dict(a, b):
         out.update(b)
     return out
 
+# Groupes de la réponse /simulate calculés seulement si demandés (cf. result_groups)
+RESULT_GROUPS = frozenset(("series", "trace", "diag", "kpis_basic", "kpis_extended"))
+BASIC_KPIS = ("vol_realized", "win_rate", "profit_factor")
+EXTENDED_KPIS = ("cagr", "sharpe", "sortino", "best_day", "worst_day", "max_consec_losses", "days_to_recover")
+
+def result_groups(fields: Optional[List[str]]) -> frozenset:
+    """Groupes coûteux requis par une projection 'fields' (None = tous)."""
+    if fields is None:
+        return RESULT_GROUPS
+    out = set()
+    for path in fields:
+        head, _, rest = path.partition(".")
+        if head in ("series", "trace", "diag"):
+            out.add(head)
+        elif head == "kpis":
+            key = rest.partition(".")[0]
+            if not key or key in BASIC_KPIS:
+                out.add("kpis_basic")
+            if not key or key in EXTENDED_KPIS:
+                out.add("kpis_extended")
+    return frozenset(out)
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Paramètre de requête "a,kpis.b" -> ["a", "kpis.b"] (None ou vide = tout)."""
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+def select_fields(out: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    Projection d'un résultat sur des chemins pointés ("max_dd_total", "kpis.sharpe", "series") ;
+    fields None = tout. Les chemins absents du résultat sont ignorés.
+    """
+    if fields is None:
+        return out
+    sel: Dict[str, Any] = {}
+    for path in fields:
+        parts = path.split(".")
+        src = out
+        for key in parts:
+            if not isinstance(src, dict) or key not in src:
+                break
+            src = src[key]
+        else:
+            dst = sel
+            for key in parts[:-1]:
+                dst = dst.setdefault(key, {})
+            dst[parts[-1]] = src
+    return sel
+
+# -----------------------------
+# Noyau KPI fusionné (une seule passe sur l'equity)
+# -----------------------------
+def _neutral_extended_kpis():
+    return {
+        "cagr": None, "sharpe": None, "sortino": None,
+        "best_day": None, "worst_day": None,
+        "max_consec_losses": None, "days_to_recover": None,
+    }
+
+class KpiAccumulator:
+    """
+    Accumulateur en ligne : DD total/journalier, violations, KPIs de base et étendus.
+    push(x) par point d'equity, puis result() -> même contrat que drawdowns +
+    daily_violations + total_violations + compute_basic/extended_kpis.
+    Variances par Welford (écart ~1e-16 relatif vs la version deux passes).
+    steps_per_day <= 0 : une seule "journée" (comme les helpers historiques).
+    basic / extended = False : KPIs de base / étendus ni accumulés ni retournés (DD et
+    violations toujours calculés).
+    """
+    __slots__ = (
+        "basic", "extended", "daily_mult", "total_mult", "spd", "n", "first", "prev",
+        "hwm", "max_dd_total", "in_violation", "violations_total",
+        "day_open", "day_peak", "day_threshold", "day_violated", "violations_daily", "max_dd_daily",
+        "r_n", "r_mean", "r_m2", "wins", "gp", "gl",
+        "d_n", "d_sum", "d_mean", "d_m2", "dn_mean", "dn_m2", "best_day", "worst_day",
+        "loss_run", "max_consec_losses",
+        "c_n", "c_peak", "c_peak_idx", "c_max_dd", "c_trough_idx", "c_recover", "closed",
+    )
+
+    def __init__(self, daily_limit: float, total_limit: float, steps_per_day: int,
+                 basic: bool = True, extended: bool = True):
+        self.basic = basic
+        self.extended = extended
+        self.daily_mult = 1.0 - daily_limit
+        self.total_mult = 1.0 - total_limit
+        self.spd = int(steps_per_day or 0)
+        self.n = 0
+        self.first = self.prev = None
+        self.hwm = None
+        self.max_dd_total = 0.0
+        self.in_violation = False
+        self.violations_total = 0
+        self.day_open = self.day_peak = self.day_threshold = None
+        self.day_violated = False
+        self.violations_daily = 0
+        self.max_dd_daily = 0.0
+        # rendements par step (Welford)
+        self.r_n = 0
+        self.r_mean = self.r_m2 = 0.0
+        self.wins = 0
+        self.gp = self.gl = 0.0
+        # rendements journaliers
+        self.d_n = 0
+        self.d_sum = self.d_mean = self.d_m2 = 0.0
+        self.dn_mean = self.dn_m2 = 0.0
+        self.best_day = self.worst_day = None
+        self.loss_run = self.max_consec_losses = 0
+        # equity quotidienne (clôtures) pour days_to_recover
+        self.c_n = 0
+        self.c_peak = None
+        self.c_peak_idx = self.c_trough_idx = 0
+        self.c_max_dd = 0.0
+        self.c_recover = None
+        self.closed = False
+
+    def push(self, x: float) -> None:
+        i = self.n
+        self.n = i + 1
+
+        if i == 0:
+            self.first = self.hwm = x
+        elif self.basic:
+            # rendement du step
+            r = (x / self.prev) - 1.0
+            self.r_n += 1
+            delta = r - self.r_mean
+            self.r_mean += delta / self.r_n
+            self.r_m2 += delta * (r - self.r_mean)
+            if r > 0.0:
+                self.wins += 1
+                self.gp += r
+            elif r < 0.0:
+                self.gl -= r
+
+        # DD total + violations total (peak = HWM)
+        if x > self.hwm:
+            self.hwm = x
+        dd = (self.hwm - x)/self.hwm
+        if dd > self.max_dd_total:
+            self.max_dd_total = dd
+        now_viol = x < self.hwm * self.total_mult
+        if now_viol and not self.in_violation:
+            self.violations_total += 1
+        self.in_violation = now_viol
+
+        # Fenêtre journalière (redémarre à equity_open)
+        if i == 0 or (self.spd > 0 and i % self.spd == 0):
+            if i > 0 and self.extended:
+                self._close_day(self.prev)
+            self.day_open = self.day_peak = x
+            self.day_threshold = x * self.daily_mult
+            self.day_violated = False
+        if x > self.day_peak:
+            self.day_peak = x
+        dd = (self.day_peak - x)/self.day_peak if self.day_peak > 0 else 0.0
+        if dd > self.max_dd_daily:
+            self.max_dd_daily = dd
+        if (not self.day_violated) and x < self.day_threshold:
+            self.violations_daily += 1
+            self.day_violated = True
+
+        self.prev = x
+
+    def _close_day(self, close: float) -> None:
+        eo = self.day_open
+        if eo and eo > 0:
+            rd = (close / eo) - 1.0
+            self.d_n += 1
+            self.d_sum += rd
+            delta = rd - self.d_mean
+            self.d_mean += delta / self.d_n
+            self.d_m2 += delta * (rd - self.d_mean)
+            dn = min(0.0, rd)
+            delta = dn - self.dn_mean
+            self.dn_mean += delta / self.d_n
+            self.dn_m2 += delta * (dn - self.dn_mean)
+            if self.best_day is None or rd > self.best_day:
+                self.best_day = rd
+            if self.worst_day is None or rd < self.worst_day:
+                self.worst_day = rd
+            if rd < 0:
+                self.loss_run += 1
+                if self.loss_run > self.max_consec_losses:
+                    self.max_consec_losses = self.loss_run
+            else:
+                self.loss_run = 0
+
+        # days_to_recover : 1er retour au pic du max DD (si aucun nouveau pic depuis le creux)
+        j = self.c_n
+        self.c_n = j + 1
+        if self.c_peak is None:
+            self.c_peak = close
+        if self.c_recover is None and j > self.c_trough_idx and close >= self.c_peak:
+            self.c_recover = j - self.c_trough_idx
+        if close > self.c_peak:
+            self.c_peak = close; self.c_peak_idx = j
+        dd = (self.c_peak - close) / self.c_peak if self.c_peak > 0 else 0.0
+        if dd > self.c_max_dd:
+            self.c_max_dd = dd; self.c_trough_idx = j
+            self.c_recover = None
+
+    def _basic_kpis(self) -> Dict[str, Any]:
+        if self.n < 2:
+            return {"vol_realized": 0.0, "win_rate": 0.0, "profit_factor": None}
+        vol_realized = (self.r_m2 / max(1, self.r_n - 1)) ** 0.5
+        pf = (self.gp / self.gl) if self.gl > 0.0 else None  # évite inf
+        return {
+            "vol_realized": safe_number(vol_realized),
+            "win_rate": safe_number(self.wins / max(1, self.r_n)),
+            "profit_factor": safe_number(pf),
+        }
+
+    def _extended_kpis(self) -> Dict[str, Any]:
+        if self.d_n == 0:
+            return _neutral_extended_kpis()
+        try:
+            m = self.d_sum / self.d_n
+            sd = math.sqrt(max(0.0, self.d_m2 / max(1, self.d_n - 1)))
+            sd_dn = math.sqrt(max(0.0, self.dn_m2 / (self.d_n - 1))) if self.d_n > 1 else 0.0
+            sharpe = (math.sqrt(252.0) * m / sd) if sd > 0 else None
+            sortino = (math.sqrt(252.0) * m / sd_dn) if sd_dn > 0 else None
+            eq0, eq1 = self.first, self.prev
+            cagr = (eq1/eq0)**(252.0/max(1.0, self.d_n)) - 1.0 if (eq0 and eq0 > 0) else None
+            days_to_recover = self.c_recover if self.c_trough_idx > self.c_peak_idx else None
+            return {
+                "cagr": safe_num(cagr),
+                "sharpe": safe_num(sharpe),
+                "sortino": safe_num(sortino),
+                "best_day": safe_num(self.best_day),
+                "worst_day": safe_num(self.worst_day),
+                "max_consec_losses": int(self.max_consec_losses),
+                "days_to_recover": None if days_to_recover is None else int(days_to_recover),
+            }
+        except Exception:
+            # même filet que compute_extended_kpis : dict neutre, jamais d'exception
+            return _neutral_extended_kpis()
+
+    def result(self) -> Dict[str, Any]:
+        """Clôture la journée en cours et retourne DD, violations et KPIs (base + étendus)."""
+        if self.extended and self.n >= 2 and not self.closed:
+            self._close_day(self.prev)
+            self.closed = True
+        kpis = self._basic_kpis() if self.basic else {}
+        if self.extended:
+            kpis.update(self._extended_kpis())
+        return {
+            "max_dd_total": self.max_dd_total,
+            "max_dd_daily": self.max_dd_daily,
+            "violations_daily": self.violations_daily,
+            "violations_total": self.violations_total,
+            "kpis": kpis,
+        }
+
+def compute_equity_kpis(equity: List[float], daily_limit: float, total_limit: float,
+                        steps_per_day: int, basic: bool = True, extended: bool = True) -> Dict[str, Any]:
+    """Tous les KPIs + violations d'une série equity en une seule passe (KpiAccumulator)."""
+    acc = KpiAccumulator(daily_limit, total_limit, steps_per_day, basic, extended)
+    push = acc.push
+    for x in equity:
+        push(x)
+    return acc.result()
+
 # -----------------------------
 # Modèle d'entrée compatible avec l'ancien frontend
 # -----------------------------
+class ReturnModel(BaseModel):
+    # Profil nommé de presets/profiles.json, puis surcharges champ par champ (None = valeur du profil)
+    profile: Optional[str] = None
+    sampler: Optional[Literal["gaussian", "student_t"]] = None
+    nu: Optional[float] = None
+    vol_process: Optional[Literal["none", "ewma"]] = None
+    ewma_lambda: Optional[float] = None
+    sigma0: Optional[float] = None
+    shock: Optional[float] = None
+    p_jump: Optional[float] = None
+    jump_sigma: Optional[float] = None
+    p_tail: Optional[float] = None
+    tail_mult: Optional[float] = None
+    # mu / sigma du profil remplacent ceux de la simu (comme modules.*)
+    mu: Optional[float] = None
+    sigma: Optional[float] = None
+
+    def resolve(self) -> Tuple[Dict[str, float], Any]:
+        """(surcharges mu/sigma, ReturnProfile) ; ValueError si profil ou paramètres invalides."""
+        from backend.app.generators import load_profiles, make_profile
+        fields: Dict[str, Any] = {}
+        if self.profile is not None:
+            profiles = load_profiles()
+            if self.profile not in profiles:
+                raise ValueError(f"profil inconnu: {self.profile!r} (connus: {', '.join(sorted(profiles))})")
+            fields.update(profiles[self.profile])
+        fields.update(self.model_dump(exclude={"profile"}, exclude_none=True))
+        moments = {k: float(fields.pop(k)) for k in ("mu", "sigma") if k in fields}
+        return moments, make_profile(**fields)
+
+    @model_validator(mode="after")
+    def _check(self):
+        self.resolve()  # erreurs -> 422 à la validation de la requête
+        return self
+
 class SimInput(BaseModel):
     # Champs requis par l'ancien frontend
     schema_version: str = "1.0"
@@ -299,6 +628,9 @@ class SimInput(BaseModel):
     use_kelly_cap: bool = False
     use_soft_barrier: bool = False
     
+    # Série equity dans la réponse (False = KPIs seuls, mémoire O(1) par chemin)
+    return_series: bool = True
+
     # Traces de débogage
     debug: bool = False
     trace_len: int = 10
@@ -307,151 +639,276 @@ class SimInput(BaseModel):
     target_profit: float = 0.10   # 10% = 0.10
     max_days: int = 30
 
+    # Générateur de rendements (None = gaussien historique, rng.gauss(mu, sigma))
+    returns: Optional[ReturnModel] = None
+    # Flux aléatoire : "legacy" (random.Random(seed)) ou "philox" (à compteur, voir backend.app.streams)
+    rng: Literal["legacy", "philox"] = "legacy"
+
 # -----------------------------
-# Boucle de simu (sans details privés)
+# Résolution des paramètres
 # -----------------------------
-def simulate_equity(p: SimInput) -> Dict[str, Any]:
-    # Remplace l'usage global de random.seed(...) par un RNG local
-    import random as _random
-    rng = _random.Random(p.seed) if p.seed is not None else _random.Random()
-    
-    # Extraction des paramètres depuis modules.*
+# modules.<Module>.<clé> -> champ SimInput
+MODULE_FIELDS = {
+    ("CPPIFreeze", "alpha"): "cppi_alpha",
+    ("CPPIFreeze", "freeze_frac"): "cppi_freeze_frac",
+    ("VolatilityTarget", "vt_target_vol"): "vt_target_vol",
+    ("VolatilityTarget", "vt_halflife"): "vt_halflife",
+    ("KellyCap", "kelly_cap"): "kelly_cap",
+    ("SoftBarrier", "soft_barrier"): "soft_barrier",
+    ("FTMOGate", "daily_limit"): "daily_limit",
+    ("FTMOGate", "total_limit"): "total_limit",
+}
+
+# Champs de SimInput sans effet sur la simu (non repris dans RunConfig)
+NON_RUN_FIELDS = ("schema_version", "name", "modules")
+RUN_FIELDS = tuple(f for f in SimInput.model_fields if f not in NON_RUN_FIELDS)
+
+@dataclass(frozen=True, slots=True)
+class RunConfig:
+    """
+    Paramètres résolus d'une simu (modules.* extraits, clamps appliqués), immuables.
+    Construit une fois par requête ; un MC ne fait varier que le seed (dataclasses.replace).
+    """
+    seed: Optional[int]
+    total_steps: int
+    mu: float
+    fees_per_trade: float
+    steps_per_day: int
+    sigma: float
+    cppi_alpha: float
+    cppi_freeze_frac: float
+    vt_target_vol: float
+    vt_halflife: int
+    kelly_cap: float
+    soft_barrier: float
+    daily_limit: float
+    total_limit: float
+    spend_rate: float
+    use_cppi: bool
+    use_vt: bool
+    use_kelly_cap: bool
+    use_soft_barrier: bool
+    return_series: bool
+    debug: bool
+    trace_len: int
+    target_profit: float
+    max_days: int
+    # ReturnProfile (generators) ; None = gaussien historique rng.gauss(mu, sigma)
+    returns: Optional[Any]
+    rng: str
+    # clamps appliqués : ((champ, (valeur demandée, valeur retenue)), ...) — picklable
+    param_clamps: Tuple[Tuple[str, Tuple[float, float]], ...]
+
+    def clamps_dict(self) -> Dict[str, List[float]]:
+        """Copie JSON des clamps (pour diag.param_clamps)."""
+        return {name: list(pair) for name, pair in self.param_clamps}
+
+def resolve_config(p: SimInput) -> RunConfig:
+    """
+    Extrait les paramètres depuis modules.* et applique les filets de sécurité,
+    sans muter 'p'.
+    """
+    values = {name: getattr(p, name) for name in RUN_FIELDS}
     if p.modules:
-        cppi_config = p.modules.get("CPPIFreeze", {})
-        vt_config = p.modules.get("VolatilityTarget", {})
-        kelly_config = p.modules.get("KellyCap", {})
-        soft_config = p.modules.get("SoftBarrier", {})
-        ftmo_config = p.modules.get("FTMOGate", {})
-        
-        p.cppi_alpha = cppi_config.get("alpha", p.cppi_alpha)
-        p.cppi_freeze_frac = cppi_config.get("freeze_frac", p.cppi_freeze_frac)
-        p.vt_target_vol = vt_config.get("vt_target_vol", p.vt_target_vol)
-        p.vt_halflife = vt_config.get("vt_halflife", p.vt_halflife)
-        p.kelly_cap = kelly_config.get("kelly_cap", p.kelly_cap)
-        p.soft_barrier = soft_config.get("soft_barrier", p.soft_barrier)
-        p.daily_limit = ftmo_config.get("daily_limit", p.daily_limit)
-        p.total_limit = ftmo_config.get("total_limit", p.total_limit)
+        for (module, key), field in MODULE_FIELDS.items():
+            config = p.modules.get(module, {})
+            values[field] = config.get(key, values[field])
+
+    # Générateur de rendements : le gaussien simple reste sur le flux historique
+    if values["returns"] is not None:
+        moments, profile = values["returns"].resolve()
+        values.update(moments)
+        values["returns"] = None if profile.is_plain_gaussian else profile
 
     # Filets de sécurité sur les params en décimal
     param_clamps = {}
-    p.daily_limit = clip01(p.daily_limit, "daily_limit", param_clamps)
-    p.total_limit = clip01(p.total_limit, "total_limit", param_clamps)
-    p.kelly_cap   = clip01(p.kelly_cap, "kelly_cap", param_clamps)
+    for name in ("daily_limit", "total_limit", "kelly_cap"):
+        values[name] = clip01(values[name], name, param_clamps)
 
     # cppi_freeze_frac ne doit pas dépasser cppi_alpha (sinon freeze instantané)
-    if p.cppi_freeze_frac > p.cppi_alpha:
-        param_clamps["cppi_freeze_frac"] = [p.cppi_freeze_frac, p.cppi_alpha]
-        p.cppi_freeze_frac = p.cppi_alpha
+    if values["cppi_freeze_frac"] > values["cppi_alpha"]:
+        param_clamps["cppi_freeze_frac"] = [values["cppi_freeze_frac"], values["cppi_alpha"]]
+        values["cppi_freeze_frac"] = values["cppi_alpha"]
 
-    equity = [1.0]
-    hwm = 1.0
-    floor = hwm * (1.0 - p.cppi_alpha) if p.use_cppi else 0.0
+    values["param_clamps"] = tuple((name, tuple(pair)) for name, pair in param_clamps.items())
+    return RunConfig(**values)
 
-    # EW vol proxy (simple)
-    vol_est = p.sigma
-    lam = math.exp(math.log(0.5)/max(1, p.vt_halflife)) if p.use_vt else 0.5  # demi-vie → lambda
+def as_run_config(p: Union[SimInput, RunConfig]) -> RunConfig:
+    """RunConfig tel quel, ou résolu depuis un SimInput."""
+    return p if isinstance(p, RunConfig) else resolve_config(p)
 
-    # Diagnostics
-    kelly_cap_hits = 0
-    cppi_freeze_events = 0
-    no_upsize_after_loss = True
+# -----------------------------
+# Boucle de simu (sans details privés)
+# -----------------------------
+def simulate_equity(p: Union[SimInput, RunConfig], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Une simulation ; 'fields' (chemins pointés, cf. select_fields) projette le résultat et
+    évite de calculer les groupes non demandés (série, trace, diag, KPIs de base / étendus).
+    """
+    # Extraction modules.* + filets de sécurité (une fois par requête si RunConfig fourni)
+    with stage("resolve"):
+        p = as_run_config(p)
+        param_clamps = p.clamps_dict()
+        groups = result_groups(fields)
+        if p.return_series and "series" not in groups:
+            p = replace(p, return_series=False)
+        if p.debug and "trace" not in groups:
+            p = replace(p, debug=False)
+        basic, extended = "kpis_basic" in groups, "kpis_extended" in groups
+
+    # Remplace l'usage global de random.seed(...) par un RNG local
+    import random as _random
+    rng = _random.Random(p.seed) if p.seed is not None else _random.Random()
 
-    last_position = 0.0
-    last_step_was_loss = False
+    # Noyau compilé (Numba) si disponible ; la trace debug reste sur la boucle Python
+    from backend.app import kernel as _kernel
+    use_kernel = _kernel.KERNEL is not None and not p.debug
+    # Chocs pré-tirés si profil non gaussien ou flux Philox (même colonne que le moteur batch pour ce seed)
+    shocks = None
+    if p.returns is not None:
+        from backend.app.generators import generate_returns
+        with stage("shocks"):
+            shocks = generate_returns(p.returns, [p.seed], p.total_steps, p.mu, p.sigma, p.rng)[:, 0]
+            if not use_kernel:
+                shocks = shocks.tolist()
+    elif p.rng == "philox" and not use_kernel:
+        from backend.app.streams import philox_normals
+        with stage("shocks"):
+            shocks = (p.mu + philox_normals([p.seed], p.total_steps)[:, 0] * p.sigma).tolist()
+
+    if use_kernel:
+        # chocs tirés par blocs dans run_step_kernel (pas de liste de T chocs)
+        if shocks is not None:
+            draw = lambda start, m: shocks[start:start + m]
+        elif p.rng == "philox":
+            from backend.app.streams import philox_normals
+            draw = lambda start, m: p.mu + philox_normals([p.seed], m, start)[:, 0] * p.sigma
+        else:
+            draw = _kernel.gauss_blocks(rng.gauss, p.mu, p.sigma)
+        equity, metrics, (kelly_cap_hits, cppi_freeze_events, no_upsize_after_loss,
+                          used_default_expo, first_cross_step) = _kernel.run_step_kernel(
+            _kernel.KERNEL, p, draw, basic, extended)
+        trace = []
+    else:
+        # KPIs en ligne : la série n'est conservée que si return_series
+        acc = KpiAccumulator(p.daily_limit, p.total_limit, p.steps_per_day, basic, extended)
+        acc.push(1.0)
+        equity = [1.0] if p.return_series else None
+        eq = 1.0
+        hwm = 1.0
+        floor = hwm * (1.0 - p.cppi_alpha) if p.use_cppi else 0.0
+
+        # EW vol proxy (simple)
+        vol_est = p.sigma
+        lam = math.exp(math.log(0.5)/max(1, p.vt_halflife)) if p.use_vt else 0.5  # demi-vie → lambda
+
+        # Diagnostics
+        kelly_cap_hits = 0
+        cppi_freeze_events = 0
+        no_upsize_after_loss = True
+
+        last_position = 0.0
+        last_step_was_loss = False
     
-    # Au début de la boucle, initialise la trace et les flags
-    trace = []
-    used_default_expo = False
-    first_cross_step = None  # <- pour la cible de profit
-
-    for t in range(1, p.total_steps+1):
-        # Process bruité (mu, sigma)
-        base_r = rng.gauss(p.mu, p.sigma)
-
-        # Sizers "min aggregator"
-        sizes: List[float] = []
-
-        # VolTarget (approx) → target vol / vol_est
-        if p.use_vt:
-            f_vt = p.vt_target_vol / max(1e-8, vol_est)
-            sizes.append(f_vt)
-
-        # KellyCap (uniquement CAP – pas de formule interne divulguée)
-        if p.use_kelly_cap:
-            sizes.append(p.kelly_cap)
-
-        # SoftBarrier (palier de réduction doux)
-        if p.use_soft_barrier and p.soft_barrier > 0.0:
-            # réduction si DD en cours dépasse soft_barrier
-            dd_now = (hwm - equity[-1]) / max(hwm, 1e-8)
-            if dd_now > p.soft_barrier:
-                sizes.append(max(0.0, 1.0 - dd_now))  # haircut simple
-
-        # Agrégateur min() — strict opt-in: pas d'expo si aucun module
-        used_default_expo = (len(sizes) == 0)
-        f_raw = min(sizes) if sizes else 0.0
-
-        # Pacing
-        f = max(0.0, min(1.0, f_raw * p.spend_rate))
-
-        # Règle d'or: pas d'upsize après une perte (palier soft)
-        if last_step_was_loss and f > last_position:
-            no_upsize_after_loss = False  # on log seulement (diagnostic)
-            # Option stricte (désactivée): f = min(f, last_position)
-
-        # CPPI (cushion_ratio défini seulement si CPPI ON)
-        cushion_ratio = None
-        if p.use_cppi:
-            cushion = max(0.0, equity[-1] - floor)
-            cushion_ratio = (cushion / hwm) if hwm > 0 else 0.0
-            if cushion_ratio < p.cppi_freeze_frac:
-                f = 0.0
-                cppi_freeze_events += 1
-
-        # Cap hit ?
-        if p.use_kelly_cap and abs(f - p.kelly_cap) < 1e-12:
-            kelly_cap_hits += 1
-
-        # PnL step (linéarisé)
-        r_eff = f * base_r
-        new_eq = max(1e-9, equity[-1] * (1.0 + r_eff))
-        equity.append(new_eq)
-
-        # --- détection de la cible ---
-        if first_cross_step is None and new_eq >= (1.0 + p.target_profit):
-            first_cross_step = t
-
-        # Mises à jour HWM / floor
-        if new_eq > hwm:
-            hwm = new_eq
-            if p.use_cppi:
-                floor = hwm * (1.0 - p.cppi_alpha)
-
-        # EW vol update
-        if p.use_vt:
-            vol_est = math.sqrt(lam * (vol_est**2) + (1-lam) * (base_r**2))
-
-        # Diagnostics "no upsize after loss"
-        last_step_was_loss = (new_eq < equity[-2])
-        last_position = f
+        # Au début de la boucle, initialise la trace et les flags
+        trace = []
+        used_default_expo = False
+        first_cross_step = None  # <- pour la cible de profit
+
+        with stage("loop"):
+            for t in range(1, p.total_steps+1):
+                # Process bruité (mu, sigma) ou choc du générateur
+                base_r = shocks[t-1] if shocks is not None else rng.gauss(p.mu, p.sigma)
+
+                # Sizers "min aggregator"
+                sizes: List[float] = []
+
+                # VolTarget (approx) → target vol / vol_est
+                if p.use_vt:
+                    f_vt = p.vt_target_vol / max(1e-8, vol_est)
+                    sizes.append(f_vt)
+
+                # KellyCap (uniquement CAP – pas de formule interne divulguée)
+                if p.use_kelly_cap:
+                    sizes.append(p.kelly_cap)
+
+                # SoftBarrier (palier de réduction doux)
+                if p.use_soft_barrier and p.soft_barrier > 0.0:
+                    # réduction si DD en cours dépasse soft_barrier
+                    dd_now = (hwm - eq) / max(hwm, 1e-8)
+                    if dd_now > p.soft_barrier:
+                        sizes.append(max(0.0, 1.0 - dd_now))  # haircut simple
+
+                # Agrégateur min() — strict opt-in: pas d'expo si aucun module
+                used_default_expo = (len(sizes) == 0)
+                f_raw = min(sizes) if sizes else 0.0
+
+                # Pacing
+                f = max(0.0, min(1.0, f_raw * p.spend_rate))
+
+                # Règle d'or: pas d'upsize après une perte (palier soft)
+                if last_step_was_loss and f > last_position:
+                    no_upsize_after_loss = False  # on log seulement (diagnostic)
+                    # Option stricte (désactivée): f = min(f, last_position)
+
+                # CPPI (cushion_ratio défini seulement si CPPI ON)
+                cushion_ratio = None
+                if p.use_cppi:
+                    cushion = max(0.0, eq - floor)
+                    cushion_ratio = (cushion / hwm) if hwm > 0 else 0.0
+                    if cushion_ratio < p.cppi_freeze_frac:
+                        f = 0.0
+                        cppi_freeze_events += 1
+
+                # Cap hit ?
+                if p.use_kelly_cap and abs(f - p.kelly_cap) < 1e-12:
+                    kelly_cap_hits += 1
+
+                # PnL step (linéarisé)
+                r_eff = f * base_r
+                new_eq = max(1e-9, eq * (1.0 + r_eff))
+                acc.push(new_eq)
+                if equity is not None:
+                    equity.append(new_eq)
+
+                # --- détection de la cible ---
+                if first_cross_step is None and new_eq >= (1.0 + p.target_profit):
+                    first_cross_step = t
+
+                # Mises à jour HWM / floor
+                if new_eq > hwm:
+                    hwm = new_eq
+                    if p.use_cppi:
+                        floor = hwm * (1.0 - p.cppi_alpha)
+
+                # EW vol update
+                if p.use_vt:
+                    # produits explicites (arrondi IEEE exact, identique au moteur batch NumPy)
+                    vol_est = math.sqrt(lam * (vol_est * vol_est) + (1-lam) * (base_r * base_r))
+
+                # Diagnostics "no upsize after loss"
+                last_step_was_loss = (new_eq < eq)
+                eq = new_eq
+                last_position = f
         
-        # Ajoute la collecte de trace (sans NameError)
-        if p.debug and len(trace) < p.trace_len:
-            freeze_flag = (p.use_cppi and cushion_ratio is not None and cushion_ratio < p.cppi_freeze_frac and f == 0.0)
-            trace.append({
-                "t": t,
-                "base_r": base_r,
-                "f": f,
-                "hwm": hwm,
-                "floor": floor,
-                "freeze": freeze_flag,
-                "eq": new_eq
-            })
-
-    # ---- DD & Violations ----
-    dd_tot = drawdowns(equity)["max_dd_total"]
-    daily = daily_violations(equity, p.daily_limit, p.steps_per_day)
-    v_total = total_violations(equity, p.total_limit)
+                # Ajoute la collecte de trace (sans NameError)
+                if p.debug and len(trace) < p.trace_len:
+                    freeze_flag = (p.use_cppi and cushion_ratio is not None and cushion_ratio < p.cppi_freeze_frac and f == 0.0)
+                    trace.append({
+                        "t": t,
+                        "base_r": base_r,
+                        "f": f,
+                        "hwm": hwm,
+                        "floor": floor,
+                        "freeze": freeze_flag,
+                        "eq": new_eq
+                    })
+
+        # ---- DD, violations & KPIs (accumulés pendant la boucle) ----
+        with stage("kpis"):
+            metrics = acc.result()
+    v_daily = metrics["violations_daily"]
+    v_total = metrics["violations_total"]
 
     # --- Cible de profit -> days_to_target & target_pass ---
     days_to_target = None
@@ -461,28 +918,20 @@ def simulate_equity(p: SimInput) -> Dict[str, Any]:
     target_pass = bool(
         (days_to_target is not None) and
         (days_to_target <= p.max_days) and
-        (daily["violations_daily"] == 0) and
+        (v_daily == 0) and
         (v_total == 0)
     )
 
     # ---- KPIs & Diagnostics ----
     # Bloc de retour JSON (jamais null + diag enrichi)
-    kpis_out = compute_basic_kpis_from_equity(equity)  # doit toujours être un dict
-
-    # extended
-    spd = getattr(p, "steps_per_day", None) or 0
-    ext = compute_extended_kpis(equity, steps_per_day=spd)
-
-    # merge robuste (même si ext/basiques étaient None par erreur)
-    kpis_out = safe_merge_dict(kpis_out, ext)
-    
+    kpis_out = metrics["kpis"]  # base + étendus (si demandés), toujours un dict
     kpis_out.update({
         "target_profit": safe_number(p.target_profit),
         "max_days": int(p.max_days),
         "days_to_target": days_to_target,   # peut être None si non atteint
         "target_pass": target_pass
     })
-    diag_out = safe_diag_dict(
+    diag_out = None if "diag" not in groups else safe_diag_dict(
         use_cppi=p.use_cppi,
         use_vt=p.use_vt,
         use_kelly=p.use_kelly_cap,
@@ -494,47 +943,317 @@ def simulate_equity(p: SimInput) -> Dict[str, Any]:
         param_clamps=param_clamps
     )
 
-    out = {
-        "series": {"equity": equity},
-        "max_dd_total": dd_tot,
-        "max_dd_daily": daily["max_dd_daily"],
-        "violations_daily": daily["violations_daily"],
+    out = {"series": {"equity": equity}} if equity is not None else {}
+    out.update({
+        "max_dd_total": metrics["max_dd_total"],
+        "max_dd_daily": metrics["max_dd_daily"],
+        "violations_daily": v_daily,
         "violations_total": v_total,
         "kpis": kpis_out,   # jamais null, jamais inf/nan
-        "diag": diag_out    # modules actifs, clamps, flags
-    }
+    })
+    if diag_out is not None:
+        out["diag"] = diag_out    # modules actifs, clamps, flags
     if p.debug:
         out["trace"] = trace
-    return out
+    return select_fields(out, fields)
 
 # -----------------------------
 # Endpoints
 # -----------------------------
 @app.get("/health")
 def health():
-    return {"ok": True, "app": "backend.app.main", "rev": "r1"}
+    from backend.app.cache import RESULT_CACHE
+    from backend.app.jobs import JOBS
+    from backend.app.shocks import SHOCK_STORE
+    return {"ok": True, "app": "backend.app.main", "rev": "r1",
+            "cache": RESULT_CACHE.stats(), "shocks": SHOCK_STORE.stats(), "jobs": JOBS.stats()}
 
 @app.post("/simulate")
-def simulate(payload: SimInput = Body(...)):
-    result = simulate_equity(payload)
-    return result
+def simulate(request: Request, payload: SimInput = Body(...), downsample: Optional[int] = None,
+             dtype: Literal["float64", "float32"] = "float64", timing: bool = False,
+             profile: Optional[str] = None, fields: Optional[str] = None):
+    """
+    fields=max_dd_total,kpis.target_pass : projection, groupes non demandés non calculés.
+    downsample=N : série réduite à N points (LTTB, + series.index) pour les graphes.
+    Accept: application/octet-stream -> en-tête JSON + buffers bruts (voir backend.app.series).
+    timing=true / profile=true : temps par étape dans diag.timings, profil (voir backend.app.timing).
+    """
+    from backend.app.series import BINARY_MEDIA_TYPE, downsample_result, encode_binary, wants_binary
+    from backend.app.timing import RequestInstrumentation
+
+    selected = parse_fields(fields)
+
+    def compute():
+        # seed=None -> tirage non reproductible, jamais mis en cache
+        if payload.seed is None:
+            return simulate_equity(payload, selected)
+        from backend.app.cache import cached, normalized_params
+        with stage("cache_key"):
+            params = normalized_params(payload)
+            if selected is not None:
+                params["fields"] = sorted(set(selected))
+        return cached("simulate", params, lambda: simulate_equity(payload, selected))
+
+    with RequestInstrumentation(request, "simulate", timing, profile) as ins:
+        out = ins.run(compute)
+        with stage("downsample"):
+            out = downsample_result(out, downsample)
+        out = ins.annotate(out)
+        if wants_binary(request.headers.get("accept")):
+            return ins.respond(out, lambda o: encode_binary(o, dtype), BINARY_MEDIA_TYPE)
+        return ins.respond(out)
+
+class SimBatchInput(BaseModel):
+    # Payloads SimInput complets, ou surcharges de 'base' (clés SimInput, "modules.<Module>.<clé>", modules)
+    items: List[Dict[str, Any]]
+    base: Optional[Dict[str, Any]] = None
+    # Projection de chaque résultat (chemins pointés, ex. ["max_dd_total", "kpis.target_pass"]) ; None = tout
+    fields: Optional[List[str]] = None
+    workers: int = 1
+
+@app.post("/simulate_batch")
+def simulate_batch(inp: SimBatchInput, request: Request = None, timing: bool = False,
+                   profile: Optional[str] = None):
+    """Plusieurs simulations en une requête ; results[i] = /simulate de l'item i (voir backend.app.bulk)."""
+    from fastapi import HTTPException
+    from backend.app.bulk import ItemError, build_inputs, run_batch
+    from backend.app.timing import RequestInstrumentation
+    try:
+        ps = build_inputs(inp.items, inp.base)
+    except ItemError as e:
+        raise HTTPException(status_code=422, detail={"item": e.index, "errors": e.errors})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    with RequestInstrumentation(request, "simulate_batch", timing, profile) as ins:
+        results = ins.run(lambda: run_batch(ps, workers=inp.workers, fields=inp.fields))
+        return ins.respond(ins.annotate({"n": len(results), "results": results}))
+
+@app.get("/metrics")
+def metrics():
+    """Histogrammes de durée (requêtes, étapes instrumentées) au format texte Prometheus."""
+    from fastapi.responses import PlainTextResponse
+    from backend.app.timing import render_metrics
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+class AdaptiveMC(BaseModel):
+    # Demi-largeurs d'IC cibles (None = critère ignoré) ; arrêt quand toutes sont atteintes
+    tol_pass_rate: Optional[float] = None
+    tol_pass_rate_full: Optional[float] = None
+    tol_dd_p95: Optional[float] = None
+    confidence: float = 0.95
+    batch: int = 200        # runs par lot entre deux tests d'arrêt
+    min_n: int = 100
+    max_n: int = 10000      # budget (remplace n)
+
+class VarianceMC(BaseModel):
+    # Tirages : "none" (flux des seeds), "antithetic" (paires z/-z), "sobol" / "lhs" (quasi-aléatoire / stratifié)
+    method: Literal["none", "antithetic", "sobol", "lhs"] = "antithetic"
+    # Variables de contrôle : chemins non protégés à exposition constante (voir backend.app.variance)
+    control_variate: bool = True
+    replicates: int = 16         # groupes indépendants pour l'erreur standard
+    # Pilote des contrôles DD / pass, en multiple de n (0 : contrôles à moyenne exacte seulement)
+    control_pilot: float = 0.0
+
+class RareEventMC(BaseModel):
+    # Événements estimés par échantillonnage d'importance (voir backend.app.rare)
+    events: List[Literal["total", "daily", "deep_dd"]] = ["total", "daily"]
+    dd_level: float = 0.20      # seuil de "deep_dd" (max_dd_total > dd_level)
+    pilot: int = 1000           # chemins par itération d'entropie croisée
+    rho: float = 0.1            # fraction d'élite
+    max_iter: int = 10
+    confidence: float = 0.95
 
 class MCInput(BaseModel):
     payload: SimInput
     n: int = 100
+    # run k = seed base_seed + k : deux MC dont les plages de seeds se recouvrent partagent ces chemins
     base_seed: int = 12345
+    # "batch": chemins vectorisés NumPy (identique au scalaire), "scalar": boucle historique
+    engine: Literal["batch", "scalar"] = "batch"
+    # Parallélisme multi-process (1 = in-process) ; chunk_size = seeds par tâche (auto si None)
+    workers: int = 1
+    chunk_size: Optional[int] = None
+    # Arrêt anticipé sur intervalles de confiance (n ignoré, budget = adaptive.max_n)
+    adaptive: Optional[AdaptiveMC] = None
+    # Réduction de variance (moteur batch, en série) : SE et taille d'échantillon effective
+    variance: Optional[VarianceMC] = None
+    # Probabilités d'événements rares (ruin_prob, ES95) par échantillonnage d'importance
+    rare: Optional[RareEventMC] = None
+
+    @model_validator(mode="after")
+    def _check_modes(self):
+        modes = [name for name in ("adaptive", "variance", "rare") if getattr(self, name) is not None]
+        if len(modes) > 1:
+            raise ValueError(f"modes exclusifs: {', '.join(modes)}")
+        if modes and modes[0] != "adaptive" and resolve_config(self.payload).returns is not None:
+            raise ValueError(f"{modes[0]} : chocs gaussiens uniquement (pas de profil 'returns')")
+        return self
+
+def mc_cache_params(inp: MCInput) -> Dict[str, Any]:
+    # engine / workers / chunk_size ne changent pas le résultat : hors de la clé
+    from backend.app.cache import normalized_params
+    params = {"payload": normalized_params(inp.payload, drop_seed=True), "n": inp.n, "base_seed": inp.base_seed}
+    if inp.adaptive is not None:
+        params["n"] = None
+        params["adaptive"] = inp.adaptive.model_dump()
+    if inp.variance is not None:
+        params["variance"] = inp.variance.model_dump()
+    if inp.rare is not None:
+        params["rare"] = inp.rare.model_dump()
+    return params
 
 @app.post("/simulate_mc")
-def simulate_mc(inp: MCInput):
-    import copy
+def simulate_mc(inp: MCInput, request: Request = None, timing: bool = False, profile: Optional[str] = None,
+                fields: Optional[str] = None):
+    """fields=mc.pass_rate,mc.dd_p95 : projection de la réponse (les chemins ne calculent déjà que les compteurs)."""
+    from backend.app.cache import cached
+    from backend.app.timing import RequestInstrumentation
+
+    def compute():
+        with stage("cache_key"):
+            params = mc_cache_params(inp)
+        return cached("simulate_mc", params, lambda: _simulate_mc(inp))
+
+    with RequestInstrumentation(request, "simulate_mc", timing, profile) as ins:
+        return ins.respond(ins.annotate(select_fields(ins.run(compute), parse_fields(fields))))
+
+def _simulate_mc(inp: MCInput):
+    if inp.rare is not None:
+        from backend.app.rare import run_rare_mc
+        with stage("mc"):
+            return run_rare_mc(inp.payload, inp.n, inp.base_seed, inp.rare)
+    if inp.variance is not None:
+        from backend.app.variance import run_variance_mc
+        with stage("mc"):
+            return run_variance_mc(inp.payload, inp.n, inp.base_seed, inp.variance)
+    if inp.adaptive is not None:
+        from backend.app.adaptive import run_adaptive_mc
+        with stage("mc"):
+            return run_adaptive_mc(inp.payload, inp.base_seed, inp.adaptive, engine=inp.engine,
+                                   workers=inp.workers, chunk_size=inp.chunk_size)
+    from backend.app.parallel import run_mc_counts
+    with stage("mc"):
+        counts = run_mc_counts(inp.payload, range(inp.base_seed, inp.base_seed + inp.n),
+                               engine=inp.engine, workers=inp.workers, chunk_size=inp.chunk_size)
+    pass_ftmo, pass_full, dds = counts["pass_ftmo"], counts["pass_full"], counts["dds"]
+
+    with stage("mc_stats"):
+        return {
+            "n": inp.n,
+            "mc": mc_stats(pass_ftmo, pass_full, dds, inp.n)
+        }
+
+def mc_quantile(arr, q):
+    """Quantile d'une liste triée au rang round(q*(n-1))."""
+    if not arr: return 0.0
+    idx = int(round(q*(len(arr)-1)))
+    return arr[idx]
+
+def mc_stats(pass_ftmo: int, pass_full: int, dds: List[float], n: int) -> Dict[str, Any]:
+    dds_sorted = sorted(dds)
+    return {
+        "pass_rate": pass_ftmo / max(1, n),
+        "pass_rate_full": pass_full / max(1, n),
+        "dd_p50": mc_quantile(dds_sorted, 0.50),
+        "dd_p95": mc_quantile(dds_sorted, 0.95)
+    }
+
+class MCStreamInput(MCInput):
+    # Un snapshot NDJSON toutes les 'every' runs ; sketch_k = précision du sketch KLL
+    every: int = 100
+    sketch_k: int = 200
+
+    @model_validator(mode="after")
+    def _check_stream(self):
+        # le flux est un MC classique par blocs de seeds : modes spéciaux refusés plutôt qu'ignorés
+        unsupported = [name for name in ("adaptive", "variance", "rare") if getattr(self, name) is not None]
+        if unsupported:
+            raise ValueError(f"non supporté en streaming: {', '.join(unsupported)}")
+        return self
+
+@app.post("/simulate_mc/stream")
+def simulate_mc_stream(inp: MCStreamInput):
+    """Variante streaming de /simulate_mc : lignes NDJSON progressives (dernière: final=true)."""
+    from fastapi.responses import StreamingResponse
+    from backend.app.streaming import iter_mc_ndjson
+    return StreamingResponse(iter_mc_ndjson(inp), media_type="application/x-ndjson")
+
+class SweepInput(BaseModel):
+    base: SimInput
+    # chemin pointé ("modules.CPPIFreeze.alpha", "kelly_cap", ...) -> {min, max, step} ou liste de valeurs
+    ranges: Dict[str, Any] = {}
+    n: int = 32                 # chemins MC par point (mêmes seeds pour tous les points)
+    base_seed: int = 12345
+    objective: Literal["pass_rate_full", "pass_rate", "dd_p95", "dd_p50"] = "pass_rate_full"
+    top_k: int = 10
+    workers: int = 1
+    max_points: int = 20000
+
+@app.post("/sweep")
+def sweep(inp: SweepInput):
+    from fastapi import HTTPException
+    from backend.app.sweep import run_sweep
+    try:
+        return run_sweep(inp.base, inp.ranges, n=inp.n, base_seed=inp.base_seed, objective=inp.objective,
+                         top_k=inp.top_k, workers=inp.workers, max_points=inp.max_points)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+class JobInput(BaseModel):
+    kind: Literal["simulate_mc", "sweep"]
+    # corps de /simulate_mc (MCInput) ou de /sweep (SweepInput)
+    params: Dict[str, Any]
+
+@app.post("/jobs", status_code=202)
+def create_job(inp: JobInput):
+    """Lance un MC / sweep en arrière-plan ; suivre avec GET /jobs/{id}."""
+    from fastapi import HTTPException
+    from pydantic import ValidationError
+    from backend.app.jobs import JOBS, JobQueueFull
+    try:
+        params = (MCInput if inp.kind == "simulate_mc" else SweepInput)(**inp.params)
+        job_id = JOBS.submit(inp.kind, params)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"id": job_id, "status": "queued"}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """État, progression (done/total), résultat partiel puis final ; 404 si inconnu ou expiré."""
+    from fastapi import HTTPException
+    from backend.app.jobs import JOBS
+    job = JOBS.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job inconnu ou expiré")
+    return job
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Demande l'arrêt (effectif à la fin du bloc en cours)."""
+    from fastapi import HTTPException
+    from backend.app.jobs import JOBS
+    job = JOBS.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job inconnu ou expiré")
+    return {"id": job_id, "cancelled": JOBS.cancel(job_id), "status": JOBS.store.get(job_id)["status"]}
+
+# Seuls champs lus par le MC scalaire : KPIs de base / étendus et diag non calculés
+MC_FIELDS = ["max_dd_total", "violations_daily", "violations_total", "kpis.target_pass"]
+
+def mc_counts_scalar(payload: Union[SimInput, RunConfig], seeds) -> Dict[str, Any]:
+    """Boucle MC historique (un simulate_equity par seed), même contrat que batch.mc_counts."""
+    base = replace(as_run_config(payload), return_series=False)
     dds = []
     pass_ftmo = 0
     pass_full = 0
 
-    for i in range(inp.n):
-        p = copy.deepcopy(inp.payload)
-        p.seed = inp.base_seed + i
-        res = simulate_equity(p)
+    for seed in seeds:
+        res = simulate_equity(replace(base, seed=seed), MC_FIELDS)
 
         v_daily = res.get("violations_daily", 0)
         v_total = res.get("violations_total", 0)
@@ -547,21 +1266,4 @@ def simulate_mc(inp: MCInput):
 
         dds.append(res.get("max_dd_total", 0.0))
 
-    dds_sorted = sorted(dds)
-    def quantile(arr, q):
-        if not arr: return 0.0
-        idx = int(round(q*(len(arr)-1)))
-        return arr[idx]
-
-    return {
-        "n": inp.n,
-        "mc": {
-            "pass_rate": pass_ftmo / max(1, inp.n),
-            "pass_rate_full": pass_full / max(1, inp.n),
-            "dd_p50": quantile(dds_sorted, 0.50),
-            "dd_p95": quantile(dds_sorted, 0.95)
-        }
-    }
-
-
-
+    return {"pass_ftmo": pass_ftmo, "pass_full": pass_full, "dds": dds}
@@ -0,0 +1,109 @@
+"""
+Exécution Monte Carlo multi-process : découpe la plage de seeds en chunks contigus,
+les simule sur un pool de workers et fusionne dans l'ordre des seeds.
+
+Chaque seed produit le même chemin quel que soit le worker, donc le résultat
+fusionné est identique au run série.
+
+Les pools sont séparés par groupe (pool_group) : les endpoints utilisent "requests",
+les jobs asynchrones "jobs", pour qu'un gros job n'occupe pas les workers de
+/simulate_batch, /sweep ou /simulate_mc.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import atexit
+import multiprocessing
+import os
+import threading
+
+from backend.app.main import RunConfig, SimInput, as_run_config
+
+# Plafond de workers par requête (surchargeable via SIM_MAX_WORKERS)
+MAX_WORKERS = int(os.environ.get("SIM_MAX_WORKERS", os.cpu_count() or 1))
+
+_POOLS: Dict[Tuple[str, int], ProcessPoolExecutor] = {}
+_POOLS_LOCK = threading.Lock()
+_POOL_GROUP: ContextVar[str] = ContextVar("pool_group", default="requests")
+
+
+@contextmanager
+def pool_group(name: str) -> Iterator[None]:
+    """Les get_pool du bloc (même thread) utilisent les pools du groupe 'name'."""
+    token = _POOL_GROUP.set(name)
+    try:
+        yield
+    finally:
+        _POOL_GROUP.reset(token)
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Pool partagé par (groupe courant, taille) ; créé à la demande, 'spawn' pour rester
+    sûr dans un serveur threadé.
+    """
+    key = (_POOL_GROUP.get(), workers)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _POOLS[key] = pool
+        return pool
+
+
+@atexit.register
+def shutdown_pools() -> None:
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _POOLS.clear()
+
+
+def split_seeds(seeds: Sequence[int], chunk_size: int) -> List[Sequence[int]]:
+    chunk_size = max(1, int(chunk_size))
+    return [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+
+
+def mc_counts_chunk(payload: Union[SimInput, RunConfig], seeds: Sequence[int], engine: str = "batch",
+                    store_shocks: bool = True) -> Dict[str, Any]:
+    """Compteurs MC d'un chunk de seeds (exécuté dans un worker ou in-process)."""
+    if engine == "scalar":
+        from backend.app.main import mc_counts_scalar
+        return mc_counts_scalar(payload, seeds)
+    from backend.app.batch import simulate_batch, mc_counts
+    return mc_counts(simulate_batch(payload, seeds, store_shocks=store_shocks))
+
+
+def merge_counts(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fusionne des compteurs de chunks (dans l'ordre des seeds)."""
+    dds: List[float] = []
+    for part in parts:
+        dds.extend(part["dds"])
+    return {
+        "pass_ftmo": sum(part["pass_ftmo"] for part in parts),
+        "pass_full": sum(part["pass_full"] for part in parts),
+        "dds": dds,
+    }
+
+
+def run_mc_counts(payload: Union[SimInput, RunConfig], seeds: Sequence[int], engine: str = "batch",
+                  workers: int = 1, chunk_size: Optional[int] = None, store_shocks: bool = True) -> Dict[str, Any]:
+    """
+    Compteurs MC sur 'seeds', en série (workers <= 1) ou sur un pool de processus.
+    workers est borné à MAX_WORKERS ; chunk_size par défaut ~4 tâches par worker.
+    La config est résolue une fois (RunConfig figé) puis partagée par tous les chunks.
+    store_shocks=False : les chocs tirés ne sont pas gardés dans le SHOCK_STORE.
+    """
+    payload = as_run_config(payload)
+    workers = max(1, min(int(workers or 1), MAX_WORKERS))
+    if workers == 1 or len(seeds) <= 1:
+        if not chunk_size:
+            return mc_counts_chunk(payload, seeds, engine, store_shocks)
+        return merge_counts([mc_counts_chunk(payload, c, engine, store_shocks) for c in split_seeds(seeds, chunk_size)])
+
+    if not chunk_size:
+        chunk_size = -(-len(seeds) // (workers * 4))
+    pool = get_pool(workers)
+    futures = [pool.submit(mc_counts_chunk, payload, c, engine, store_shocks) for c in split_seeds(seeds, chunk_size)]
+    return merge_counts([fut.result() for fut in futures])
@@ -0,0 +1,151 @@
+"""
+Probabilités d'événements rares (violation totale / journalière, DD profond) par
+échantillonnage d'importance (MCInput.rare, moteur batch).
+
+Les chocs z ~ N(0,1) de chaque pas sont décalés de theta (z + theta, theta < 0 pousse
+vers les pertes) ; poids de vraisemblance d'un chemin w = exp(-theta * sum(z) + T theta^2 / 2).
+theta est choisi par entropie croisée : lots pilotes de 'pilot' chemins, seuil gamma =
+quantile (1 - rho) du score (DD total ou DD journalier max) borné par la limite,
+theta <- moyenne pondérée (w) des chocs des chemins d'élite, jusqu'à ce que gamma
+atteigne la limite. L'estimation finale utilise n chemins neufs (seeds disjoints des
+pilotes) : p = mean(w 1_A), sans biais, IC normal p ± z SE. Sans aucun chemin dans
+l'événement, pas d'IC : "ci" vaut None et "upper_bound" donne un ordre de grandeur
+heuristique (règle de trois au poids maximal), qui n'est pas une borne de confiance.
+
+Événements : "total" (violations_total > 0, = ruin_prob), "daily" (violations_daily > 0,
+score = pire perte sous l'ouverture du jour, la quantité testée par violations_daily),
+"deep_dd" (max_dd_total > dd_level).
+Le MC classique des seeds base_seed .. base_seed + n - 1 (theta = 0) est toujours rendu
+sous "mc" comme pour /simulate_mc ; ES95 = moyenne des 5 % pires max_dd_total de ces n chemins.
+"""
+from typing import Any, Dict, List, Tuple
+import math
+
+import numpy as np
+
+from backend.app.adaptive import z_value
+from backend.app.batch import DEFAULT_CHUNK_PATHS, _simulate_chunk, mc_counts
+from backend.app.main import RunConfig, as_run_config, mc_stats, safe_num
+from backend.app.shocks import SHOCK_STORE
+
+MAX_THETA = 2.0
+KEYS = ("max_dd_total", "max_loss_daily", "violations_daily", "violations_total", "target_pass")
+
+
+def tilted_run(p: RunConfig, seeds: range, theta: float) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+    """Chemins des seeds avec chocs z + theta : (résultats, log-poids, choc moyen par chemin)."""
+    T = p.total_steps
+    parts, logw, zbar = [], [], []
+    for c0 in range(0, len(seeds), DEFAULT_CHUNK_PATHS):
+        z = SHOCK_STORE.get(seeds[c0:c0 + DEFAULT_CHUNK_PATHS], T, p.rng) + theta
+        res = _simulate_chunk(p, z, False)
+        parts.append({k: res[k] for k in KEYS})
+        s = z.sum(axis=0)
+        logw.append(-theta * s + T * theta * theta / 2.0)
+        zbar.append(s / max(1, T))
+    res = {k: np.concatenate([part[k] for part in parts]) for k in KEYS}
+    return res, np.concatenate(logw), np.concatenate(zbar)
+
+
+def event_score(p: RunConfig, res: Dict[str, np.ndarray], event: str, dd_level: float) -> Tuple[np.ndarray, float]:
+    """Score continu (grand = proche de l'événement) et seuil d'élite final."""
+    if event == "daily":
+        return res["max_loss_daily"], p.daily_limit
+    return res["max_dd_total"], (p.total_limit if event == "total" else dd_level)
+
+
+def event_hits(res: Dict[str, np.ndarray], event: str, dd_level: float) -> np.ndarray:
+    if event == "total":
+        return res["violations_total"] > 0
+    if event == "daily":
+        return res["violations_daily"] > 0
+    return res["max_dd_total"] > dd_level
+
+
+def cross_entropy(p: RunConfig, event: str, spec, seed0: int) -> Tuple[float, List[Dict[str, float]], int]:
+    """theta d'entropie croisée ; retourne (theta, trace des itérations, prochain seed libre)."""
+    theta, trace, prev = 0.0, [], -math.inf
+    pilot = max(10, int(spec.pilot))
+    for _ in range(max(1, int(spec.max_iter))):
+        res, logw, zbar = tilted_run(p, range(seed0, seed0 + pilot), theta)
+        seed0 += pilot
+        score, limit = event_score(p, res, event, spec.dd_level)
+        gamma = min(limit, float(np.quantile(score, 1.0 - spec.rho)))
+        elite = score >= gamma
+        w = np.exp(logw[elite] - logw[elite].max())
+        trace.append({"theta": theta, "gamma": gamma})
+        theta = float(np.clip((w * zbar[elite]).sum() / w.sum(), -MAX_THETA, MAX_THETA))
+        if gamma >= limit or gamma <= prev:
+            break   # limite atteinte, ou plus de progrès (événement inatteignable : score constant)
+        prev = gamma
+    return theta, trace, seed0
+
+
+def estimate(p: RunConfig, event: str, theta: float, seeds: range, dd_level: float, z: float) -> Dict[str, Any]:
+    res, logw, _ = tilted_run(p, seeds, theta)
+    hits = event_hits(res, event, dd_level)
+    n = len(seeds)
+    wi = np.where(hits, np.exp(logw), 0.0)
+    prob = float(wi.mean()) if n else 0.0
+    se = float(wi.std(ddof=1) / math.sqrt(n)) if n > 1 else 0.0
+    ci, upper = None, None
+    if hits.any():
+        ci = [max(0.0, prob - z * se), min(1.0, prob + z * se)]
+        ess = float(wi.sum() ** 2 / (wi * wi).sum())
+    else:
+        # aucun chemin dans l'événement : pas d'IC, ordre de grandeur « règle de trois » au poids maximal
+        upper = min(1.0, 3.0 * float(np.exp(logw.max())) / max(1, n))
+        ess = 0.0
+    return {
+        "p": prob,
+        "se": se,
+        "ci": ci,
+        "upper_bound": upper,   # heuristique, seulement si hits == 0
+        "hits": int(hits.sum()),
+        "ess": ess,   # taille effective (Kish) des chemins dans l'événement
+        "relative_error": safe_num(se / prob) if prob > 0 else None,
+        "theta": theta,
+    }
+
+
+def expected_shortfall(xs: np.ndarray, level: float = 0.95) -> float:
+    """Moyenne des (1 - level) plus grandes valeurs."""
+    if xs.size == 0:
+        return 0.0
+    k = max(1, int(math.ceil((1.0 - level) * xs.size)))
+    return float(np.sort(xs)[-k:].mean())
+
+
+def run_rare_mc(payload, n: int, base_seed: int, spec) -> Dict[str, Any]:
+    """'spec' : RareEventMC (events, dd_level, pilot, rho, max_iter, confidence)."""
+    p = as_run_config(payload)
+    if p.returns is not None:
+        raise ValueError("événements rares : chocs gaussiens uniquement (pas de profil 'returns')")
+    z = z_value(spec.confidence)
+    # MC classique sur les seeds demandés (mêmes chemins que /simulate_mc), pilotes après
+    plain, _, _ = tilted_run(p, range(base_seed, base_seed + n), 0.0)
+    counts = mc_counts(plain)
+    es95 = expected_shortfall(plain["max_dd_total"])
+    seed0 = base_seed + n
+
+    events: Dict[str, Any] = {}
+    for event in dict.fromkeys(spec.events):
+        theta, trace, seed0 = cross_entropy(p, event, spec, seed0)
+        out = estimate(p, event, theta, range(seed0, seed0 + n), spec.dd_level, z)
+        seed0 += n
+        out["iterations"] = trace
+        events[event] = out
+
+    kpis = {"ES95": es95}
+    if "total" in events:
+        kpis["ruin_prob"] = events["total"]["p"]
+    return {
+        "n": n,
+        "mc": mc_stats(counts["pass_ftmo"], counts["pass_full"], counts["dds"], n),
+        "rare": {
+            **kpis,
+            "confidence": spec.confidence,
+            "dd_level": spec.dd_level,
+            "events": events,
+        },
+    }
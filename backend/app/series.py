@@ -0,0 +1,99 @@
+"""
+Format binaire colonnaire pour les séries d'equity (/simulate) + sous-échantillonnage LTTB.
+
+Négociation : Accept: application/octet-stream -> corps binaire
+    [u32 LE : taille H][H octets : en-tête JSON utf-8][buffers bruts little-endian]
+L'en-tête JSON contient le résultat sans les séries (KPIs, diag, ...) et, dans
+"series", la description de chaque colonne : {"dtype": "<f8"|"<f4"|"<u4", "length", "offset"}
+(offset en octets depuis le début des buffers, aligné sur 8).
+Sinon (JSON), la série reste une liste de floats.
+"""
+from typing import Any, Dict, Optional, Tuple
+import json
+import struct
+
+import numpy as np
+
+BINARY_MEDIA_TYPE = "application/octet-stream"
+DTYPES = {"float64": "<f8", "float32": "<f4"}
+
+
+def wants_binary(accept: Optional[str]) -> bool:
+    return bool(accept) and BINARY_MEDIA_TYPE in accept
+
+
+def lttb(y: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets sur x = indice du step : garde 'threshold' points
+    (premier et dernier inclus) qui préservent la forme visuelle. Retourne (indices, valeurs).
+    """
+    y = np.asarray(y, dtype=float)
+    n = y.size
+    if threshold >= n or threshold < 3:
+        idx = np.arange(n, dtype=np.int64)
+        return idx, y
+    idx = np.empty(threshold, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    # bornes des buckets intérieurs (threshold - 2 buckets sur [1, n-1))
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # point moyen du bucket suivant (ou dernier point)
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = (nlo + nhi - 1) / 2.0
+        avg_y = float(y[nlo:nhi].mean())
+        xs = np.arange(lo, hi)
+        area = np.abs((a - avg_x) * (y[lo:hi] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = int(lo + np.argmax(area))
+        idx[i + 1] = a
+    return idx, y[idx]
+
+
+def downsample_result(out: Dict[str, Any], points: Optional[int]) -> Dict[str, Any]:
+    """Copie superficielle de 'out' avec series.equity réduite à 'points' (LTTB) et series.index."""
+    series = out.get("series")
+    if not points or not series or "equity" not in series:
+        return out
+    equity = np.asarray(series["equity"], dtype=float)
+    if points >= equity.size:
+        return out
+    idx, values = lttb(equity, int(points))
+    res = dict(out)
+    res["series"] = {**series, "equity": values.tolist(), "index": idx.tolist()}
+    return res
+
+
+def encode_binary(out: Dict[str, Any], dtype: str = "float64") -> bytes:
+    """Résultat -> en-tête JSON préfixé par sa longueur + colonnes brutes little-endian."""
+    series = out.get("series") or {}
+    header = {k: v for k, v in out.items() if k != "series"}
+    columns = []
+    desc: Dict[str, Any] = {}
+    offset = 0
+    for name, values in series.items():
+        if name == "index":
+            arr = np.asarray(values, dtype="<u4")
+        else:
+            arr = np.asarray(values, dtype=DTYPES[dtype])
+        desc[name] = {"dtype": arr.dtype.str, "length": int(arr.size), "offset": offset}
+        buf = arr.tobytes()
+        pad = -len(buf) % 8
+        columns.append(buf + b"\0" * pad)
+        offset += len(buf) + pad
+    header["series"] = desc
+    head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    head += b" " * (-(4 + len(head)) % 8)  # buffers alignés sur 8 octets
+    return struct.pack("<I", len(head)) + head + b"".join(columns)
+
+
+def decode_binary(blob: bytes) -> Dict[str, Any]:
+    """Inverse de encode_binary (séries en np.ndarray) ; utile aux clients Python et aux tests."""
+    (size,) = struct.unpack_from("<I", blob, 0)
+    header = json.loads(blob[4:4 + size].decode("utf-8"))
+    base = 4 + size
+    series = {}
+    for name, d in header.get("series", {}).items():
+        series[name] = np.frombuffer(blob, dtype=d["dtype"], count=d["length"], offset=base + d["offset"])
+    header["series"] = series
+    return header
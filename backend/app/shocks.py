@@ -0,0 +1,149 @@
+"""
+Matrices de chocs standardisés z ~ N(0,1) partagées (nombres aléatoires communs).
+
+Une matrice (steps, n) par plage de seeds, générée une fois puis réutilisée par toutes
+les configs d'un MC / sweep ; le moteur applique mu + z*sigma à la volée. Une plage
+de seeds plus courte ou un horizon plus court est servi comme vue (les flux sont
+séquentiels : les premiers tirages ne dépendent pas de la longueur demandée).
+
+rng="philox" : mêmes matrices tirées des flux à compteur de backend.app.streams (clé de
+cache distincte du flux historique).
+
+Niveaux : mémoire (LRU borné en octets, SIM_SHOCK_MEM_BYTES) et, si SIM_SHOCK_DIR est
+défini, fichiers .npy relus en memmap pour les grilles qui ne tiennent pas en RAM.
+Les matrices retournées sont en lecture seule.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+import os
+import random
+import threading
+
+import numpy as np
+
+from backend.app.streams import philox_normals
+
+
+def standard_normals(seeds: Iterable[int], steps: int) -> np.ndarray:
+    """
+    Tirages N(0,1) de forme (steps, n), colonne j = flux gauss de random.Random(seeds[j]).
+    mu + z*sigma reproduit exactement rng.gauss(mu, sigma) du moteur scalaire.
+    """
+    seeds = list(seeds)
+    z = np.empty((len(seeds), steps), dtype=float)
+    for j, s in enumerate(seeds):
+        gauss = random.Random(s).gauss
+        z[j] = [gauss(0.0, 1.0) for _ in range(steps)]
+    return np.ascontiguousarray(z.T)
+
+
+def normals(seeds: Iterable[int], steps: int, rng: str = "legacy") -> np.ndarray:
+    """standard_normals (flux historique) ou philox_normals selon 'rng'."""
+    return philox_normals(seeds, steps) if rng == "philox" else standard_normals(seeds, steps)
+
+
+# Nombre max de matrices référencées (les memmaps ne comptent pas dans le budget octets)
+MAX_MATRICES = 64
+
+
+def _as_range(seeds: Iterable[int]) -> Optional[range]:
+    """Seeds consécutifs -> range (clé du cache), sinon None."""
+    if isinstance(seeds, range) and seeds.step == 1:
+        return seeds
+    seeds = list(seeds)
+    if seeds and seeds == list(range(seeds[0], seeds[0] + len(seeds))):
+        return range(seeds[0], seeds[0] + len(seeds))
+    return None
+
+
+class ShockStore:
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, disk_dir: Optional[str] = None):
+        self.max_bytes = int(max_bytes)
+        self.disk_dir = disk_dir
+        self._mem: "OrderedDict[Tuple[str, int, int, int], np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _lookup(self, seeds: range, steps: int, rng: str) -> Optional[np.ndarray]:
+        for (kind, start, stop, n_steps), z in self._mem.items():
+            if kind == rng and start <= seeds.start and seeds.stop <= stop and steps <= n_steps:
+                self._mem.move_to_end((kind, start, stop, n_steps))
+                return z[:steps, seeds.start - start:seeds.stop - start]
+        return None
+
+    def _disk_path(self, seeds: range, steps: int, rng: str) -> str:
+        prefix = "z" if rng == "legacy" else f"z_{rng}"
+        return os.path.join(self.disk_dir, f"{prefix}_{seeds.start}_{seeds.stop}_{steps}.npy")
+
+    def _load_or_generate(self, seeds: range, steps: int, rng: str) -> np.ndarray:
+        if not self.disk_dir:
+            return normals(seeds, steps, rng)
+        path = self._disk_path(seeds, steps, rng)
+        if not os.path.exists(path):
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            out = np.lib.format.open_memmap(tmp, mode="w+", dtype=float, shape=(steps, len(seeds)))
+            # génération par blocs de seeds pour ne jamais tenir la matrice entière en RAM
+            for c0 in range(0, len(seeds), 1024):
+                out[:, c0:c0 + 1024] = normals(seeds[c0:c0 + 1024], steps, rng)
+            out.flush()
+            del out
+            os.replace(tmp, path)
+        return np.load(path, mmap_mode="r")
+
+    def get(self, seeds: Iterable[int], steps: int, rng: str = "legacy", store: bool = True) -> np.ndarray:
+        """
+        Matrice z (steps, len(seeds)) en lecture seule, depuis le cache si possible.
+        store=False : une matrice générée n'est pas insérée (flux longs qui n'en auront pas
+        l'usage une seconde fois et évinceraient les matrices des requêtes interactives).
+        """
+        span = _as_range(seeds)
+        if span is None or steps <= 0 or len(span) == 0:
+            return normals(seeds, max(0, steps), rng)
+        with self._lock:
+            z = self._lookup(span, steps, rng)
+            if z is not None:
+                self.hits += 1
+                return z
+            self.misses += 1
+
+        z = self._load_or_generate(span, steps, rng)
+        z.flags.writeable = False
+        size = 0 if isinstance(z, np.memmap) else z.nbytes  # memmap: hors budget RAM
+        if size > self.max_bytes or not store:
+            return z
+        with self._lock:
+            key = (rng, span.start, span.stop, steps)
+            if key not in self._mem:
+                self._mem[key] = z
+                self._bytes += size
+            while (self._bytes > self.max_bytes or len(self._mem) > MAX_MATRICES) and self._mem:
+                _, old = self._mem.popitem(last=False)
+                self._bytes -= 0 if isinstance(old, np.memmap) else old.nbytes
+        return z
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "matrices": len(self._mem),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk": bool(self.disk_dir),
+            }
+
+
+SHOCK_STORE = ShockStore(
+    max_bytes=int(os.environ.get("SIM_SHOCK_MEM_BYTES", 256 * 1024 * 1024)),
+    disk_dir=os.environ.get("SIM_SHOCK_DIR") or None,
+)
@@ -0,0 +1,90 @@
+"""
+Sketch de quantiles KLL (Karnin-Lang-Liberty), fusionnable et à mémoire bornée.
+
+Mémoire O(k log(n/k)) au lieu de la liste complète ; exact tant que n reste sous la
+capacité du premier compacteur (~k), approximé ensuite (erreur de rang ~ 1/k).
+Les compactions utilisent un RNG local seedé : deux runs identiques donnent le même sketch.
+"""
+from typing import Iterable, List, Optional
+import math
+import random
+
+
+class KLLSketch:
+    def __init__(self, k: int = 200, c: float = 2.0 / 3.0, seed: int = 0):
+        self.k = max(8, int(k))
+        self.c = c
+        self.n = 0
+        self.compactors: List[List[float]] = []
+        self.size = 0
+        self.max_size = 0
+        self._rng = random.Random(seed)
+        self._grow()
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.compactors) - h - 1
+        return int(math.ceil(self.k * self.c ** depth)) + 1
+
+    def _grow(self) -> None:
+        self.compactors.append([])
+        self.max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _compact(self, h: int) -> None:
+        items = self.compactors[h]
+        items.sort()
+        # un élément sur deux (offset aléatoire) monte d'un niveau avec un poids doublé
+        keep_last = [items.pop()] if len(items) % 2 else []
+        offset = 1 if self._rng.random() < 0.5 else 0
+        self.compactors[h + 1].extend(items[offset::2])
+        self.compactors[h] = keep_last
+
+    def _compress(self) -> None:
+        while self.size >= self.max_size:
+            for h in range(len(self.compactors)):
+                if len(self.compactors[h]) >= self._capacity(h):
+                    if h + 1 >= len(self.compactors):
+                        self._grow()
+                    self._compact(h)
+                    self.size = sum(len(c) for c in self.compactors)
+                    break
+            else:
+                break
+
+    def update(self, x: float) -> None:
+        self.compactors[0].append(float(x))
+        self.size += 1
+        self.n += 1
+        if self.size >= self.max_size:
+            self._compress()
+
+    def update_many(self, xs: Iterable[float]) -> None:
+        for x in xs:
+            self.update(x)
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fusionne 'other' dans ce sketch (in place) et le retourne."""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for h, items in enumerate(other.compactors):
+            self.compactors[h].extend(items)
+        self.n += other.n
+        self.size = sum(len(c) for c in self.compactors)
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Quantile au rang round(q*(n-1)) (même convention que /simulate_mc).
+        None si le sketch est vide.
+        """
+        if self.n == 0:
+            return None
+        weighted = sorted((x, 1 << h) for h, items in enumerate(self.compactors) for x in items)
+        # les compactions conservent le poids total (= n)
+        rank = int(round(q * (self.n - 1)))
+        acc = 0
+        for x, w in weighted:
+            acc += w
+            if acc > rank:
+                return x
+        return weighted[-1][0]
@@ -0,0 +1,53 @@
+"""
+Monte Carlo en streaming (NDJSON) : un état intermédiaire toutes les 'every' runs.
+
+Les max_dd_total passent dans un sketch KLL (mémoire bornée) au lieu d'une liste
+complète ; pass_rate / pass_rate_full restent exacts à chaque étape.
+La config est résolue une fois pour tout le flux, et les chocs de chaque bloc ne sont
+pas ajoutés au SHOCK_STORE partagé (un long flux n'évince pas les /simulate_mc interactifs).
+"""
+from typing import Any, Dict, Iterator
+import json
+
+from backend.app.main import as_run_config
+from backend.app.parallel import run_mc_counts
+from backend.app.sketch import KLLSketch
+
+
+def mc_snapshot(done: int, n: int, pass_ftmo: int, pass_full: int, sketch: KLLSketch) -> Dict[str, Any]:
+    return {
+        "done": done,
+        "n": n,
+        "final": done >= n,
+        "mc": {
+            "pass_rate": pass_ftmo / max(1, done),
+            "pass_rate_full": pass_full / max(1, done),
+            "dd_p50": sketch.quantile(0.50) if done else 0.0,
+            "dd_p95": sketch.quantile(0.95) if done else 0.0,
+        },
+    }
+
+
+def iter_mc(inp) -> Iterator[Dict[str, Any]]:
+    """Génère les snapshots MC (MCStreamInput) bloc par bloc, le dernier avec final=True."""
+    every = max(1, int(inp.every))
+    sketch = KLLSketch(k=inp.sketch_k)
+    pass_ftmo = pass_full = 0
+    p = as_run_config(inp.payload)
+
+    for b0 in range(0, inp.n, every):
+        seeds = range(inp.base_seed + b0, inp.base_seed + min(b0 + every, inp.n))
+        counts = run_mc_counts(p, seeds, engine=inp.engine, workers=inp.workers,
+                               chunk_size=inp.chunk_size, store_shocks=False)
+        pass_ftmo += counts["pass_ftmo"]
+        pass_full += counts["pass_full"]
+        sketch.update_many(counts["dds"])
+        yield mc_snapshot(b0 + len(seeds), inp.n, pass_ftmo, pass_full, sketch)
+
+    if inp.n <= 0:
+        yield mc_snapshot(0, 0, 0, 0, sketch)
+
+
+def iter_mc_ndjson(inp) -> Iterator[str]:
+    for snap in iter_mc(inp):
+        yield json.dumps(snap) + "\n"
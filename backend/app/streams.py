@@ -0,0 +1,65 @@
+"""
+Flux aléatoires à compteur (Philox 4x64), sur option (rng="philox") : scalaire, kernel,
+batch, générateurs et workers les tirent tous d'ici, mais le défaut reste rng="legacy".
+
+Chaque chemin est identifié par son seed s (run k d'un MC = seed base_seed + k, comme le
+flux historique). Sa clé Philox vient de SeedSequence(s) : clés hachées, donc pas de
+corrélation entre seeds voisins, et flux disjoints par construction (clé différente).
+La clé ne dépend que de s, pas du couple (base_seed, run) : l'indépendance ne vaut qu'au
+sein d'un même base_seed. Deux MC de base_seed b et b + 1 partagent n - 1 chemins ; pour
+des lots indépendants (shards), espacer les base_seed d'au moins n.
+Les tirages sont découpés en blocs de BLOCK_STEPS pas ; le bloc b est produit par le
+compteur (0, b, 0, 0) de cette clé. Un worker régénère ainsi n'importe quel run et
+n'importe quel pas t sans tirer les précédents (bloc t // BLOCK_STEPS, puis décalage).
+
+rng="legacy" (défaut) garde le flux historique random.Random(seed).gauss (SHOCK_STORE)
+et numpy default_rng(seed) pour les profils de rendements.
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+
+RNG_KINDS = ("legacy", "philox")
+
+# Pas par bloc de compteur (granularité du saut en avant)
+BLOCK_STEPS = 256
+
+
+def stream_key(seed: Optional[int]) -> np.ndarray:
+    """
+    Clé Philox (2 x uint64) du chemin de seed 'seed' (None = entropie système).
+    Seed = base_seed + run : deux MC dont les plages de seeds se recouvrent partagent ces flux.
+    """
+    entropy = None if seed is None else seed % (1 << 64)
+    return np.random.SeedSequence(entropy).generate_state(2, dtype=np.uint64)
+
+
+def block_generator(key: np.ndarray, block: int) -> np.random.Generator:
+    """Generator positionné au début du bloc 'block' du flux de clé 'key'."""
+    counter = np.array([0, block, 0, 0], dtype=np.uint64)
+    return np.random.Generator(np.random.Philox(key=key, counter=counter))
+
+
+def block_range(steps: int, start: int = 0) -> range:
+    """Blocs couvrant les pas [start, start + steps)."""
+    if steps <= 0:
+        return range(0)
+    return range(start // BLOCK_STEPS, (start + steps - 1) // BLOCK_STEPS + 1)
+
+
+def philox_normals(seeds: Iterable[Optional[int]], steps: int, start: int = 0) -> np.ndarray:
+    """
+    Tirages N(0,1) de forme (steps, n) pour les pas [start, start + steps) ; colonne j =
+    flux du seed seeds[j], indépendant de la composition du batch et de 'start'.
+    """
+    seeds = list(seeds)
+    steps = max(0, int(steps))
+    offset = start % BLOCK_STEPS
+    blocks = block_range(steps, start)
+    z = np.empty((len(seeds), steps))
+    for j, seed in enumerate(seeds):
+        key = stream_key(seed)
+        draws = np.concatenate([block_generator(key, b).standard_normal(BLOCK_STEPS) for b in blocks]) \
+            if steps else np.empty(0)
+        z[j] = draws[offset:offset + steps]
+    return np.ascontiguousarray(z.T)
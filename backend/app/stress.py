@@ -0,0 +1,277 @@
+"""
+Matrice de stress : familles de paramètres (STRESS_PARAMS) x presets x seeds.
+
+Chaque famille est un produit cartésien de ses axes (heavy_tail : nu x p_tail x tail_mult,
+jumps, vol_clustering, ftmo_limits) appliqué à chaque preset de presets/*.json. Une tâche =
+(preset, famille) : toutes les cellules de la famille sont évaluées sur les mêmes seeds par
+simulate_points (moteur batch), les tâches tournent sur le pool de processus partagé.
+
+Résultat : une ligne par (famille, cellule, preset) avec taux de pass / violations et
+quantiles de DD, écrit en Parquet / Feather (pyarrow) ou, à défaut, en CSV.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import glob
+import copy
+import itertools
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.app.batch import simulate_points
+from backend.app.main import SimInput
+from backend.app.parallel import MAX_WORKERS, get_pool
+
+PRESETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "presets")
+
+# famille -> (base de la famille, axe -> champ SimInput ou chemin "returns.<champ>")
+FAMILIES: Dict[str, Tuple[Dict[str, Any], Dict[str, str]]] = {
+    "heavy_tail": ({"returns": {"sampler": "student_t"}},
+                   {"nu": "returns.nu", "p_tail": "returns.p_tail", "tail_mult": "returns.tail_mult"}),
+    "jumps": ({"returns": {}},
+              {"p_jump": "returns.p_jump", "jump_sigma": "returns.jump_sigma"}),
+    "vol_clustering": ({"returns": {"vol_process": "ewma"}},
+                       {"lam": "returns.ewma_lambda", "shock": "returns.shock"}),
+    "ftmo_limits": ({}, {"dd_daily": "daily_limit", "dd_total": "total_limit"}),
+}
+
+# Grille de stress par défaut : famille -> axe -> valeurs
+STRESS_PARAMS: Dict[str, Dict[str, List[Any]]] = {
+    "heavy_tail": {
+        "nu": [3, 4, 5],                  # degrés de liberté Student-t
+        "p_tail": [0.05, 0.10, 0.15],     # probabilité queue
+        "tail_mult": [2.0, 3.0, 4.0],     # multiplicateur queue
+    },
+    "jumps": {
+        "p_jump": [0.005, 0.01, 0.02],    # probabilité saut
+        "jump_sigma": [0.03, 0.04, 0.06], # volatilité saut
+    },
+    "vol_clustering": {
+        "lam": [0.90, 0.94, 0.98],        # persistance EWMA
+        "shock": [0.015, 0.02, 0.025],    # amplitude choc
+    },
+    "ftmo_limits": {
+        "dd_daily": [0.03, 0.05, 0.07],   # limites DD journalier
+        "dd_total": [0.08, 0.10, 0.12],   # limites DD total
+    },
+}
+
+# Libellés du module VolatilityTarget acceptés par l'UI (fautes de frappe comprises)
+VT_MODULES = ("VolatilityTarget", "VolatilittyTarget", "VolatitlityTarget", "volatilityTarget", "vol_target")
+
+RATE_COLUMNS = ("pass_rate", "pass_rate_full", "viol_daily_rate", "viol_total_rate")
+DD_COLUMNS = ("dd_mean", "dd_p50", "dd_p95", "dd_daily_p95")
+
+
+def default_stress_params() -> Dict[str, Dict[str, List[Any]]]:
+    """Copie de STRESS_PARAMS (modifiable par l'appelant)."""
+    return copy.deepcopy(STRESS_PARAMS)
+
+
+def _first(*values: Any) -> Any:
+    """Opérateur ?? de JS : première valeur non None."""
+    return next((v for v in values if v is not None), None)
+
+
+def _truthy(v: Any) -> bool:
+    """!!v en JS (listes / objets vides compris : vrais)."""
+    if v is None or v is False or v == "":
+        return False
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return v != 0 and not math.isnan(v)
+    return True
+
+
+def _num(v: Any, default: float) -> float:
+    """num() de toBackend.ts : nombre fini ou chaîne numérique, sinon défaut."""
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return v if math.isfinite(v) else default
+    if isinstance(v, str) and v.strip():
+        try:
+            x = float(v)
+        except ValueError:
+            return default
+        return x if math.isfinite(x) else default
+    return default
+
+
+def preset_input(d: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Preset (format UI, modules.*) -> payload SimInput, même correspondance que
+    app/api/_lib/toBackend.ts : KellyCap actif s'il est présent, VolatilityTarget s'il est
+    non vide (sauf 'enabled' explicite), CPPIFreeze et SoftBarrier seulement avec
+    'enabled' vrai ; clés lues : KellyCap.cap_mult|cap, VT target|target_vol et halflife,
+    CPPIFreeze alpha et freeze, SoftBarrier.threshold, FTMOGate daily_limit / total_limit /
+    spend_rate. Un payload déjà au format backend (use_*) est repris tel quel.
+    """
+    if any(k in d for k in ("use_kelly_cap", "use_vt", "use_cppi")):
+        return {k: v for k, v in d.items() if k in SimInput.model_fields}
+    m = d.get("modules") or {}
+    kc = m.get("KellyCap") or {}
+    vt = _first(*(m.get(name) for name in VT_MODULES)) or {}
+    cf = m.get("CPPIFreeze") or {}
+    sb = m.get("SoftBarrier") or {}
+    fg = m.get("FTMOGate") or {}
+    return {
+        "seed": d.get("seed"),
+        "total_steps": _num(d.get("total_steps"), 500),
+        "steps_per_day": _num(d.get("steps_per_day"), 50),
+        "mu": _num(d.get("mu"), 0.0),
+        "sigma": _num(d.get("sigma"), 0.02),
+        "fees_per_trade": _num(d.get("fees_per_trade"), 0),
+
+        "use_kelly_cap": _truthy(kc["enabled"]) if "enabled" in kc else m.get("KellyCap") is not None,
+        "kelly_cap": _num(_first(kc.get("cap_mult"), kc.get("cap"), d.get("kelly_cap")), 0.10),
+
+        "use_vt": _truthy(vt["enabled"]) if "enabled" in vt else len(vt) > 0,
+        "vt_target_vol": _num(_first(vt.get("target"), vt.get("target_vol")), 0.10),
+        "vt_halflife": _num(vt.get("halflife"), 20),
+
+        "use_cppi": _truthy(cf.get("enabled")),
+        "cppi_alpha": _num(cf.get("alpha"), 0.10),
+        "cppi_freeze_frac": _num(cf.get("freeze"), 0.05),
+
+        "use_soft_barrier": _truthy(sb.get("enabled")),
+        "soft_barrier": _num(sb.get("threshold"), 0.02),
+
+        "daily_limit": _num(fg.get("daily_limit"), 0.05),
+        "total_limit": _num(fg.get("total_limit"), 0.10),
+        "spend_rate": _num(fg.get("spend_rate"), 1.0),
+
+        "target_profit": _num(d.get("target_profit"), 0.10),
+        "max_days": _num(d.get("max_days"), 30),
+    }
+
+
+def load_presets(directory: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Presets nommés de presets/*.json (fichiers avec 'modules' ; profiles.json exclu)."""
+    out = {}
+    for path in sorted(glob.glob(os.path.join(directory or PRESETS_DIR, "*.json"))):
+        with open(path, "r", encoding="utf-8") as fh:
+            d = json.load(fh)
+        if isinstance(d, dict) and "modules" in d:
+            out[d.get("name") or os.path.splitext(os.path.basename(path))[0]] = d
+    return out
+
+
+def expand_family(axes: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[n] for n in names))]
+
+
+def cell_input(preset: Dict[str, Any], family: str, cell: Dict[str, Any], steps: Optional[int]) -> SimInput:
+    base, paths = FAMILIES[family]
+    d = preset_input(preset)
+    for key, value in base.items():
+        d[key] = dict(value)
+    if steps:
+        d["total_steps"] = int(steps)
+    for axis, value in cell.items():
+        parts = paths[axis].split(".")
+        if len(parts) == 1:
+            d[parts[0]] = value
+        else:
+            d.setdefault(parts[0], {})[parts[1]] = value
+    return SimInput(**d)
+
+
+def _cell_row(res: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    n = len(res["max_dd_total"])
+    dd = res["max_dd_total"]
+    ok = (res["violations_daily"] == 0) & (res["violations_total"] == 0)
+    return {
+        "pass_rate": float(ok.mean()) if n else 0.0,
+        "pass_rate_full": float(res["target_pass"].mean()) if n else 0.0,
+        "viol_daily_rate": float((res["violations_daily"] > 0).mean()) if n else 0.0,
+        "viol_total_rate": float((res["violations_total"] > 0).mean()) if n else 0.0,
+        "dd_mean": float(dd.mean()) if n else 0.0,
+        "dd_p50": float(np.quantile(dd, 0.50)) if n else 0.0,
+        "dd_p95": float(np.quantile(dd, 0.95)) if n else 0.0,
+        "dd_daily_p95": float(np.quantile(res["max_dd_daily"], 0.95)) if n else 0.0,
+    }
+
+
+def run_task(preset_name: str, preset: Dict[str, Any], family: str, cells: List[Dict[str, Any]],
+             seeds: Sequence[int], steps: Optional[int]) -> List[Dict[str, Any]]:
+    """Toutes les cellules d'une famille pour un preset (tâche exécutable dans un worker)."""
+    t0 = time.perf_counter()
+    ps = [cell_input(preset, family, cell, steps) for cell in cells]
+    results = simulate_points(ps, seeds)
+    elapsed = (time.perf_counter() - t0) / max(1, len(cells))
+    rows = []
+    for cell, p, res in zip(cells, ps, results):
+        rows.append({
+            "family": family,
+            "cell": ",".join(f"{k}={v}" for k, v in cell.items()),
+            "preset": preset_name,
+            **cell,
+            "n": len(seeds),
+            "base_seed": seeds[0] if len(seeds) else 0,
+            "steps": p.total_steps,
+            **_cell_row(res),
+            "seconds": elapsed,
+        })
+    return rows
+
+
+def run_stress(presets: Dict[str, Dict[str, Any]], params: Dict[str, Dict[str, List[Any]]], n: int,
+               base_seed: int = 0, steps: Optional[int] = None, workers: int = 1,
+               families: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Exécute la matrice familles x cellules x presets sur n seeds contigus ; une ligne par cellule."""
+    families = list(families or [f for f in params if f in FAMILIES])
+    unknown = [f for f in families if f not in FAMILIES]
+    if unknown:
+        raise ValueError(f"famille inconnue: {unknown} (connues: {sorted(FAMILIES)})")
+    seeds = range(base_seed, base_seed + n)
+    tasks = [(name, preset, family, expand_family(params[family]), seeds, steps)
+             for name, preset in presets.items() for family in families]
+
+    workers = max(1, min(int(workers or 1), MAX_WORKERS))
+    if workers == 1 or len(tasks) <= 1:
+        rows = [row for task in tasks for row in run_task(*task)]
+    else:
+        pool = get_pool(workers)
+        futures = [pool.submit(run_task, *task) for task in tasks]
+        rows = [row for fut in futures for row in fut.result()]
+    return pd.DataFrame(rows)
+
+
+def write_results(df: pd.DataFrame, path: str) -> str:
+    """Écrit en .parquet / .feather (pyarrow requis) ; repli CSV si indisponible. Retourne le chemin écrit."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    root, ext = os.path.splitext(path)
+    try:
+        if ext == ".parquet":
+            df.to_parquet(path, index=False)
+            return path
+        if ext == ".feather":
+            df.reset_index(drop=True).to_feather(path)
+            return path
+    except ImportError:
+        path = root + ".csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def read_results(path: str) -> pd.DataFrame:
+    root, ext = os.path.splitext(path)
+    if not os.path.exists(path) and os.path.exists(root + ".csv"):
+        ext, path = ".csv", root + ".csv"  # écrit en repli CSV
+    if ext == ".parquet":
+        return pd.read_parquet(path)
+    if ext == ".feather":
+        return pd.read_feather(path)
+    return pd.read_csv(path)
+
+
+def summarize(df: pd.DataFrame, by: Sequence[str] = ("family", "cell"), where: Optional[str] = None) -> pd.DataFrame:
+    """Taux de pass / violations et DD moyens par groupe ('where' : expression DataFrame.query)."""
+    if where:
+        df = df.query(where)
+    cols = [c for c in RATE_COLUMNS + DD_COLUMNS if c in df.columns]
+    out = df.groupby(list(by), sort=True)[cols].mean()
+    out["cells"] = df.groupby(list(by), sort=True).size()
+    return out.reset_index()
@@ -0,0 +1,139 @@
+"""
+Grid search côté serveur : expansion des plages (chemins pointés comme SearchConfig de
+la page optimize), évaluation MC de chaque point sur les mêmes seeds (nombres aléatoires
+communs) avec le moteur batch, puis classement top-K.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import itertools
+import math
+
+import numpy as np
+
+from backend.app.main import MODULE_FIELDS, SimInput, mc_stats
+from backend.app.batch import mc_counts, simulate_points
+from backend.app.parallel import MAX_WORKERS, get_pool
+from backend.app.shocks import SHOCK_STORE
+
+# objectif -> (clé de tri principale, True si plus grand = meilleur)
+OBJECTIVES = {
+    "pass_rate_full": ("pass_rate_full", True),
+    "pass_rate": ("pass_rate", True),
+    "dd_p95": ("dd_p95", False),
+    "dd_p50": ("dd_p50", False),
+}
+
+
+def expand_range(spec: Any) -> List[Any]:
+    """{min, max, step} -> valeurs (bornes incluses, sans dérive flottante) ; une liste est prise telle quelle."""
+    if isinstance(spec, (list, tuple)):
+        return list(spec)
+    if not isinstance(spec, dict) or "min" not in spec:
+        return [spec]
+    lo = float(spec["min"])
+    hi = float(spec.get("max", lo))
+    step = float(spec.get("step", 0.0) or 0.0)
+    if step <= 0.0 or hi <= lo:
+        return [lo]
+    count = int(math.floor((hi - lo) / step + 1e-9)) + 1
+    return [round(lo + i * step, 12) for i in range(count)]
+
+
+def check_path(path: str) -> None:
+    parts = path.split(".")
+    if len(parts) == 1 and parts[0] in SimInput.model_fields and parts[0] not in ("modules", "seed", "rng"):
+        return
+    if len(parts) == 3 and parts[0] == "modules" and (parts[1], parts[2]) in MODULE_FIELDS:
+        return
+    known = sorted(f"modules.{m}.{k}" for m, k in MODULE_FIELDS)
+    raise ValueError(f"chemin non supporté: {path!r} (champ SimInput ou l'un de {known})")
+
+
+def expand_grid(ranges: Dict[str, Any], max_points: int) -> List[Dict[str, Any]]:
+    """Produit cartésien des plages -> liste de points {chemin: valeur}."""
+    for path in ranges:
+        check_path(path)
+    paths = list(ranges)
+    axes = [expand_range(ranges[path]) for path in paths]
+    total = math.prod(len(axis) for axis in axes)
+    if total > max_points:
+        raise ValueError(f"grille trop grande: {total} points (max_points={max_points})")
+    return [dict(zip(paths, values)) for values in itertools.product(*axes)]
+
+
+def apply_point(base: Dict[str, Any], point: Dict[str, Any]) -> SimInput:
+    d = dict(base)
+    d["modules"] = {name: dict(cfg) for name, cfg in (base.get("modules") or {}).items()}
+    for path, value in point.items():
+        parts = path.split(".")
+        if parts[0] == "modules":
+            d["modules"].setdefault(parts[1], {})[parts[2]] = value
+        else:
+            d[parts[0]] = value
+    return SimInput(**d)
+
+
+def evaluate_points(ps: List[SimInput], seeds: Sequence[int], z: np.ndarray) -> List[Dict[str, Any]]:
+    """Stats MC de chaque config (tâche exécutable dans un worker)."""
+    out = []
+    for res in simulate_points(ps, seeds, z=z):
+        c = mc_counts(res)
+        out.append(mc_stats(c["pass_ftmo"], c["pass_full"], c["dds"], len(seeds)))
+    return out
+
+
+def rank(rows: List[Dict[str, Any]], objective: str) -> List[Dict[str, Any]]:
+    key, higher_better = OBJECTIVES[objective]
+    sign = -1.0 if higher_better else 1.0
+    # départage : pass_rate_full, pass_rate, dd_p95
+    return sorted(rows, key=lambda r: (sign * r["mc"][key], -r["mc"]["pass_rate_full"],
+                                       -r["mc"]["pass_rate"], r["mc"]["dd_p95"]))
+
+
+def _evaluate(ps: List[SimInput], seeds: Sequence[int], z: np.ndarray, workers: int) -> List[Dict[str, Any]]:
+    if workers == 1 or len(ps) <= 1:
+        return evaluate_points(ps, seeds, z)
+    size = -(-len(ps) // workers)
+    pool = get_pool(workers)
+    futures = [pool.submit(evaluate_points, ps[i:i + size], seeds, z) for i in range(0, len(ps), size)]
+    return [row for fut in futures for row in fut.result()]
+
+
+def iter_sweep(base: SimInput, ranges: Dict[str, Any], n: int, base_seed: int, objective: str = "pass_rate_full",
+               top_k: int = 10, workers: int = 1, max_points: int = 20000,
+               block_points: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Évalue la grille par blocs de 'block_points' points (tout d'un coup si None) et
+    produit (points évalués, classement partiel) après chaque bloc ; le dernier est final.
+    """
+    points = expand_grid(ranges, max_points)
+    base_dict = base.model_dump()
+    ps = [apply_point(base_dict, pt) for pt in points]
+
+    seeds = range(base_seed, base_seed + n)
+    # tirages communs à tous les points (préfixe pour les total_steps plus courts)
+    z = SHOCK_STORE.get(seeds, max((p.total_steps for p in ps), default=0), base.rng)
+
+    workers = max(1, min(int(workers or 1), MAX_WORKERS))
+    block = max(1, int(block_points or len(ps) or 1))
+    rows: List[Dict[str, Any]] = []
+    for b0 in range(0, max(1, len(ps)), block):
+        stats = _evaluate(ps[b0:b0 + block], seeds, z, workers)
+        rows.extend({"params": pt, "mc": st} for pt, st in zip(points[b0:b0 + block], stats))
+        top = [dict(row) for row in rank(rows, objective)[:max(0, int(top_k))]]
+        for i, row in enumerate(top, start=1):
+            row["rank"] = i
+        yield len(rows), {
+            "n_points": len(points),
+            "n_paths": n,
+            "base_seed": base_seed,
+            "objective": objective,
+            "top": top,
+        }
+
+
+def run_sweep(base: SimInput, ranges: Dict[str, Any], n: int, base_seed: int, objective: str = "pass_rate_full",
+              top_k: int = 10, workers: int = 1, max_points: int = 20000) -> Dict[str, Any]:
+    result = None
+    for _, result in iter_sweep(base, ranges, n, base_seed, objective, top_k, workers, max_points):
+        pass
+    return result
@@ -0,0 +1,271 @@
+"""
+Instrumentation opt-in du pipeline de simulation : temps par étape, histogrammes, profils.
+
+- Activation par requête : ?timing=true ou en-tête X-Sim-Timing: 1 (SIM_TIMING=1 : toutes).
+  Les étapes (parse, cache_key, resolve, shocks, loop, kpis, mc, mc_stats, downsample,
+  encode) sont chronométrées en temps mur et CPU du thread ; diag.timings les reprend
+  (sauf encode, mesuré après coup) et l'en-tête Server-Timing les donne toutes.
+  'loop' inclut l'accumulation en ligne des KPIs (KpiAccumulator.push, ou sa copie dans
+  le noyau compilé) ; 'kpis' est la clôture.
+- /metrics : histogrammes Prometheus (format texte) des étapes instrumentées et de la
+  durée de chaque requête /simulate et /simulate_mc.
+- Profil : ?profile=true ou X-Sim-Profile: 1, seulement si SIM_PROFILE_DIR est défini ;
+  cProfile (.prof) ou pyinstrument (.html, si installé et profile=pyinstrument), nommé
+  d'après X-Request-ID (ou un id généré) et retourné dans diag.profile.
+
+Le code de simulation appelle stage(nom) : sans timer actif (cas par défaut) c'est un
+nullcontext, le coût est une lecture de ContextVar par étape.
+"""
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import bisect
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+_TIMER: "ContextVar[Optional[StageTimer]]" = ContextVar("sim_stage_timer", default=None)
+
+TIMING_ALL = os.environ.get("SIM_TIMING", "").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.environ.get("SIM_PROFILE_DIR") or None
+
+# Bornes des histogrammes (secondes)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class StageTimer:
+    """Temps cumulés par étape (une étape peut être traversée plusieurs fois)."""
+
+    def __init__(self):
+        self.stages: Dict[str, List[Optional[float]]] = {}   # nom -> [mur s, cpu s (None si inconnu)]
+
+    def add(self, name: str, wall: float, cpu: Optional[float]) -> None:
+        acc = self.stages.setdefault(name, [0.0, 0.0 if cpu is not None else None])
+        acc[0] += wall
+        if cpu is not None and acc[1] is not None:
+            acc[1] += cpu
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        w0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - w0, time.thread_time() - c0)
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {name: {"wall_ms": w * 1e3, "cpu_ms": None if c is None else c * 1e3}
+                for name, (w, c) in self.stages.items()}
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={w * 1e3:.3f}" for name, (w, _) in self.stages.items())
+
+
+class RequestStart:
+    """Middleware ASGI : horodate l'arrivée (scope['sim_t0']) pour l'étape 'parse'."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        scope["sim_t0"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+
+def stage(name: str):
+    """Chronomètre 'name' si un timer est actif dans le contexte courant."""
+    timer = _TIMER.get()
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+@contextmanager
+def activate(timer: Optional[StageTimer]) -> Iterator[Optional[StageTimer]]:
+    token = _TIMER.set(timer)
+    try:
+        yield timer
+    finally:
+        _TIMER.reset(token)
+
+
+class RequestInstrumentation:
+    """
+    Instrumentation d'une requête : timer actif dans le contexte (with), profil optionnel,
+    annotation de diag et encodage chronométré ; la durée totale alimente /metrics.
+    """
+
+    def __init__(self, request, endpoint: str, timing: bool = False, profile: Optional[str] = None):
+        self.endpoint = endpoint
+        self.t_enter = time.perf_counter()
+        # request None : appel direct (hors HTTP), sans en-têtes ni horodatage d'arrivée
+        self.t0 = request.scope.get("sim_t0", self.t_enter) if request is not None else self.t_enter
+        headers = request.headers if request is not None else {}
+        self.timer = StageTimer() if wants_timing(timing, headers.get("x-sim-timing")) else None
+        if self.timer is not None:
+            self.timer.add("parse", self.t_enter - self.t0, None)  # lecture du body + validation Pydantic
+        self.profile_kind = wants_profile(profile, headers.get("x-sim-profile"))
+        self.request_id = headers.get("x-request-id")
+        self.profile: Optional[Dict[str, Any]] = None
+        self._token = None
+
+    def __enter__(self) -> "RequestInstrumentation":
+        self._token = _TIMER.set(self.timer)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _TIMER.reset(self._token)
+        record(self.endpoint, self.timer, time.perf_counter() - self.t0)
+
+    def run(self, fn: Callable[[], Any]) -> Any:
+        if self.profile_kind is None:
+            return fn()
+        out, self.profile = profile_call(fn, self.profile_kind, self.request_id)
+        return out
+
+    def annotate(self, out: Dict[str, Any]) -> Dict[str, Any]:
+        """Copie de 'out' avec diag.timings / diag.profile (le résultat peut venir du cache : pas de mutation)."""
+        if self.timer is None and self.profile is None:
+            return out
+        diag = dict(out.get("diag") or {})
+        if self.timer is not None:
+            diag["timings"] = self.timer.as_dict()
+        if self.profile is not None:
+            diag["profile"] = self.profile
+        return {**out, "diag": diag}
+
+    def respond(self, out: Dict[str, Any], encode: Optional[Callable[[Dict[str, Any]], bytes]] = None,
+                media_type: str = "application/json"):
+        """
+        Sans timer ni encodeur : 'out' tel quel (encodé par FastAPI). Sinon encode ici
+        (JSON comme FastAPI : jsonable_encoder + json.dumps) dans l'étape 'encode' et
+        ajoute l'en-tête Server-Timing.
+        """
+        if self.timer is None and encode is None:
+            return out
+        from fastapi.responses import Response
+        with stage("encode"):
+            if encode is not None:
+                content = encode(out)
+            else:
+                from fastapi.encoders import jsonable_encoder
+                content = json.dumps(jsonable_encoder(out), ensure_ascii=False, allow_nan=False,
+                                     separators=(",", ":")).encode("utf-8")
+        headers = {"Server-Timing": self.timer.server_timing()} if self.timer is not None else None
+        return Response(content=content, media_type=media_type, headers=headers)
+
+
+def _flag(value: Optional[str]) -> bool:
+    return (value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def wants_timing(query_flag: bool, header: Optional[str]) -> bool:
+    return TIMING_ALL or query_flag or _flag(header)
+
+
+# -----------------------------
+# Histogrammes Prometheus
+# -----------------------------
+class Histogram:
+    def __init__(self, name: str, doc: str, labels: Tuple[str, ...], buckets=BUCKETS):
+        self.name, self.doc, self.labels, self.buckets = name, doc, labels, tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}   # labels -> [compte par bucket..., +Inf, somme]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._series.get(label_values)
+            if row is None:
+                row = self._series[label_values] = [0.0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+        for values, row in items:
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values))
+            sep = "," if base else ""
+            cum = 0.0
+            for le, count in zip(self.buckets + ("+Inf",), row[:-1]):
+                cum += count
+                le = le if isinstance(le, str) else repr(le)
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{le}"}} {int(cum)}')
+            lines.append(f"{self.name}_sum{{{base}}} {row[-1]!r}")
+            lines.append(f"{self.name}_count{{{base}}} {int(cum)}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(v: str) -> str:
+    return re.sub(r'(["\\])', r"\\\1", str(v)).replace("\n", "\\n")
+
+
+STAGE_WALL = Histogram("sim_stage_seconds", "Durée murale par étape (requêtes instrumentées)", ("endpoint", "stage"))
+STAGE_CPU = Histogram("sim_stage_cpu_seconds", "Temps CPU du thread par étape (requêtes instrumentées)",
+                      ("endpoint", "stage"))
+REQUESTS = Histogram("sim_request_seconds", "Durée des requêtes de simulation", ("endpoint",))
+
+
+def record(endpoint: str, timer: Optional[StageTimer], total: float) -> None:
+    REQUESTS.observe(total, endpoint)
+    if timer is not None:
+        for name, (wall, cpu) in timer.stages.items():
+            STAGE_WALL.observe(wall, endpoint, name)
+            if cpu is not None:
+                STAGE_CPU.observe(cpu, endpoint, name)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for hist in (REQUESTS, STAGE_WALL, STAGE_CPU):
+        lines.extend(hist.render())
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------
+# Profils (cProfile / pyinstrument)
+# -----------------------------
+def wants_profile(query_flag: Optional[str], header: Optional[str]) -> Optional[str]:
+    """'cprofile' / 'pyinstrument' si demandé et SIM_PROFILE_DIR défini, sinon None."""
+    kind = (query_flag or header or "").strip().lower()
+    if PROFILE_DIR is None or not kind or kind in ("0", "false", "no", "off"):
+        return None
+    return "pyinstrument" if kind == "pyinstrument" else "cprofile"
+
+
+def profile_call(fn: Callable[[], Any], kind: str, request_id: Optional[str]) -> Tuple[Any, Dict[str, Any]]:
+    """Exécute fn sous profileur ; retourne (résultat, {request_id, kind, path})."""
+    request_id = re.sub(r"[^A-Za-z0-9_.-]", "_", request_id or uuid.uuid4().hex)[:64]
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            kind = "cprofile"
+        else:
+            prof = Profiler()
+            prof.start()
+            try:
+                out = fn()
+            finally:
+                prof.stop()
+            path = os.path.join(PROFILE_DIR, f"{request_id}.html")
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(prof.output_html())
+            return out, {"request_id": request_id, "kind": kind, "path": path}
+
+    import cProfile
+    prof = cProfile.Profile()
+    try:
+        out = prof.runcall(fn)
+    finally:
+        path = os.path.join(PROFILE_DIR, f"{request_id}.prof")
+        prof.dump_stats(path)
+    return out, {"request_id": request_id, "kind": "cprofile", "path": path}
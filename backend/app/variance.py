@@ -0,0 +1,255 @@
+"""
+Réduction de variance pour /simulate_mc (MCInput.variance, moteur batch).
+
+Tirages des chocs z ~ N(0,1) (method) :
+- "none"       : flux habituels des seeds base_seed.. (estimation groupée = MC classique)
+- "antithetic" : paires (z, -z) ; un seed pour deux chemins
+- "sobol"      : Sobol brouillé (scipy.stats.qmc), une dimension par pas, z = Phi^-1(u)
+- "lhs"        : hypercube latin (stratification de chaque pas)
+
+Variables de contrôle (control_variate) : chemins non protégés à exposition constante
+f_c, f_c/2, f_c/4, f_c/8 (f_c = exposition initiale de la stratégie : min(VT, KellyCap)
+x spend_rate, sans CPPI ni SoftBarrier) sur les mêmes chocs. Estimateur
+theta = mean(X) - beta . (mean(Y) - mu_Y), beta par moindres carrés, appliqué à
+pass_rate et pass_rate_full ; dd_p95 profite seulement des tirages.
+- contrôles exacts (toujours) : somme des chocs, somme des carrés, équité finale et
+  équité moyenne de chaque exposition ; moyennes connues ((1 + f mu)^t par indépendance),
+  aucun pilote.
+- contrôles DD / pass FTMO / pass complet de chaque exposition (control_pilot > 0) :
+  plus corrélés au pass mais sans moyenne analytique ; estimée sur ceil(control_pilot x n)
+  chemins indépendants. Un chemin de contrôle coûte à peu près un chemin du moteur
+  batch : le pilote ajoute ~control_pilot fois le coût du run principal
+  (control.pilot_paths et control.pilot_seconds dans la réponse).
+
+Erreur standard : les n chemins sont répartis en 'replicates' groupes indépendants
+(paires antithétiques dans un même groupe, un brouillage Sobol / LHS par groupe) ;
+SE = écart-type des estimations par groupe / sqrt(R) (+ beta' Cov(Y) beta / pilot_paths
+pour les contrôles estimés sur le pilote). ESS = taille d'un MC classique de même précision : p(1-p)/SE^2
+pour un taux ; pour dd_p95, même calcul sur la fonction de répartition au quantile.
+"""
+from typing import Any, Dict, List, Optional
+import math
+import time
+import warnings
+
+import numpy as np
+
+from backend.app.batch import DEFAULT_CHUNK_PATHS, _simulate_chunk, mc_counts
+from backend.app.main import RunConfig, as_run_config, mc_quantile, mc_stats, safe_num
+from backend.app.shocks import SHOCK_STORE
+
+METHODS = ("none", "antithetic", "sobol", "lhs")
+RATES = ("pass_rate", "pass_rate_full")
+# Expositions du contrôle : f_c, f_c/2, ... (plusieurs échelles de risque)
+CONTROL_RUNGS = 4
+
+
+def group_sizes(n: int, replicates: int) -> List[int]:
+    r = max(1, min(int(replicates), n))
+    return [len(part) for part in np.array_split(np.arange(n), r)] if n else []
+
+
+def _qmc_normals(method: str, steps: int, m: int, seed: np.random.SeedSequence) -> np.ndarray:
+    from scipy.stats import norm, qmc
+    if method == "sobol":
+        if steps > qmc.Sobol.MAXDIM:
+            raise ValueError(f"sobol: total_steps <= {qmc.Sobol.MAXDIM} requis")
+        sampler = qmc.Sobol(d=steps, scramble=True, seed=np.random.default_rng(seed))
+    else:
+        sampler = qmc.LatinHypercube(d=steps, seed=np.random.default_rng(seed))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # Sobol : m non puissance de 2 (équilibre partiel)
+        u = sampler.random(m)
+    u = np.clip(u, 1e-12, 1.0 - 1e-12)
+    return np.ascontiguousarray(norm.ppf(u).T)
+
+
+def group_shocks(p: RunConfig, method: str, base_seed: int, sizes: List[int]) -> List[np.ndarray]:
+    """Chocs z (steps, m) de chaque groupe ; groupes indépendants entre eux."""
+    out = []
+    seed = base_seed
+    for g, m in enumerate(sizes):
+        if method == "none":
+            out.append(SHOCK_STORE.get(range(seed, seed + m), p.total_steps, p.rng))
+            seed += m
+        elif method == "antithetic":
+            h = (m + 1) // 2
+            z = SHOCK_STORE.get(range(seed, seed + h), p.total_steps, p.rng)
+            out.append(np.concatenate([z, -z], axis=1)[:, :m])
+            seed += h
+        else:
+            out.append(_qmc_normals(method, p.total_steps, m, np.random.SeedSequence([base_seed % (1 << 63), g])))
+    return out
+
+
+def control_exposure(p: RunConfig) -> float:
+    """Exposition initiale de la stratégie (sizers actifs x spend_rate), bornée à [0, 1]."""
+    sizes = []
+    if p.use_vt:
+        sizes.append(p.vt_target_vol / max(1e-8, p.sigma))
+    if p.use_kelly_cap:
+        sizes.append(p.kelly_cap)
+    if not sizes:
+        return 0.0
+    return max(0.0, min(1.0, min(sizes) * p.spend_rate))
+
+
+def exact_controls(p: RunConfig, z: np.ndarray, f: float) -> np.ndarray:
+    """
+    Contrôles (n, 2 + 2 x CONTROL_RUNGS) de moyenne connue, déjà centrés : somme et somme
+    des carrés des chocs, équité finale et équité moyenne aux expositions f, f/2, f/4, f/8.
+    """
+    T = z.shape[0]
+    cols = [z.sum(axis=0) / math.sqrt(max(1, T)), ((z * z).sum(axis=0) - T) / math.sqrt(max(1, 2 * T))]
+    base_r = p.mu + z * p.sigma
+    for k in range(CONTROL_RUNGS):
+        fk = f / (1 << k)
+        equity = np.cumprod(1.0 + fk * base_r, axis=0)
+        growth = (1.0 + fk * p.mu) ** np.arange(1, T + 1)   # E[équité_t], pas indépendants
+        cols += [equity[-1] - growth[-1], equity.mean(axis=0) - growth.mean()]
+    return np.column_stack(cols).astype(float)
+
+
+def ladder_controls(p: RunConfig, z: np.ndarray, f: float) -> np.ndarray:
+    """
+    Contrôles (n, 3 x CONTROL_RUNGS) des chemins non protégés à expositions constantes
+    f, f/2, f/4, f/8 : DD total, pass FTMO et pass complet (moyennes à estimer).
+    """
+    T, n = z.shape
+    spd = p.steps_per_day if p.steps_per_day > 0 else T + 1
+    days = -(-(T + 1) // spd)
+    base_r = p.mu + z * p.sigma
+    cols = []
+    equity = np.empty((T + 1, n))
+    padded = np.full((days * spd, n), np.inf)
+    for k in range(CONTROL_RUNGS):
+        equity[0] = 1.0
+        np.cumprod(1.0 + (f / (1 << k)) * base_r, axis=0, out=equity[1:])
+        np.maximum(equity, 1e-9, out=equity)
+        hwm = np.maximum.accumulate(equity, axis=0)
+        total_ok = ~(equity < hwm * (1.0 - p.total_limit)).any(axis=0)
+        padded[:T + 1] = equity
+        windows = padded.reshape(days, spd, n)
+        daily_ok = ~(windows.min(axis=1) < windows[:, 0, :] * (1.0 - p.daily_limit)).any(axis=0)
+        pass_ftmo = total_ok & daily_ok
+        crossed = equity >= 1.0 + p.target_profit
+        first = np.where(crossed.any(axis=0), crossed.argmax(axis=0), -1)
+        if p.steps_per_day > 0:
+            in_time = (first >= 0) & (np.ceil(first / p.steps_per_day) <= p.max_days)
+        else:
+            in_time = np.zeros(n, dtype=bool)
+        cols += [((hwm - equity) / hwm).max(axis=0), pass_ftmo, pass_ftmo & in_time]
+    return np.column_stack(cols).astype(float)
+
+
+def control_moments(p: RunConfig, f: float, paths: int, base_seed: int):
+    """Moyenne et covariance des contrôles DD / pass sur 'paths' chemins i.i.d. hors de l'échantillon principal."""
+    rng = np.random.default_rng(np.random.SeedSequence([base_seed % (1 << 63), 1 << 32]))
+    feats = [ladder_controls(p, rng.standard_normal((p.total_steps, min(DEFAULT_CHUNK_PATHS, paths - c0))), f)
+             for c0 in range(0, paths, DEFAULT_CHUNK_PATHS)]
+    y = np.concatenate(feats)
+    return y.mean(axis=0), np.atleast_2d(np.cov(y, rowvar=False))
+
+
+def cv_beta(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Coefficients des contrôles (moindres carrés sur données centrées) ; 0 pour un contrôle constant."""
+    beta = np.zeros(y.shape[1])
+    keep = y.std(axis=0) > 0
+    if keep.any() and x.std() > 0:
+        yc = y[:, keep] - y[:, keep].mean(axis=0)
+        beta[keep] = np.linalg.lstsq(yc, x - x.mean(), rcond=None)[0]
+    return beta
+
+
+def _se(estimates: List[float]) -> float:
+    r = len(estimates)
+    return float(np.std(estimates, ddof=1) / math.sqrt(r)) if r > 1 else float("nan")
+
+
+def _ess(var_iid: float, se: float) -> Optional[float]:
+    return safe_num(var_iid / (se * se)) if se > 0 else None
+
+
+def run_variance_mc(payload, n: int, base_seed: int, spec) -> Dict[str, Any]:
+    """'spec' : VarianceMC (method, control_variate, replicates, control_pilot)."""
+    p = as_run_config(payload)
+    if p.returns is not None:
+        raise ValueError("réduction de variance : chocs gaussiens uniquement (pas de profil 'returns')")
+    sizes = group_sizes(n, spec.replicates)
+    shocks = group_shocks(p, spec.method, base_seed, sizes)
+
+    groups = []
+    for z in shocks:
+        parts = [_simulate_chunk(p, z[:, c0:c0 + DEFAULT_CHUNK_PATHS], False)
+                 for c0 in range(0, z.shape[1], DEFAULT_CHUNK_PATHS)]
+        res = {k: np.concatenate([part[k] for part in parts]) for k in ("violations_daily", "violations_total",
+                                                                        "target_pass", "max_dd_total")}
+        x = {"pass_rate": ((res["violations_daily"] == 0) & (res["violations_total"] == 0)).astype(float),
+             "pass_rate_full": res["target_pass"].astype(float)}
+        groups.append({"res": res, "x": x, "z": z})
+
+    counts = mc_counts({k: np.concatenate([g["res"][k] for g in groups]) if groups else np.empty(0)
+                        for k in ("violations_daily", "violations_total", "target_pass", "max_dd_total")})
+    stats = mc_stats(counts["pass_ftmo"], counts["pass_full"], counts["dds"], n)
+    x_all = {name: np.concatenate([g["x"][name] for g in groups]) if groups else np.empty(0) for name in RATES}
+
+    # variables de contrôle
+    f_c = control_exposure(p)
+    use_cv = bool(spec.control_variate) and f_c > 0.0 and n > 1
+    pilot = int(math.ceil(spec.control_pilot * n)) if use_cv else 0
+    pilot = pilot if pilot > 1 else 0
+    control: Dict[str, Any] = {"enabled": use_cv, "exposure": f_c, "pilot_paths": pilot}
+    beta = {}
+    if use_cv:
+        for g in groups:
+            g["y"] = exact_controls(p, g["z"], f_c)
+            if pilot:
+                g["y"] = np.hstack([g["y"], ladder_controls(p, g["z"], f_c)])
+        y_all = np.concatenate([g["y"] for g in groups])
+        n_exact = y_all.shape[1] - (3 * CONTROL_RUNGS if pilot else 0)
+        mu_y = np.zeros(y_all.shape[1])
+        if pilot:
+            t0 = time.perf_counter()
+            mu_y[n_exact:], cov_p = control_moments(p, f_c, pilot, base_seed)
+            control["pilot_seconds"] = time.perf_counter() - t0
+        for name in RATES:
+            beta[name] = cv_beta(x_all[name], y_all)
+            adj = float(x_all[name].mean() - beta[name] @ (y_all.mean(axis=0) - mu_y))
+            stats[name] = min(1.0, max(0.0, adj))
+        control.update(controls=int(y_all.shape[1]), exact=n_exact)
+
+    se: Dict[str, Optional[float]] = {}
+    ess: Dict[str, Optional[float]] = {}
+    for name in RATES:
+        est = []
+        for g in groups:
+            val = float(g["x"][name].mean())
+            if use_cv:
+                val -= float(beta[name] @ (g["y"].mean(axis=0) - mu_y))
+            est.append(val)
+        s = _se(est)
+        if pilot:
+            # incertitude sur la moyenne des contrôles estimés (échantillon pilote indépendant)
+            b = beta[name][n_exact:]
+            s = math.sqrt(s * s + float(b @ cov_p @ b) / pilot)
+        se[name] = safe_num(s)
+        ess[name] = _ess(stats[name] * (1.0 - stats[name]), s)
+
+    q = stats["dd_p95"]
+    dd_groups = [np.sort(g["res"]["max_dd_total"]) for g in groups]
+    se["dd_p95"] = safe_num(_se([mc_quantile(d.tolist(), 0.95) for d in dd_groups]))
+    cdf = [float((d <= q).mean()) for d in dd_groups]
+    f_q = float(np.mean(cdf)) if cdf else 0.0
+    ess["dd_p95"] = _ess(f_q * (1.0 - f_q), _se(cdf))
+
+    return {
+        "n": n,
+        "mc": stats,
+        "variance": {
+            "method": spec.method,
+            "replicates": len(sizes),
+            "se": se,
+            "ess": ess,
+            "control": control,
+        },
+    }
@@ -69,57 +69,52 @@ def read_ftmo_limits(preset: Preset) -> tuple[float, float]:
 def run_true_engine(preset: Preset) -> List[float]:
     """
     Appel au vrai moteur de simulation qui se trouve dans tests/
+    (NotImplementedError si le moteur n'est pas importable -> fallback_equity)
     """
     try:
         # Import du moteur depuis tests/
         from test_freeze_modes import run_strategy
-        
-        # Conversion du preset en format attendu par le moteur
-        preset_dict = preset.dict()
-        
-        # Extraction des paramètres pour run_strategy
-        total_steps = preset_dict.get('total_steps', 200)
-        mu = preset_dict.get('mu', 0.0)
-        fees = preset_dict.get('fees_per_trade', 0.0002)
-        
-        # Paramètres des modules
-        modules = preset_dict.get('modules', {})
-        cppi_config = modules.get('CPPIFreeze', {})
-        alpha = cppi_config.get('alpha', 0.10)
-        freeze_frac = cppi_config.get('freeze_frac', 0.05)
-        
-        # Génération des trades (simulation simplifiée)
-        # TODO: Remplacer par votre vraie logique de génération de trades
-        rng = np.random.default_rng(int(preset_dict.get('seed', 42)))
-        trades = rng.normal(mu/252, 0.02, total_steps)  # Vol ~2% par jour
-        
-        # Appel au moteur
-        result = run_strategy(
-            trades=trades,
-            W0=100_000,  # Capital initial
-            alpha=alpha,
-            f=0.1,       # Fraction Kelly
-            lam=0.5,     # Fractionnement Kelly
-            freeze_mode="soft",
-            tau=freeze_frac
-        )
-        
-        # Extraction de la série equity
-        equity_series = result.get('capital_history', [])
-        
-        # Normalisation pour commencer à 1.0
-        if equity_series and len(equity_series) > 0:
-            initial = equity_series[0]
-            normalized = [float(x / initial) for x in equity_series]
-            return normalized
-        
-        # Fallback si pas de données
-        return [1.0] + [1.0 + 0.001*i for i in range(total_steps-1)]
-        
-    except Exception as e:
-        print(f"Erreur moteur: {e}")
-        # Fallback en cas d'erreur
-        raise NotImplementedError(f"Erreur moteur: {e}")
+    except ImportError as e:
+        raise NotImplementedError(f"Moteur indisponible: {e}")
+
+    # Conversion du preset en format attendu par le moteur
+    preset_dict = preset.dict()
+
+    # Extraction des paramètres pour run_strategy
+    total_steps = preset_dict.get('total_steps', 200)
+    mu = preset_dict.get('mu', 0.0)
+
+    # Paramètres des modules
+    modules = preset_dict.get('modules', {})
+    cppi_config = modules.get('CPPIFreeze', {})
+    alpha = cppi_config.get('alpha', 0.10)
+    freeze_frac = cppi_config.get('freeze_frac', 0.05)
+
+    # Génération des trades (simulation simplifiée)
+    rng = np.random.default_rng(int(preset_dict.get('seed', 42)))
+    trades = rng.normal(mu/252, 0.02, total_steps)  # Vol ~2% par jour
+
+    # Appel au moteur
+    result = run_strategy(
+        trades=trades,
+        W0=100_000,  # Capital initial
+        alpha=alpha,
+        f=0.1,       # Fraction Kelly
+        lam=0.5,     # Fractionnement Kelly
+        freeze_mode="soft",
+        tau=freeze_frac
+    )
+
+    # Extraction de la série equity
+    equity_series = result.get('capital_history', [])
+
+    # Normalisation pour commencer à 1.0
+    if equity_series and len(equity_series) > 0:
+        initial = equity_series[0]
+        return [float(x / initial) for x in equity_series]
+
+    # Fallback si pas de données
+    return [1.0] + [1.0 + 0.001*i for i in range(total_steps-1)]
 
 # ---------- Fallback temporaire (si tu n'as pas encore branché le moteur) ----------
 def fallback_equity(preset: Preset) -> List[float]:
@@ -187,7 +182,7 @@ def simulate(preset: Preset):
         max_dd_daily=float(dd_daily),
         violations_daily=viol_daily,
         violations_total=viol_total,
-        series=Series(equity=[float(x) for x in equity_arr.tolist()]),
+        series=Series(equity=equity_arr.tolist()),  # tolist() donne déjà des float Python
         kpis=kpis or None,
         diag=diag or None,
     )
@@ -0,0 +1,38 @@
+"""MC adaptatif : arrêt anticipé sur IC (Wilson / statistiques d'ordre)"""
+from backend.app.main import _simulate_mc, AdaptiveMC, MCInput, SimInput
+from backend.app.adaptive import quantile_interval, wilson_interval, z_value
+
+PAYLOAD = {"total_steps": 120, "use_kelly_cap": True, "kelly_cap": 0.5,
+           "daily_limit": 0.05, "total_limit": 0.10, "target_profit": 0.03}
+
+
+def test_intervals_basic_properties():
+    z = z_value(0.95)
+    assert abs(z - 1.959964) < 1e-5
+    lo, hi = wilson_interval(0, 50, z)
+    assert lo == 0.0 and 0.0 < hi < 0.1
+    lo, hi = wilson_interval(25, 100, z)
+    assert lo < 0.25 < hi
+    xs = sorted(i / 1000 for i in range(1000))
+    lo, hi = quantile_interval(xs, 0.95, z)
+    assert lo < 0.95 < hi and hi - lo < 0.04
+
+
+def test_adaptive_stops_early_and_matches_fixed_n():
+    spec = AdaptiveMC(tol_pass_rate=0.05, batch=40, min_n=40, max_n=2000)
+    out = _simulate_mc(MCInput(payload=SimInput(**PAYLOAD), base_seed=7, adaptive=spec))
+    ad = out["adaptive"]
+    assert ad["converged"] and 40 < ad["n_used"] < 2000 and ad["n_used"] % 40 == 0
+    assert ad["half_width"]["pass_rate"] <= 0.05
+    lo, hi = ad["ci"]["pass_rate"]
+    assert lo <= out["mc"]["pass_rate"] <= hi
+
+    # mêmes seeds contigus : identique à un MC classique de taille n_used
+    fixed = _simulate_mc(MCInput(payload=SimInput(**PAYLOAD), base_seed=7, n=ad["n_used"]))
+    assert fixed["mc"] == out["mc"]
+
+
+def test_adaptive_budget_exhausted():
+    spec = AdaptiveMC(tol_dd_p95=1e-9, batch=25, min_n=0, max_n=60)
+    out = _simulate_mc(MCInput(payload=SimInput(**PAYLOAD), base_seed=3, adaptive=spec))
+    assert out["n"] == 60 and not out["adaptive"]["converged"]
@@ -0,0 +1,67 @@
+"""Parité moteur batch (NumPy) vs moteur scalaire simulate_equity"""
+import numpy as np
+import pytest
+
+from backend.app.main import SimInput, simulate_equity, MCInput
+from backend.app.main import _simulate_mc as simulate_mc  # hors cache de résultats
+from backend.app.batch import simulate_batch
+
+CONFIGS = [
+    dict(),
+    dict(use_vt=True, vt_halflife=5),
+    dict(use_kelly_cap=True, kelly_cap=0.5),
+    dict(use_kelly_cap=True, kelly_cap=1.0, daily_limit=0.03, total_limit=0.05),
+    dict(use_soft_barrier=True, soft_barrier=0.01, use_kelly_cap=True, kelly_cap=1.0),
+    dict(use_cppi=True, use_vt=True, use_kelly_cap=True, cppi_alpha=0.05, cppi_freeze_frac=0.03,
+         spend_rate=0.8, sigma=0.03, mu=0.002, daily_limit=0.02, total_limit=0.04),
+    dict(use_vt=True, steps_per_day=0, modules={"FTMOGate": {"daily_limit": 0.01}}),
+]
+
+
+@pytest.mark.parametrize("cfg", CONFIGS)
+def test_batch_matches_scalar_bit_for_bit(cfg):
+    p = SimInput(**{"total_steps": 300, "steps_per_day": 20, "target_profit": 0.02, **cfg})
+    seeds = list(range(7, 19))
+    res = simulate_batch(p, seeds, keep_equity=True, chunk_paths=5)
+
+    for j, s in enumerate(seeds):
+        ref = simulate_equity(p.model_copy(deep=True, update={"seed": s}))
+        assert res["equity"][j].tolist() == ref["series"]["equity"]
+        assert res["max_dd_total"][j] == ref["max_dd_total"]
+        assert res["max_dd_daily"][j] == ref["max_dd_daily"]
+        assert res["violations_daily"][j] == ref["violations_daily"]
+        assert res["violations_total"][j] == ref["violations_total"]
+        assert bool(res["target_pass"][j]) == ref["kpis"]["target_pass"]
+        dtt = ref["kpis"]["days_to_target"]
+        assert res["days_to_target"][j] == (-1 if dtt is None else dtt)
+        assert res["kelly_cap_hits"][j] == ref["diag"]["kelly_cap_hits"]
+        assert res["cppi_freeze_events"][j] == ref["diag"]["cppi_freeze_events"]
+        assert bool(res["no_upsize_after_loss"][j]) == ref["diag"]["no_upsize_after_loss"]
+        assert bool(res["used_default_expo"][j]) == ref["diag"]["used_default_expo"]
+
+
+def test_simulate_mc_engines_identical():
+    payload = SimInput(total_steps=200, use_vt=True, use_cppi=True, use_kelly_cap=True,
+                       sigma=0.03, target_profit=0.03)
+    batch = simulate_mc(MCInput(payload=payload, n=40, base_seed=3, engine="batch"))
+    scalar = simulate_mc(MCInput(payload=payload, n=40, base_seed=3, engine="scalar"))
+    assert batch == scalar
+
+
+def test_batch_does_not_mutate_input():
+    p = SimInput(modules={"KellyCap": {"kelly_cap": 3.0}}, use_kelly_cap=True, total_steps=10)
+    simulate_batch(p, [1, 2])
+    assert p.kelly_cap == 0.10
+    assert simulate_batch(p, [])["max_dd_total"].shape == (0,)
+
+
+def test_simulate_mc_parallel_matches_serial(monkeypatch):
+    from backend.app import parallel
+    monkeypatch.setattr(parallel, "MAX_WORKERS", 2)
+    payload = SimInput(total_steps=150, use_vt=True, use_kelly_cap=True, kelly_cap=1.0,
+                       daily_limit=0.03, total_limit=0.05, target_profit=0.03)
+    serial = simulate_mc(MCInput(payload=payload, n=30, base_seed=11))
+    for engine in ("batch", "scalar"):
+        pooled = simulate_mc(MCInput(payload=payload, n=30, base_seed=11, engine=engine,
+                                     workers=2, chunk_size=7))
+        assert pooled == serial
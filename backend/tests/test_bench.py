@@ -0,0 +1,21 @@
+"""Suite de benchmarks : mesure d'un cas et détection de régression contre une baseline"""
+import pytest
+
+from scripts.bench import Case, compare, measure
+
+
+def test_measure_reports_latency_throughput_memory():
+    calls = []
+    r = measure(Case("toy", lambda: calls.append(bytearray(64 * 1024)), 1000, "steps",
+                     setup=lambda: calls.clear()), repeat=5)
+    assert r["repeat"] == 5 and r["unit"] == "steps"
+    assert 0.0 < r["p50_ms"] <= r["p99_ms"]
+    assert r["throughput"] == pytest.approx(1000 / (r["p50_ms"] / 1e3))
+    assert r["peak_kb"] >= 64
+
+
+def test_compare_flags_slowdowns_over_threshold():
+    base = {"results": {"a": {"p50_ms": 10.0}, "b": {"p50_ms": 10.0}, "gone": {"p50_ms": 1.0}}}
+    cur = {"results": {"a": {"p50_ms": 10.5}, "b": {"p50_ms": 12.0}, "new": {"p50_ms": 5.0}}}
+    rows = {name: bad for name, _, _, _, bad in compare(base, cur, threshold=0.10)}
+    assert rows == {"a": False, "b": True}
@@ -0,0 +1,68 @@
+"""Moteur CPPI freeze vectorisé (chemins x trades) vs boucle scalaire de référence"""
+import numpy as np
+import pytest
+
+from backend.app.cppi import compare_modes, run_cppi, run_strategy
+from tests.sim_freeze_modes import run_strategy as reference_capital
+from tests.test_freeze_modes import run_strategy as reference_strategy
+
+
+def test_matrix_matches_scalar_loop_bit_exact():
+    rng = np.random.default_rng(3)
+    trades = rng.normal(0.0, 2.0, size=(200, 40))
+    params = dict(W0=100_000, alpha=0.08, f=0.3, lam=0.8, tau=0.05)
+    for mode in ("hard", "soft"):
+        res = run_cppi(trades, freeze_mode=mode, **params)
+        for j in range(trades.shape[0]):
+            assert res["capital"][j].tolist() == reference_capital(trades[j], freeze_mode=mode, **params).tolist()
+        assert np.array_equal(res["final_capital"], res["capital"][:, -1])
+        # pas d'exposition quand gelé
+        assert not np.any(res["exposure"][res["frozen"]])
+    assert (res["freeze_count"] > 0).any() and (res["first_freeze"] >= 0).sum() == (res["freeze_count"] > 0).sum()
+
+
+def test_compat_single_path_and_summary():
+    trades = np.array([-2.0] * 8 + [0.5] * 22)
+    out = run_strategy(trades, f=0.15, lam=0.6)
+    assert len(out["capital_history"]) == 30
+    assert out["metrics"]["freeze_count"] == 1
+    assert out["freeze_events"][0]["action"] == "freeze"
+    assert out["freeze_events"][0]["cushion_ratio"] < 0.05
+
+    signs = np.where(np.random.default_rng(0).random((2000, 30)) < 0.55, 1.0, -1.0)
+    summary = compare_modes(signs)
+    assert set(summary) == {"hard", "soft"}
+    assert 0.0 <= summary["hard"]["freeze_rate"] <= 1.0
+
+
+def test_compat_matches_reference_strategy():
+    trades = np.random.default_rng(5).normal(0.0, 2.0, 60)
+    for mode in ("hard", "soft"):
+        ref = reference_strategy(trades, alpha=0.08, f=0.3, lam=0.8, freeze_mode=mode)
+        out = run_strategy(trades, alpha=0.08, f=0.3, lam=0.8, freeze_mode=mode)
+        assert out["capital_history"] == ref["capital_history"]
+        assert out["exposure_history"] == ref["exposure_history"]
+        assert out["freeze_events"] == ref["freeze_events"]
+        assert out["metrics"] == pytest.approx(ref["metrics"])
+        assert ref["metrics"]["freeze_count"] == 1
+
+
+def test_true_engine_keeps_legacy_output():
+    # /simulate (backend/main.py) : moteur de tests/ inchangé sur trades N(mu/252, 0.02)
+    from backend.main import Preset, run_true_engine
+
+    preset = Preset(schema_version="1", seed=7, total_steps=50, mu=0.1, fees_per_trade=0.0,
+                    modules={"CPPIFreeze": {"alpha": 0.2, "freeze_frac": 0.1}})
+    equity = run_true_engine(preset)
+    trades = np.random.default_rng(7).normal(0.1 / 252, 0.02, 50)
+    capital = reference_capital(trades, alpha=0.2, freeze_mode="soft", tau=0.1)
+    assert isinstance(equity, list) and len(equity) == 50 and equity[0] == 1.0
+    assert equity == (capital / capital[0]).tolist()
+
+
+def test_true_engine_errors_propagate():
+    from backend.main import Preset, run_true_engine
+
+    preset = Preset(schema_version="1", total_steps=-1, mu=0.0, fees_per_trade=0.0)
+    with pytest.raises(ValueError):
+        run_true_engine(preset)   # vraie erreur moteur : pas de repli silencieux sur fallback_equity
@@ -0,0 +1,134 @@
+"""Jobs asynchrones (MC / sweep) : progression, résultat, annulation, TTL"""
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.app import jobs
+from backend.app.jobs import JobManager, JobStore
+from backend.app.main import app, _simulate_mc, MCInput, SimInput
+from backend.app.cache import RESULT_CACHE
+
+PAYLOAD = {"total_steps": 120, "use_kelly_cap": True, "kelly_cap": 0.5,
+           "daily_limit": 0.05, "total_limit": 0.10, "target_profit": 0.03}
+
+
+def _wait(client, job_id, timeout=20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed", "cancelled"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job non terminé")
+
+
+def test_mc_job_matches_simulate_mc_and_reports_progress():
+    RESULT_CACHE.clear()
+    client = TestClient(app)
+    body = {"payload": PAYLOAD, "n": 200, "base_seed": 9}
+    r = client.post("/jobs", json={"kind": "simulate_mc", "params": body})
+    assert r.status_code == 202
+    job = _wait(client, r.json()["id"])
+    assert job["status"] == "done" and job["done"] == job["total"] == 200 and job["progress"] == 1.0
+    assert job["result"] == _simulate_mc(MCInput(payload=SimInput(**PAYLOAD), n=200, base_seed=9))
+    # résultat partagé avec /simulate_mc via le cache
+    assert client.post("/simulate_mc", json=body).json() == job["result"]
+
+
+def test_variance_job_matches_simulate_mc():
+    RESULT_CACHE.clear()
+    client = TestClient(app)
+    body = {"payload": PAYLOAD, "n": 64, "base_seed": 3, "variance": {"replicates": 4}}
+    job = _wait(client, client.post("/jobs", json={"kind": "simulate_mc", "params": body}).json()["id"])
+    assert job["status"] == "done" and "variance" in job["result"]
+    RESULT_CACHE.clear()
+    assert client.post("/simulate_mc", json=body).json() == job["result"]
+
+
+def test_rare_event_job_matches_simulate_mc():
+    RESULT_CACHE.clear()
+    client = TestClient(app)
+    body = {"payload": PAYLOAD, "n": 100, "base_seed": 3, "rare": {"events": ["total"], "pilot": 100}}
+    job = _wait(client, client.post("/jobs", json={"kind": "simulate_mc", "params": body}).json()["id"])
+    assert job["status"] == "done" and "ruin_prob" in job["result"]["rare"]
+    RESULT_CACHE.clear()
+    assert client.post("/simulate_mc", json=body).json() == job["result"]
+
+
+def test_sweep_job_and_validation_errors():
+    client = TestClient(app)
+    base = {**PAYLOAD, "total_steps": 60}
+    params = {"base": base, "ranges": {"kelly_cap": {"min": 0.1, "max": 0.5, "step": 0.1}}, "n": 16}
+    job = _wait(client, client.post("/jobs", json={"kind": "sweep", "params": params}).json()["id"])
+    assert job["status"] == "done" and job["total"] == 5
+    assert job["result"] == client.post("/sweep", json=params).json()
+
+    bad = {"base": base, "ranges": {"nope": [1, 2]}}
+    assert client.post("/jobs", json={"kind": "sweep", "params": bad}).status_code == 422
+    assert client.post("/jobs", json={"kind": "simulate_mc", "params": {"n": 3}}).status_code == 422
+    assert client.get("/jobs/unknown").status_code == 404
+
+
+def test_cancel_partial_and_ttl(monkeypatch):
+    manager = JobManager(JobStore(ttl=3600), workers=1, max_pending=2)
+    gate = threading.Event()
+    started = threading.Event()
+
+    def slow_blocks(inp):
+        for i in range(1, 100):
+            started.set()
+            gate.wait(5)
+            yield i, 100, {"n": i}
+
+    monkeypatch.setattr(jobs, "_mc_blocks", slow_blocks)
+    inp = MCInput(payload=SimInput(**PAYLOAD), n=100, base_seed=12345678)
+    job_id = manager.submit("simulate_mc", inp)
+    queued = manager.submit("simulate_mc", inp)
+    assert started.wait(5)
+    assert manager.cancel(queued) and manager.store.get(queued)["status"] == "cancelled"
+    manager.cancel(job_id)
+    gate.set()
+    for _ in range(200):
+        if manager.store.get(job_id)["status"] == "cancelled":
+            break
+        time.sleep(0.01)
+    job = manager.store.get(job_id)
+    assert job["status"] == "cancelled" and job["partial"] == {"n": 1} and job["done"] == 1
+
+    manager.store.ttl = -1.0  # tout job terminé est expiré
+    assert manager.store.get(job_id) is None
+
+
+def test_jobs_use_their_own_capped_pool(monkeypatch):
+    from concurrent.futures import Future
+    from backend.app import parallel
+
+    used = []
+
+    class InlinePool:
+        def submit(self, fn, *args):
+            fut = Future()
+            fut.set_result(fn(*args))
+            return fut
+
+    def fake_get_pool(workers):
+        used.append((parallel._POOL_GROUP.get(), workers))
+        return InlinePool()
+
+    RESULT_CACHE.clear()
+    monkeypatch.setattr(parallel, "get_pool", fake_get_pool)
+    monkeypatch.setattr(parallel, "MAX_WORKERS", 8)
+    monkeypatch.setattr(jobs, "JOB_MAX_WORKERS", 2)
+    manager = JobManager(JobStore(ttl=3600), workers=1)
+    job_id = manager.submit("simulate_mc", MCInput(payload=SimInput(**PAYLOAD), n=60, base_seed=3, workers=8))
+    for _ in range(500):
+        if manager.store.get(job_id)["status"] == "done":
+            break
+        time.sleep(0.01)
+    assert manager.store.get(job_id)["status"] == "done"
+    assert used and set(used) == {("jobs", 2)}
+
+    used.clear()
+    _simulate_mc(MCInput(payload=SimInput(**PAYLOAD), n=60, base_seed=4, workers=8))
+    assert set(used) == {("requests", 8)}
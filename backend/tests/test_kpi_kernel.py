@@ -0,0 +1,115 @@
+"""Noyau KPI fusionné vs helpers historiques (multi-passes)"""
+import random
+
+import pytest
+
+from backend.app.main import (
+    compute_equity_kpis, drawdowns, daily_violations, total_violations,
+    compute_basic_kpis_from_equity, compute_extended_kpis,
+)
+
+
+def reference(equity, daily_limit, total_limit, spd):
+    daily = daily_violations(equity, daily_limit, spd)
+    kpis = compute_basic_kpis_from_equity(equity)
+    kpis.update(compute_extended_kpis(equity, steps_per_day=spd))
+    return {
+        "max_dd_total": drawdowns(equity)["max_dd_total"],
+        "max_dd_daily": daily["max_dd_daily"],
+        "violations_daily": daily["violations_daily"],
+        "violations_total": total_violations(equity, total_limit),
+        "kpis": kpis,
+    }
+
+
+def random_equity(seed, n, vol=0.01):
+    rng = random.Random(seed)
+    eq = [1.0]
+    for _ in range(n - 1):
+        eq.append(max(1e-9, eq[-1] * (1.0 + rng.gauss(0.0, vol))))
+    return eq
+
+
+CASES = [
+    ([1.0], 0.05, 0.10, 50),
+    ([1.0, 1.01], 0.05, 0.10, 50),
+    # retour exact au pic après le creux -> days_to_recover défini
+    ([1.0, 1.1, 1.1, 0.9, 0.9, 1.0, 1.0, 1.1, 1.1, 1.05], 0.05, 0.10, 2),
+    (random_equity(1, 501), 0.02, 0.05, 50),
+    (random_equity(2, 777, vol=0.03), 0.05, 0.10, 7),
+    (random_equity(3, 300), 0.05, 0.10, 0),
+    (random_equity(4, 64), 0.01, 0.02, 1),
+]
+
+
+@pytest.mark.parametrize("equity,daily_limit,total_limit,spd", CASES)
+def test_fused_kernel_matches_helpers(equity, daily_limit, total_limit, spd):
+    got = compute_equity_kpis(equity, daily_limit, total_limit, spd)
+    ref = reference(equity, daily_limit, total_limit, spd)
+
+    assert list(got) == list(ref)
+    assert list(got["kpis"]) == list(ref["kpis"])
+    for key in ("max_dd_total", "max_dd_daily", "violations_daily", "violations_total"):
+        assert got[key] == ref[key]
+    for key, val in ref["kpis"].items():
+        if val is None or isinstance(val, int):
+            assert got["kpis"][key] == val, key
+        else:
+            assert got["kpis"][key] == pytest.approx(val, rel=1e-9, abs=1e-15), key
+
+
+def test_days_to_recover_case_is_exercised():
+    eq, dl, tl, spd = CASES[2]
+    assert compute_equity_kpis(eq, dl, tl, spd)["kpis"]["days_to_recover"] == 2
+
+
+def test_simulate_without_series_keeps_same_kpis():
+    from backend.app.main import SimInput, simulate_equity
+    p = SimInput(seed=9, total_steps=400, use_vt=True, use_cppi=True, use_kelly_cap=True, steps_per_day=25)
+    full = simulate_equity(p.model_copy(deep=True))
+    lean = simulate_equity(p.model_copy(deep=True, update={"return_series": False}))
+
+    assert "series" not in lean
+    full.pop("series")
+    assert lean == full
+
+
+def sliced_daily(equity, daily_limit, spd):
+    """Version historique (une slice par jour) : référence de l'index DayBuckets."""
+    spd = spd if spd > 0 else len(equity)
+    violations, max_dd, rets, closes = 0, 0.0, [], []
+    for d0 in range(0, len(equity), spd):
+        day = equity[d0:d0 + spd]
+        peak, threshold = day[0], day[0] * (1.0 - daily_limit)
+        for x in day:
+            peak = max(peak, x)
+            max_dd = max(max_dd, (peak - x) / peak if peak > 0 else 0.0)
+        violations += any(x < threshold for x in day)
+        if day[0] > 0:
+            rets.append(day[-1] / day[0] - 1.0)
+        closes.append(day[-1])
+    return violations, max_dd, rets, closes
+
+
+@pytest.mark.parametrize("equity,daily_limit,total_limit,spd", CASES + [
+    ([1.0, 0.0, 0.5, 1.0, 0.9], 0.05, 0.10, 2),   # open nul : jour ignoré dans les rendements
+    (random_equity(5, 101), 0.01, 0.02, 200),     # une journée partielle
+])
+def test_day_buckets_match_sliced_days(equity, daily_limit, total_limit, spd):
+    from backend.app.main import DayBuckets, _daily_returns
+    days = DayBuckets(equity, spd)
+    violations, max_dd, rets, closes = sliced_daily(equity, daily_limit, spd)
+
+    assert days.closes == closes
+    assert days.violations(daily_limit) == violations
+    assert daily_violations(equity, daily_limit, spd, days) == {"max_dd_daily": max_dd, "violations_daily": violations}
+    if len(equity) >= 2:
+        assert _daily_returns(equity, spd, days) == rets
+    assert compute_extended_kpis(equity, spd, days) == compute_extended_kpis(equity, spd)
+
+
+def test_day_buckets_empty_equity():
+    from backend.app.main import DayBuckets
+    days = DayBuckets([], 10)
+    assert len(days) == 0
+    assert daily_violations([], 0.05, 10, days) == {"max_dd_daily": 0.0, "violations_daily": 0}
@@ -0,0 +1,62 @@
+"""Streaming MC (NDJSON) et sketch de quantiles KLL"""
+import json
+import random
+
+from fastapi.testclient import TestClient
+
+from backend.app.main import app, simulate_mc, MCInput, SimInput
+from backend.app.sketch import KLLSketch
+
+
+def test_kll_exact_below_capacity_and_bounded_above():
+    rng0 = random.Random(0)
+    xs = [rng0.random() for _ in range(150)]
+    small = KLLSketch(k=200)
+    small.update_many(xs)
+    srt = sorted(xs)
+    assert small.quantile(0.95) == srt[int(round(0.95 * (len(xs) - 1)))]
+
+    rng = random.Random(1)
+    big = [rng.random() for _ in range(50_000)]
+    a, b = KLLSketch(), KLLSketch(seed=1)
+    a.update_many(big[:25_000])
+    b.update_many(big[25_000:])
+    a.merge(b)
+    assert a.n == 50_000
+    assert a.size < 2_000
+    assert abs(a.quantile(0.5) - 0.5) < 0.02
+    assert KLLSketch().quantile(0.5) is None
+
+
+def test_stream_endpoint_progressive_and_matches_final():
+    payload = {"total_steps": 120, "use_kelly_cap": True, "kelly_cap": 1.0,
+               "daily_limit": 0.03, "total_limit": 0.05, "target_profit": 0.03}
+    client = TestClient(app)
+    r = client.post("/simulate_mc/stream", json={"payload": payload, "n": 50, "base_seed": 5, "every": 20})
+    assert r.status_code == 200
+    snaps = [json.loads(line) for line in r.text.splitlines() if line]
+    assert [s["done"] for s in snaps] == [20, 40, 50]
+    assert [s["final"] for s in snaps] == [False, False, True]
+
+    ref = simulate_mc(MCInput(payload=SimInput(**payload), n=50, base_seed=5))
+    assert snaps[-1]["mc"] == ref["mc"]
+
+
+def test_stream_rejects_unsupported_modes():
+    client = TestClient(app)
+    body = {"payload": {"total_steps": 50, "use_kelly_cap": True}, "n": 10}
+    for mode in ({"variance": {}}, {"adaptive": {"tol_pass_rate": 0.1}}, {"rare": {}}):
+        assert client.post("/simulate_mc/stream", json={**body, **mode}).status_code == 422
+
+
+def test_stream_does_not_fill_shock_store():
+    from backend.app.main import MCStreamInput
+    from backend.app.shocks import SHOCK_STORE
+    from backend.app.streaming import iter_mc
+
+    SHOCK_STORE.clear()
+    inp = MCStreamInput(payload=SimInput(total_steps=60, use_kelly_cap=True), n=90, base_seed=7, every=30)
+    snaps = list(iter_mc(inp))
+    assert len(snaps) == 3 and snaps[-1]["final"]
+    assert SHOCK_STORE.stats()["matrices"] == 0
+    assert snaps[-1]["mc"]["pass_rate"] == simulate_mc(MCInput(payload=inp.payload, n=90, base_seed=7))["mc"]["pass_rate"]
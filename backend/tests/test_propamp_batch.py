@@ -0,0 +1,33 @@
+"""PropAmplifier : évaluateur batch (config x chemin) vs boucle scalaire de référence"""
+import numpy as np
+
+from engine.prop_amplifier import PropAmpConfig, simulate_propamp_batch, summarize_propamp
+from tests.sim_soft_propamp_mc import simulate_soft_propamp
+
+
+def test_batch_matches_scalar_loop():
+    rng = np.random.default_rng(5)
+    signs = (rng.random((150, 40)) < 0.55).astype(int) * 2 - 1
+    grid = [PropAmpConfig(beta=b, lam_cap=cap, max_E_to_W=e, cooldown=cd)
+            for b in (0.0, 3.0) for cap in (0.75, 1.25) for e in (0.005, 0.02) for cd in (0, 3)]
+    # contraintes serrées (freeze, violations) puis payoff élevé (cible atteinte)
+    for kw in (dict(alpha=0.06, f_kelly=0.4, max_total_dd=0.03, max_daily_dd=0.004),
+               dict(alpha=0.10, f_kelly=0.5, payoff=4.0)):
+        res = simulate_propamp_batch(signs, grid, chunk_cells=500, **kw)
+        assert res["final_W"].shape == (len(grid), 150)
+        for k, cfg in enumerate(grid):
+            for j in range(signs.shape[0]):
+                ref = simulate_soft_propamp(signs[j], cfg=cfg, **kw)
+                assert res["final_W"][k, j] == ref["final_W"]
+                assert res["max_dd"][k, j] == ref["max_dd"]
+                assert bool(res["pass_constraints"][k, j]) == ref["pass_constraints"]
+                assert res["days_to_target"][k, j] == (ref["days_to_target"] or -1)
+    assert res["hit_target"].any()
+
+
+def test_summary_per_config():
+    signs = np.where(np.random.default_rng(0).random((500, 30)) < 0.55, 1.0, -1.0)
+    grid = [PropAmpConfig(beta=b) for b in (1.0, 2.0, 3.0)]
+    summary = summarize_propamp(simulate_propamp_batch(signs, grid))
+    assert len(summary) == 3
+    assert all(0.0 <= s["success"] <= s["hit_target"] <= 1.0 for s in summary)
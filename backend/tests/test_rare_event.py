@@ -0,0 +1,78 @@
+"""Événements rares : échantillonnage d'importance (entropie croisée), ruin_prob et ES95"""
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend.app.main import MCInput, RareEventMC, SimInput, _simulate_mc, app, resolve_config
+from backend.app.rare import event_score, expected_shortfall, tilted_run
+
+KELLY = {"total_steps": 200, "use_kelly_cap": True, "kelly_cap": 0.3, "daily_limit": 0.5}
+
+
+def run(payload, n, **kw):
+    spec = RareEventMC(events=["total"], **kw)
+    return _simulate_mc(MCInput(payload=SimInput(**payload), n=n, base_seed=1, rare=spec))["rare"]
+
+
+def plain_rate(payload, n):
+    res, _, _ = tilted_run(resolve_config(SimInput(**payload)), range(10**6, 10**6 + n), 0.0)
+    return float((res["violations_total"] > 0).mean())
+
+
+def test_tilted_estimate_matches_plain_mc():
+    payload = {**KELLY, "total_limit": 0.20}
+    n_plain = 20000
+    p = plain_rate(payload, n_plain)
+    r = run(payload, 4000, pilot=500)
+    est = r["events"]["total"]
+    assert est["theta"] < 0 and len(est["iterations"]) >= 2
+    se = np.hypot(est["se"], np.sqrt(p * (1 - p) / n_plain))
+    assert abs(est["p"] - p) < 4 * se
+    assert r["ruin_prob"] == est["p"] and r["ES95"] > 0
+
+
+def test_rare_event_is_resolved_where_plain_mc_sees_nothing():
+    payload = {**KELLY, "total_limit": 0.35}
+    assert plain_rate(payload, 2000) == 0.0
+    est = run(payload, 2000, pilot=500)["events"]["total"]
+    assert est["hits"] > 200
+    assert 0 < est["p"] < 1e-4 and est["relative_error"] < 0.3
+    assert est["ci"][0] < est["p"] < est["ci"][1] and est["upper_bound"] is None
+
+
+def test_plain_mc_stats_are_kept_next_to_rare():
+    payload = {**KELLY, "total_limit": 0.20}
+    inp = MCInput(payload=SimInput(**payload), n=300, base_seed=1)
+    out = _simulate_mc(inp.model_copy(update={"rare": RareEventMC(events=["total"], pilot=200)}))
+    assert out["mc"] == _simulate_mc(inp)["mc"]
+    res, _, _ = tilted_run(resolve_config(SimInput(**payload)), range(1, 301), 0.0)
+    assert out["rare"]["ES95"] == expected_shortfall(res["max_dd_total"])
+
+
+def test_daily_score_matches_violation_test():
+    p = resolve_config(SimInput(total_steps=200, use_kelly_cap=True, kelly_cap=0.5, daily_limit=0.02))
+    res, _, _ = tilted_run(p, range(500), 0.0)
+    score, limit = event_score(p, res, "daily", 0.0)
+    assert np.array_equal(score > limit, res["violations_daily"] > 0)
+    assert 0 < (res["violations_daily"] > 0).sum() < 500
+
+
+def test_unreachable_event_stops_early():
+    # aucun sizer : exposition nulle, pas de drawdown
+    est = run({"total_steps": 100}, 200, pilot=100)["events"]["total"]
+    assert est["p"] == 0.0 and est["hits"] == 0 and est["ess"] == 0.0
+    # pas d'IC sans chemin dans l'événement : ordre de grandeur heuristique à part
+    assert est["ci"] is None and 0 < est["upper_bound"] <= 1
+    assert len(est["iterations"]) <= 2
+
+
+def test_endpoint_and_invalid_combinations():
+    client = TestClient(app)
+    body = {"payload": {**KELLY, "total_limit": 0.15}, "n": 200,
+            "rare": {"events": ["total", "daily", "deep_dd"], "pilot": 100, "dd_level": 0.1}}
+    r = client.post("/simulate_mc", json=body)
+    assert r.status_code == 200
+    rare = r.json()["rare"]
+    assert set(rare["events"]) == {"total", "daily", "deep_dd"} and {"ruin_prob", "ES95"} <= set(rare)
+    assert client.post("/simulate_mc", json={**body, "variance": {}}).status_code == 422
+    body = {"payload": {**KELLY, "returns": {"sampler": "student_t"}}, "n": 10, "rare": {}}
+    assert client.post("/simulate_mc", json=body).status_code == 422
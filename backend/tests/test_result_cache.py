@@ -0,0 +1,58 @@
+"""Cache de résultats adressé par contenu (/simulate, /simulate_mc)"""
+from fastapi.testclient import TestClient
+
+from backend.app.main import app, SimInput
+from backend.app.cache import RESULT_CACHE, ResultCache, cache_key, normalized_params
+
+
+def test_normalized_key_ignores_equivalent_spellings():
+    flat = SimInput(seed=1, kelly_cap=0.2, name="a")
+    nested = SimInput(seed=1, modules={"KellyCap": {"kelly_cap": 0.2}}, name="b")
+    assert cache_key("simulate", normalized_params(flat)) == cache_key("simulate", normalized_params(nested))
+    # clamp différent -> diag différent -> clé différente
+    clamped = SimInput(seed=1, kelly_cap=1.5)
+    assert cache_key("simulate", normalized_params(clamped)) != cache_key("simulate", normalized_params(flat))
+
+
+def test_simulate_hits_cache_and_health_reports_it():
+    RESULT_CACHE.clear()
+    client = TestClient(app)
+    body = {"seed": 3, "total_steps": 100, "use_vt": True}
+    first = client.post("/simulate", json=body).json()
+    second = client.post("/simulate", json=body).json()
+    assert first == second
+
+    stats = client.get("/health").json()["cache"]
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+    client.post("/simulate", json={**body, "seed": None})  # jamais en cache
+    assert client.get("/health").json()["cache"]["misses"] == 1
+
+
+def test_lru_and_disk_tier(tmp_path):
+    cache = ResultCache(max_items=2, disk_dir=str(tmp_path), disk_max_bytes=10_000)
+    for i in range(3):
+        cache.put(f"k{i}", {"v": i})
+    assert cache.stats()["items"] == 2
+    assert cache.get("k0") == {"v": 0}          # évincé de la mémoire, relu depuis le disque
+    assert cache.stats()["disk_hits"] == 1
+
+    small = ResultCache(max_items=0, disk_dir=str(tmp_path / "small"), disk_max_bytes=200)
+    for i in range(10):
+        small.put(f"k{i}", {"payload": "x" * 50, "i": i})
+    assert small.get("k9") == {"payload": "x" * 50, "i": 9}
+    assert small.get("k0") is None
+
+
+def test_memory_tier_is_bounded_in_bytes():
+    series = lambda i: {"equity": [1.0 + i * 1e-6] * 20_000, "i": i}   # ~ 0,6 Mo estimés par entrée
+    cache = ResultCache(max_items=256, mem_max_bytes=4 * 1024 * 1024)
+    for i in range(50):
+        cache.put(f"k{i}", series(i))
+        assert cache.stats()["bytes"] <= 4 * 1024 * 1024
+    stats = cache.stats()
+    assert 1 < stats["items"] < 10
+    assert cache.get("k49")["i"] == 49 and cache.get("k0") is None
+
+    cache.put("huge", {"equity": [0.5] * 1_000_000})   # plus gros que la borne : pas en mémoire
+    assert cache.get("huge") is None and cache.stats()["bytes"] <= 4 * 1024 * 1024
@@ -0,0 +1,59 @@
+"""Projection fields= sur /simulate et /simulate_mc : groupes non demandés non calculés"""
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.cache import RESULT_CACHE
+from backend.app.main import (
+    BASIC_KPIS, KpiAccumulator, SimInput, app, result_groups, select_fields, simulate_equity,
+)
+
+PAYLOAD = {"seed": 11, "total_steps": 300, "steps_per_day": 20, "use_vt": True, "use_cppi": True,
+           "use_kelly_cap": True, "kelly_cap": 0.5, "debug": True}
+
+
+@pytest.mark.parametrize("fields", [
+    ["max_dd_total", "kpis.target_pass"],
+    ["violations_daily", "kpis.sharpe", "kpis.win_rate"],
+    ["kpis", "diag.param_clamps"],
+    ["series", "trace"],
+])
+def test_projection_matches_full_result(fields):
+    full = simulate_equity(SimInput(**PAYLOAD))
+    assert simulate_equity(SimInput(**PAYLOAD), fields) == select_fields(full, fields)
+
+
+def test_result_groups():
+    assert result_groups(["max_dd_total", "kpis.target_pass"]) == frozenset()
+    assert result_groups(["kpis.sortino", "series.equity"]) == {"kpis_extended", "series"}
+    assert result_groups(["kpis"]) == {"kpis_basic", "kpis_extended"}
+    assert result_groups(None) == {"series", "trace", "diag", "kpis_basic", "kpis_extended"}
+
+
+def test_accumulator_skips_unrequested_kpis():
+    acc = KpiAccumulator(0.05, 0.10, 5, basic=True, extended=False)
+    for i in range(40):
+        acc.push(1.0 + 0.01 * ((-1) ** i))
+    res = acc.result()
+    assert list(res["kpis"]) == list(BASIC_KPIS)
+    assert acc.d_n == 0 and acc.c_n == 0
+
+    lean = KpiAccumulator(0.05, 0.10, 5, basic=False, extended=False)
+    for i in range(40):
+        lean.push(1.0 + 0.01 * ((-1) ** i))
+    assert lean.result() == {**res, "kpis": {}}
+
+
+def test_endpoints_project_with_fields_param():
+    RESULT_CACHE.clear()
+    client = TestClient(app)
+    full = client.post("/simulate", json=PAYLOAD).json()
+    r = client.post("/simulate?fields=max_dd_total,kpis.target_pass,kpis.cagr", json=PAYLOAD)
+    assert r.status_code == 200
+    assert r.json() == select_fields(full, ["max_dd_total", "kpis.target_pass", "kpis.cagr"])
+    # clé de cache distincte : la réponse complète n'est pas remplacée par la projection
+    assert client.post("/simulate", json=PAYLOAD).json() == full
+
+    body = {"payload": {"total_steps": 100, "use_vt": True}, "n": 20, "base_seed": 3}
+    mc = client.post("/simulate_mc", json=body).json()
+    got = client.post("/simulate_mc?fields=n,mc.pass_rate", json=body).json()
+    assert got == {"n": mc["n"], "mc": {"pass_rate": mc["mc"]["pass_rate"]}}
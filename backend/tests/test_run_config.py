@@ -0,0 +1,40 @@
+"""RunConfig : config résolue immuable, construite une fois par requête"""
+import dataclasses
+import pickle
+
+import pytest
+
+from backend.app.batch import simulate_batch
+from backend.app.main import SimInput, mc_counts_scalar, resolve_config, simulate_equity
+from backend.app.parallel import mc_counts_chunk
+
+PAYLOAD = dict(total_steps=300, use_kelly_cap=True, kelly_cap=1.5, cppi_alpha=0.05, cppi_freeze_frac=0.2,
+               modules={"VolatilityTarget": {"vt_target_vol": 0.02}, "SoftBarrier": {"soft_barrier": 0.03}})
+
+
+def test_simulate_equity_does_not_mutate_input():
+    p = SimInput(seed=3, **PAYLOAD)
+    before = p.model_dump()
+    out = simulate_equity(p)
+    assert p.model_dump() == before
+    assert out["diag"]["param_clamps"] == {"kelly_cap": [1.5, 1.0], "cppi_freeze_frac": [0.2, 0.05]}
+
+
+def test_config_is_frozen_and_picklable():
+    cfg = resolve_config(SimInput(**PAYLOAD))
+    assert (cfg.kelly_cap, cfg.vt_target_vol, cfg.soft_barrier) == (1.0, 0.02, 0.03)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        cfg.seed = 1
+    assert pickle.loads(pickle.dumps(cfg)) == cfg
+
+
+def test_seed_replace_matches_fresh_input():
+    cfg = resolve_config(SimInput(**PAYLOAD))
+    for seed in (0, 9, 123):
+        assert simulate_equity(dataclasses.replace(cfg, seed=seed)) == simulate_equity(SimInput(seed=seed, **PAYLOAD))
+
+
+def test_mc_scalar_matches_batch():
+    p = SimInput(**{**PAYLOAD, "use_vt": True})
+    seeds = range(40)
+    assert mc_counts_scalar(p, seeds) == mc_counts_chunk(resolve_config(p), seeds, engine="batch")
@@ -0,0 +1,45 @@
+"""Séries d'equity : format binaire colonnaire et sous-échantillonnage LTTB"""
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend.app.main import app
+from backend.app.series import decode_binary, lttb
+
+BODY = {"seed": 11, "total_steps": 500, "use_vt": True, "use_cppi": True}
+
+
+def test_binary_roundtrip_matches_json():
+    client = TestClient(app)
+    js = client.post("/simulate", json=BODY).json()
+    r = client.post("/simulate", json=BODY, headers={"Accept": "application/octet-stream"})
+    assert r.headers["content-type"] == "application/octet-stream"
+    out = decode_binary(r.content)
+    assert out["series"]["equity"].tolist() == js["series"]["equity"]
+    assert out["kpis"] == js["kpis"] and out["max_dd_total"] == js["max_dd_total"]
+
+    r32 = client.post("/simulate?dtype=float32", json=BODY, headers={"Accept": "application/octet-stream"})
+    eq32 = decode_binary(r32.content)["series"]["equity"]
+    assert eq32.dtype == np.float32 and len(r32.content) < len(r.content)
+    assert np.allclose(eq32, js["series"]["equity"], rtol=1e-6)
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    rng = np.random.default_rng(0)
+    y = np.cumsum(rng.normal(size=5000))
+    idx, vals = lttb(y, 200)
+    assert len(idx) == 200 and idx[0] == 0 and idx[-1] == 4999
+    assert np.all(np.diff(idx) > 0) and np.array_equal(vals, y[idx])
+    assert int(np.argmax(y)) in idx and int(np.argmin(y)) in idx
+    same_idx, same = lttb(y[:50], 200)
+    assert len(same) == 50
+
+
+def test_downsample_query_param():
+    client = TestClient(app)
+    full = client.post("/simulate", json=BODY).json()
+    small = client.post("/simulate?downsample=100", json=BODY).json()
+    assert len(small["series"]["equity"]) == 100 and len(small["series"]["index"]) == 100
+    assert small["series"]["equity"][-1] == full["series"]["equity"][-1]
+    assert small["kpis"] == full["kpis"]
+    # le résultat en cache n'est pas modifié
+    assert len(client.post("/simulate", json=BODY).json()["series"]["equity"]) == 501
@@ -0,0 +1,32 @@
+"""Matrices de chocs partagées (nombres aléatoires communs, vues et memmap)"""
+import random
+
+import numpy as np
+
+from backend.app.shocks import ShockStore, standard_normals
+
+
+def test_columns_reproduce_scalar_gauss_stream():
+    z = standard_normals([5, 6], 4)
+    g = random.Random(6).gauss
+    assert z[:, 1].tolist() == [g(0.0, 1.0) for _ in range(4)]
+
+
+def test_sub_ranges_and_shorter_horizons_are_views():
+    store = ShockStore()
+    full = store.get(range(100, 140), 50)
+    sub = store.get(range(110, 120), 30)
+    assert np.shares_memory(full, sub)
+    assert np.array_equal(sub, standard_normals(range(110, 120), 30))
+    assert store.stats()["hits"] == 1 and store.stats()["misses"] == 1
+    assert not full.flags.writeable
+
+
+def test_disk_tier_is_memory_mapped(tmp_path):
+    store = ShockStore(disk_dir=str(tmp_path))
+    z = store.get(range(0, 3000), 20)
+    assert isinstance(z, np.memmap)
+    assert np.array_equal(z[:, 2500:2505], standard_normals(range(2500, 2505), 20))
+    # nouveau store sur le même dossier : relu depuis le disque
+    again = ShockStore(disk_dir=str(tmp_path)).get(range(0, 3000), 20)
+    assert np.array_equal(again, z)
@@ -0,0 +1,63 @@
+"""/simulate_batch : plusieurs payloads en une requête, même résultat que /simulate"""
+from fastapi.testclient import TestClient
+
+from backend.app.bulk import merge_item
+from backend.app.cache import RESULT_CACHE
+from backend.app.main import app, select_fields
+
+
+def test_items_match_individual_simulate_calls_in_order():
+    RESULT_CACHE.clear()
+    client = TestClient(app)
+    items = [
+        {"seed": 3, "total_steps": 150, "use_vt": True, "use_cppi": True},
+        {"seed": 4, "total_steps": 90, "use_kelly_cap": True, "kelly_cap": 0.5, "return_series": False},
+        {"seed": 3, "total_steps": 150, "use_vt": True, "use_cppi": True},   # doublon
+        {"seed": 5, "total_steps": 120, "use_kelly_cap": True, "returns": {"sampler": "student_t", "nu": 5}},
+    ]
+    r = client.post("/simulate_batch", json={"items": items})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["n"] == len(items)
+    RESULT_CACHE.clear()
+    for item, got in zip(items, data["results"]):
+        assert got == client.post("/simulate", json=item).json()
+
+
+def test_base_with_overrides_and_field_selection():
+    client = TestClient(app)
+    base = {"seed": 7, "total_steps": 100, "use_cppi": True, "use_kelly_cap": True,
+            "modules": {"CPPIFreeze": {"alpha": 0.2, "freeze_frac": 0.05}}}
+    items = [{}, {"modules.CPPIFreeze.alpha": 0.1}, {"modules": {"CPPIFreeze": {"freeze_frac": 0.02}}, "seed": 8}]
+    fields = ["max_dd_total", "kpis.target_pass", "kpis.missing"]
+    r = client.post("/simulate_batch", json={"base": base, "items": items, "fields": fields})
+    assert r.status_code == 200
+
+    for item, got in zip(items, r.json()["results"]):
+        full = client.post("/simulate", json=merge_item(base, item)).json()
+        assert got == {"max_dd_total": full["max_dd_total"], "kpis": {"target_pass": full["kpis"]["target_pass"]}}
+    assert merge_item(base, items[2])["modules"]["CPPIFreeze"] == {"alpha": 0.2, "freeze_frac": 0.02}
+    assert base["modules"]["CPPIFreeze"]["alpha"] == 0.2
+
+
+def test_workers_give_same_results():
+    RESULT_CACHE.clear()
+    client = TestClient(app)
+    items = [{"seed": s, "total_steps": 80, "use_vt": True} for s in range(6)]
+    serial = client.post("/simulate_batch", json={"items": items}).json()
+    RESULT_CACHE.clear()
+    pooled = client.post("/simulate_batch", json={"items": items, "workers": 2}).json()
+    assert pooled == serial
+
+
+def test_invalid_item_reports_its_index():
+    client = TestClient(app)
+    r = client.post("/simulate_batch", json={"items": [{"seed": 1}, {"total_steps": "abc"}]})
+    assert r.status_code == 422
+    assert r.json()["detail"]["item"] == 1
+
+
+def test_select_fields():
+    out = {"a": 1, "kpis": {"b": 2, "c": 3}, "series": {"equity": [1.0]}}
+    assert select_fields(out, None) is out
+    assert select_fields(out, ["kpis.c", "series", "nope.x", "a.b"]) == {"kpis": {"c": 3}, "series": {"equity": [1.0]}}
@@ -0,0 +1,63 @@
+"""Noyau de pas (Numba optionnel) : parité avec la boucle Python de simulate_equity"""
+import pytest
+
+from backend.app import kernel
+from backend.app.main import SimInput, simulate_equity
+
+CONFIGS = [
+    dict(use_vt=True, use_cppi=True),
+    dict(use_kelly_cap=True, kelly_cap=1.0, daily_limit=0.03, total_limit=0.05, target_profit=0.03),
+    dict(use_vt=True, use_kelly_cap=True, use_soft_barrier=True, soft_barrier=0.02, use_cppi=True,
+         cppi_freeze_frac=0.05, spend_rate=0.7),
+    dict(sigma=0.02),  # aucun sizer : expo par défaut nulle
+    dict(use_vt=True, return_series=False, steps_per_day=0),
+    dict(use_kelly_cap=True, kelly_cap=0.5, rng="philox", return_series=False),
+    dict(use_vt=True, use_cppi=True, returns={"sampler": "student_t", "nu": 4}),
+]
+
+
+def _run(cfg, seed):
+    return simulate_equity(SimInput(**{"seed": seed, "total_steps": 600, **cfg}))
+
+
+@pytest.mark.parametrize("cfg", CONFIGS)
+def test_kernel_source_matches_python_loop(monkeypatch, cfg):
+    # le noyau non compilé est du Python : on vérifie la logique sans accélérateur
+    for seed in (1, 7, 42):
+        monkeypatch.setattr(kernel, "KERNEL", None)
+        loop = _run(cfg, seed)
+        monkeypatch.setattr(kernel, "KERNEL", kernel.step_kernel)
+        assert _run(cfg, seed) == loop
+
+
+@pytest.mark.parametrize("cfg", CONFIGS)
+def test_kernel_blocks_match_python_loop(monkeypatch, cfg):
+    # chocs et KPIs par blocs : l'état (boucle + accumulateur) traverse les frontières de blocs
+    monkeypatch.setattr(kernel, "BLOCK_STEPS", 37)
+    monkeypatch.setattr(kernel, "KERNEL", None)
+    loop = _run(cfg, 5)
+    monkeypatch.setattr(kernel, "KERNEL", kernel.step_kernel)
+    assert _run(cfg, 5) == loop
+
+
+def test_kernel_keeps_no_series_without_return_series(monkeypatch):
+    from backend.app.main import resolve_config
+    p = resolve_config(SimInput(seed=1, total_steps=100, use_vt=True, return_series=False))
+    equity, metrics, _ = kernel.run_step_kernel(kernel.step_kernel, p, lambda start, m: [0.001] * m)
+    assert equity is None and metrics["violations_total"] == 0 and metrics["kpis"]["win_rate"] == 1.0
+
+
+def test_debug_trace_keeps_python_loop(monkeypatch):
+    monkeypatch.setattr(kernel, "KERNEL", kernel.step_kernel)
+    out = _run({"use_vt": True, "debug": True, "trace_len": 5}, 3)
+    assert len(out["trace"]) == 5
+
+
+@pytest.mark.skipif(kernel.numba is None, reason="Numba non installé")
+def test_compiled_kernel_matches_python_loop(monkeypatch):
+    compiled = kernel.numba.njit(kernel.step_kernel)
+    for cfg in CONFIGS:
+        monkeypatch.setattr(kernel, "KERNEL", None)
+        loop = _run(cfg, 11)
+        monkeypatch.setattr(kernel, "KERNEL", compiled)
+        assert _run(cfg, 11) == loop
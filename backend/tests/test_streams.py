@@ -0,0 +1,61 @@
+"""Flux Philox à compteur (rng="philox") : saut en avant, indépendance du batch, parité des moteurs"""
+import numpy as np
+import pytest
+
+from backend.app.batch import simulate_batch, simulate_points
+from backend.app.generators import generate_returns, make_profile
+from backend.app.main import SimInput, _simulate_mc, MCInput, simulate_equity
+from backend.app.shocks import ShockStore, standard_normals
+from backend.app.streams import BLOCK_STEPS, philox_normals
+
+BASE = dict(total_steps=300, use_vt=True, use_cppi=True, use_kelly_cap=True, kelly_cap=1.0,
+            steps_per_day=20, rng="philox")
+
+
+def test_skip_ahead_regenerates_any_step_and_run():
+    full = philox_normals(range(10, 20), 3 * BLOCK_STEPS + 17)
+    for start, steps in ((0, 5), (BLOCK_STEPS - 3, 10), (2 * BLOCK_STEPS + 1, BLOCK_STEPS + 16)):
+        assert np.array_equal(philox_normals(range(10, 20), steps, start=start), full[start:start + steps])
+    # run k seul, sans tirer les autres
+    assert np.array_equal(philox_normals([17], 40, start=100)[:, 0], full[100:140, 7])
+    assert philox_normals([1, 2], 0).shape == (0, 2)
+
+
+def test_streams_differ_from_legacy_and_between_seeds():
+    z = philox_normals(range(4), 2000)
+    assert not np.array_equal(z, standard_normals(range(4), 2000))
+    corr = np.corrcoef(z.T)
+    assert np.all(np.abs(corr[~np.eye(4, dtype=bool)]) < 0.1)
+    assert abs(z.mean()) < 0.05 and abs(z.std() - 1.0) < 0.05
+
+
+@pytest.mark.parametrize("returns", [None, {"profile": "student_t_jumps_ewma"}])
+def test_scalar_matches_batch(returns):
+    p = SimInput(returns=returns, **BASE)
+    seeds = list(range(5, 25))
+    res = simulate_batch(p, seeds, keep_equity=True, chunk_paths=6)
+    for j, seed in enumerate(seeds):
+        out = simulate_equity(SimInput(seed=seed, returns=returns, **BASE))
+        assert out["series"]["equity"] == res["equity"][j].tolist()
+    pts = simulate_points([p, SimInput(**{**BASE, "rng": "legacy"})], seeds)
+    assert np.array_equal(pts[0]["max_dd_total"], res["max_dd_total"])
+
+
+def test_profile_blocks_skip_ahead():
+    prof = make_profile(sampler="student_t", nu=5.0, p_jump=0.1, jump_sigma=0.02, p_tail=0.05, tail_mult=3.0)
+    r = generate_returns(prof, [3, 4], BLOCK_STEPS + 50, 0.0, 0.01, rng="philox")
+    assert np.array_equal(r[:BLOCK_STEPS - 10], generate_returns(prof, [3, 4], BLOCK_STEPS - 10, 0.0, 0.01, rng="philox"))
+    assert not np.array_equal(r, generate_returns(prof, [3, 4], BLOCK_STEPS + 50, 0.0, 0.01))
+
+
+def test_mc_engines_agree_and_store_keys_rng():
+    inp = MCInput(payload=SimInput(**BASE), n=40, base_seed=100)
+    assert _simulate_mc(inp) == _simulate_mc(inp.model_copy(update={"engine": "scalar"}))
+    legacy = _simulate_mc(MCInput(payload=SimInput(**{**BASE, "rng": "legacy"}), n=40, base_seed=100))
+    assert legacy != _simulate_mc(inp)
+
+    store = ShockStore()
+    a = store.get(range(0, 8), 50)
+    b = store.get(range(0, 8), 50, "philox")
+    assert np.array_equal(b, philox_normals(range(0, 8), 50)) and not np.array_equal(a, b)
+    assert store.stats()["matrices"] == 2
@@ -0,0 +1,55 @@
+"""Matrice de stress : expansion familles x presets, parité avec le moteur batch, stockage et résumé"""
+import numpy as np
+
+from backend.app.batch import simulate_batch
+from backend.app.main import resolve_config
+from backend.app.stress import (cell_input, default_stress_params, load_presets, preset_input, read_results,
+                                run_stress, summarize, write_results)
+
+PARAMS = {"heavy_tail": {"nu": [3, 5], "p_tail": [0.1], "tail_mult": [3.0]},
+          "ftmo_limits": {"dd_daily": [0.03, 0.07], "dd_total": [0.08]}}
+
+
+def test_cells_apply_to_presets():
+    presets = load_presets()
+    assert "ftmo-tight" in presets and "profiles" not in presets
+    grid = default_stress_params()
+    assert {"heavy_tail", "jumps", "vol_clustering", "ftmo_limits"} <= set(grid)
+    cfg = resolve_config(cell_input(presets["ftmo-tight"], "ftmo_limits", {"dd_daily": 0.07, "dd_total": 0.12}, 50))
+    assert (cfg.daily_limit, cfg.total_limit, cfg.total_steps) == (0.07, 0.12, 50)
+    assert cfg.use_vt and cfg.use_kelly_cap and cfg.kelly_cap == 0.5
+    cfg = resolve_config(cell_input(presets["ftmo-tight"], "vol_clustering", {"lam": 0.9, "shock": 0.02}, None))
+    assert cfg.returns.vol_process == "ewma" and cfg.returns.ewma_lambda == 0.9
+
+
+def test_preset_input_matches_to_backend():
+    # modules sans 'enabled' : KellyCap / VT actifs s'ils sont présents, CPPI / SoftBarrier non
+    preset = {"seed": 3, "total_steps": "300", "modules": {
+        "KellyCap": {}, "VolatilittyTarget": {"target": 0.15, "halflife": 10},
+        "CPPIFreeze": {"alpha": 0.3}, "SoftBarrier": {"threshold": 0.03}, "FTMOGate": {"daily_limit": 0.02}}}
+    d = preset_input(preset)
+    assert (d["use_kelly_cap"], d["use_vt"], d["use_cppi"], d["use_soft_barrier"]) == (True, True, False, False)
+    assert (d["kelly_cap"], d["vt_target_vol"], d["vt_halflife"], d["cppi_alpha"]) == (0.10, 0.15, 10, 0.3)
+    assert (d["total_steps"], d["daily_limit"], d["total_limit"], d["spend_rate"]) == (300.0, 0.02, 0.10, 1.0)
+    d = preset_input({"modules": {"KellyCap": {"enabled": False, "cap": 0.4}, "VolatilityTarget": {"enabled": 1},
+                                  "CPPIFreeze": {"enabled": True, "freeze": 0.02}}})
+    assert (d["use_kelly_cap"], d["kelly_cap"], d["use_vt"]) == (False, 0.4, True)
+    assert (d["use_cppi"], d["cppi_freeze_frac"], d["seed"]) == (True, 0.02, None)
+    assert not preset_input(load_presets()["ftmo-tight"])["use_cppi"]
+
+
+def test_run_matches_batch_and_roundtrips(tmp_path):
+    presets = {k: v for k, v in load_presets().items() if k in ("ftmo-tight", "kelly-low-cap")}
+    df = run_stress(presets, PARAMS, n=12, base_seed=5, steps=80)
+    assert len(df) == 2 * (2 + 2)
+    row = df[(df.preset == "kelly-low-cap") & (df.family == "heavy_tail") & (df.nu == 3)].iloc[0]
+    res = simulate_batch(cell_input(presets["kelly-low-cap"], "heavy_tail", {"nu": 3, "p_tail": 0.1, "tail_mult": 3.0}, 80),
+                         range(5, 17))
+    assert row.dd_p95 == float(np.quantile(res["max_dd_total"], 0.95))
+    assert row.viol_daily_rate == float((res["violations_daily"] > 0).mean())
+
+    path = write_results(df, str(tmp_path / "stress.parquet"))
+    back = read_results(str(tmp_path / "stress.parquet"))
+    assert path.endswith((".parquet", ".csv")) and len(back) == len(df)
+    out = summarize(back, by=["family"], where="preset == 'ftmo-tight'")
+    assert list(out.family) == ["ftmo_limits", "heavy_tail"] and list(out.cells) == [2, 2]
@@ -0,0 +1,41 @@
+"""Grid search serveur /sweep (nombres aléatoires communs, top-K)"""
+from fastapi.testclient import TestClient
+
+from backend.app.main import app, SimInput, MCInput, _simulate_mc
+from backend.app.sweep import expand_range
+
+
+def test_expand_range_inclusive_without_float_drift():
+    assert expand_range({"min": 0.05, "max": 0.30, "step": 0.05}) == [0.05, 0.1, 0.15, 0.2, 0.25, 0.3]
+    assert expand_range([1, 2]) == [1, 2]
+    assert expand_range({"min": 0.1, "max": 0.1, "step": 0.0}) == [0.1]
+
+
+def test_sweep_points_match_individual_mc_runs():
+    base = {"total_steps": 120, "use_vt": True, "use_cppi": True, "use_kelly_cap": True,
+            "sigma": 0.03, "target_profit": 0.03, "daily_limit": 0.03}
+    ranges = {"modules.CPPIFreeze.alpha": {"min": 0.05, "max": 0.15, "step": 0.05},
+              "kelly_cap": [0.5, 1.0],
+              "use_soft_barrier": [False, True]}
+    client = TestClient(app)
+    r = client.post("/sweep", json={"base": base, "ranges": ranges, "n": 16, "base_seed": 4, "top_k": 50})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["n_points"] == 12 and len(data["top"]) == 12
+    assert [row["rank"] for row in data["top"]] == list(range(1, 13))
+    rates = [row["mc"]["pass_rate_full"] for row in data["top"]]
+    assert rates == sorted(rates, reverse=True)
+
+    for row in data["top"]:
+        pt = row["params"]
+        payload = SimInput(**{**base, "kelly_cap": pt["kelly_cap"], "use_soft_barrier": pt["use_soft_barrier"],
+                              "modules": {"CPPIFreeze": {"alpha": pt["modules.CPPIFreeze.alpha"]}}})
+        ref = _simulate_mc(MCInput(payload=payload, n=16, base_seed=4))
+        assert row["mc"] == ref["mc"]
+
+
+def test_sweep_rejects_unknown_paths():
+    client = TestClient(app)
+    r = client.post("/sweep", json={"base": {}, "ranges": {"modules.KellyCap.cap_mult": [0.3]}})
+    assert r.status_code == 422
+    assert "cap_mult" in r.json()["detail"]
@@ -0,0 +1,57 @@
+"""Instrumentation opt-in : temps par étape dans diag, /metrics Prometheus, profil cProfile"""
+import pstats
+
+from fastapi.testclient import TestClient
+
+from backend.app import timing
+from backend.app.main import app
+
+BODY = {"seed": 5, "total_steps": 400, "use_vt": True, "use_kelly_cap": True}
+
+
+def test_timings_in_diag_and_server_timing_header():
+    client = TestClient(app)
+    plain = client.post("/simulate", json={**BODY, "seed": 6}).json()
+    r = client.post("/simulate?timing=true", json={**BODY, "seed": 6})
+    out = r.json()
+    stages = out["diag"].pop("timings")
+    assert {"parse", "cache_key", "downsample"} <= set(stages)
+    assert stages["parse"]["cpu_ms"] is None and stages["downsample"]["wall_ms"] >= 0.0
+    assert "encode;dur=" in r.headers["server-timing"]
+    assert out == plain
+    # calcul (pas de cache) : étapes de simulate_equity ; le résultat en cache n'est pas annoté
+    fresh = client.post("/simulate", json={**BODY, "seed": 7}, headers={"X-Sim-Timing": "1"}).json()
+    assert {"resolve", "loop", "kpis"} <= set(fresh["diag"]["timings"])
+    assert "timings" not in client.post("/simulate", json={**BODY, "seed": 7}).json()["diag"]
+
+    mc = client.post("/simulate_mc?timing=1", json={"payload": BODY, "n": 20, "base_seed": 1}).json()
+    assert {"mc", "mc_stats"} <= set(mc["diag"]["timings"])
+
+    text = client.get("/metrics").text
+    assert '# TYPE sim_stage_seconds histogram' in text
+    assert 'sim_stage_seconds_bucket{endpoint="simulate",stage="loop",le="+Inf"}' in text
+    assert 'sim_request_seconds_count{endpoint="simulate_mc"}' in text
+
+
+def test_profile_dump_only_when_enabled(tmp_path, monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(timing, "PROFILE_DIR", None)
+    out = client.post("/simulate?profile=true", json={**BODY, "seed": 8}).json()
+    assert "profile" not in out["diag"]
+
+    monkeypatch.setattr(timing, "PROFILE_DIR", str(tmp_path))
+    out = client.post("/simulate?profile=true", json={**BODY, "seed": 9}, headers={"X-Request-ID": "req/42"}).json()
+    prof = out["diag"]["profile"]
+    assert prof["request_id"] == "req_42" and prof["kind"] == "cprofile"
+    assert pstats.Stats(prof["path"]).total_calls > 0
+
+
+def test_histogram_render_is_cumulative():
+    h = timing.Histogram("x_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        h.observe(v, "loop")
+    lines = h.render()
+    assert 'x_seconds_bucket{stage="loop",le="0.1"} 2' in lines
+    assert 'x_seconds_bucket{stage="loop",le="1.0"} 3' in lines
+    assert 'x_seconds_bucket{stage="loop",le="+Inf"} 4' in lines
+    assert 'x_seconds_count{stage="loop"} 4' in lines
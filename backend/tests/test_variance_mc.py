@@ -0,0 +1,82 @@
+"""Réduction de variance MC : antithétique, Sobol / LHS, variables de contrôle, SE et ESS"""
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.main import MCInput, SimInput, VarianceMC, _simulate_mc, app, resolve_config
+from backend.app.variance import exact_controls, group_shocks, group_sizes, ladder_controls
+
+KELLY = {"total_steps": 200, "use_kelly_cap": True, "kelly_cap": 0.5, "sigma": 0.02, "target_profit": 0.05}
+VT_CPPI = {"total_steps": 150, "use_vt": True, "use_cppi": True, "use_kelly_cap": True, "kelly_cap": 1.0,
+           "sigma": 0.02, "target_profit": 0.05}
+
+
+def run(payload, n, method, cv, **kw):
+    spec = VarianceMC(method=method, control_variate=cv, **kw)
+    return _simulate_mc(MCInput(payload=SimInput(**payload), n=n, base_seed=1, variance=spec))
+
+
+def test_plain_groups_reproduce_classic_mc():
+    out = run(VT_CPPI, 200, "none", False, replicates=8)
+    assert out["mc"] == _simulate_mc(MCInput(payload=SimInput(**VT_CPPI), n=200, base_seed=1))["mc"]
+    v = out["variance"]
+    assert v["replicates"] == 8 and not v["control"]["enabled"]
+    for name in ("pass_rate", "pass_rate_full", "dd_p95"):
+        assert v["se"][name] > 0 and v["ess"][name] > 0
+
+
+def test_antithetic_pairs_and_qmc_shapes():
+    p = resolve_config(SimInput(**KELLY))
+    sizes = group_sizes(11, 3)
+    assert sizes == [4, 4, 3]
+    anti = group_shocks(p, "antithetic", 5, sizes)
+    assert np.array_equal(anti[0][:, 2:], -anti[0][:, :2]) and anti[2].shape == (200, 3)
+    for method in ("sobol", "lhs"):
+        z = group_shocks(p, method, 5, sizes)
+        assert [g.shape for g in z] == [(200, 4), (200, 4), (200, 3)]
+        assert np.isfinite(np.concatenate(z, axis=1)).all()
+
+
+def test_control_variate_and_stratification_raise_ess():
+    n = 400
+    exact = run(KELLY, n, "none", True)["variance"]["control"]
+    assert exact["enabled"] and exact["pilot_paths"] == 0 and "pilot_seconds" not in exact
+    assert exact["controls"] == exact["exact"]
+    # KellyCap seul : le contrôle à exposition kelly_cap est le chemin lui-même
+    cv = run(KELLY, n, "none", True, control_pilot=10.0)
+    control = cv["variance"]["control"]
+    assert control["pilot_paths"] == 10 * n and control["pilot_seconds"] > 0
+    assert control["controls"] > control["exact"]
+    assert cv["variance"]["ess"]["pass_rate"] > 4 * n
+    plain = run(KELLY, n, "none", False)
+    assert cv["variance"]["se"]["pass_rate"] < plain["variance"]["se"]["pass_rate"] / 2
+    lhs = run(KELLY, n, "lhs", False)
+    assert lhs["variance"]["ess"]["pass_rate"] > n
+
+
+def test_control_features_match_engine_for_constant_exposure():
+    p = resolve_config(SimInput(**KELLY))
+    z = group_shocks(p, "none", 3, [50])[0]
+    from backend.app.batch import _simulate_chunk
+    res = _simulate_chunk(p, z, False)
+    y = ladder_controls(p, z, 0.5)
+    assert np.allclose(y[:, 0], res["max_dd_total"])
+    assert np.array_equal(y[:, 1].astype(bool), (res["violations_daily"] == 0) & (res["violations_total"] == 0))
+    assert np.array_equal(y[:, 2].astype(bool), res["target_pass"])
+
+
+def test_exact_controls_are_centred():
+    p = resolve_config(SimInput(**{**KELLY, "mu": 0.001}))
+    y = exact_controls(p, np.random.default_rng(0).standard_normal((200, 20000)), 0.5)
+    se = y.std(axis=0) / np.sqrt(y.shape[0])
+    assert np.all(np.abs(y.mean(axis=0)) < 4 * se)
+
+
+def test_invalid_combinations_are_rejected():
+    client = TestClient(app)
+    body = {"payload": KELLY, "n": 10, "variance": {}, "adaptive": {"tol_pass_rate": 0.1}}
+    assert client.post("/simulate_mc", json=body).status_code == 422
+    body = {"payload": {**KELLY, "returns": {"sampler": "student_t"}}, "n": 10, "variance": {}}
+    assert client.post("/simulate_mc", json=body).status_code == 422
+    r = client.post("/simulate_mc", json={"payload": KELLY, "n": 40, "variance": {"method": "sobol"}})
+    assert r.status_code == 200 and r.json()["variance"]["method"] == "sobol"
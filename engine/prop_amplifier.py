@@ -0,0 +1,191 @@
+"""
+Amplificateur proportionnel (PropAmp) pour le CPPI soft freeze.
+
+- Freeze avec hystérésis : gel si cushion/W < tau_freeze, dégel si cushion/W >= tau_up
+- Momentum : EMA des hausses du cushion (normalisées par W)
+- Amplification : lam_eff = lam_base * (1 + beta * momentum_norm), plafonnée à lam_cap
+- Cooldown : pas d'amplification pendant 'cooldown' trades après une perte
+- Sécurité : cap d'exposition E/W <= max_E_to_W
+
+PropAmplifier : état d'un seul chemin (référence, utilisé par tests/sim_soft_propamp_mc.py).
+simulate_propamp_batch : toutes les combinaisons (config x chemin) en tableaux, mêmes
+opérations flottantes que la boucle scalaire (résultats identiques bit à bit).
+"""
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass
+class PropAmpConfig:
+    tau_freeze: float = 0.05      # Seuil de freeze (5%)
+    tau_up: float = 0.08          # Seuil de défreeze (8%)
+    beta: float = 2.0             # Sensibilité au momentum
+    lam_base: float = 0.50        # Lambda de base (Kelly fractionné)
+    lam_cap: float = 1.0          # Plafond de lambda effectif
+    max_E_to_W: float = 0.015     # Cap d'exposition (1.5%)
+    ema_alpha: float = 0.2        # Poids de l'EMA du momentum
+    mom_scale: float = 0.01       # Hausse de cushion/W donnant momentum_norm = 1
+    cooldown: int = 3             # Trades sans amplification après une perte
+
+
+class PropAmplifier:
+    def __init__(self, cfg: PropAmpConfig = PropAmpConfig()):
+        self.cfg = cfg
+        self.frozen = False
+        self.ema = 0.0
+        self.cooldown_left = 0
+        self.last_C: Optional[float] = None
+
+    def update_on_state(self, W: float, C: float) -> None:
+        ratio = C / W if W > 0 else 0.0
+        if self.last_C is None:
+            self.last_C = C
+        if self.frozen:
+            if ratio >= self.cfg.tau_up:
+                self.frozen = False
+        elif ratio < self.cfg.tau_freeze:
+            self.frozen = True
+
+    def lambda_effective(self, W: float, C: float) -> float:
+        cfg = self.cfg
+        lam = cfg.lam_base
+        if self.cooldown_left == 0:
+            mom = min(1.0, self.ema / cfg.mom_scale) if cfg.mom_scale > 0 else 0.0
+            lam = lam * (1.0 + cfg.beta * mom)
+        return min(lam, cfg.lam_cap)
+
+    def cap_exposure(self, E: float, W: float) -> float:
+        return min(E, self.cfg.max_E_to_W * W)
+
+    def update_on_trade_end(self, pnl: float, W: float, C: float) -> None:
+        up = max(C - self.last_C, 0.0) / W if W > 0 else 0.0
+        self.ema = self.ema + self.cfg.ema_alpha * (up - self.ema)
+        self.last_C = C
+        if pnl < 0:
+            self.cooldown_left = self.cfg.cooldown
+        elif self.cooldown_left > 0:
+            self.cooldown_left -= 1
+
+
+# Nombre de cellules (config x chemin) simulées ensemble : blocs qui tiennent en cache
+DEFAULT_CHUNK_CELLS = 1 << 14
+
+
+def _config_columns(cfgs: Sequence[PropAmpConfig]) -> Dict[str, np.ndarray]:
+    """Champs de config en colonnes (K, 1), diffusées sur les chemins."""
+    return {f.name: np.array([float(getattr(c, f.name)) for c in cfgs])[:, None] for f in fields(PropAmpConfig)}
+
+
+def _simulate_block(signs: np.ndarray, c: Dict[str, np.ndarray], W0: float, alpha: float, f_kelly: float,
+                    payoff: float, horizon_days: int, max_total_dd: float, max_daily_dd: float) -> Dict[str, np.ndarray]:
+    K, n = c["beta"].shape[0], signs.shape[0]
+    shape = (K, n)
+    floor_mult = 1 - alpha
+
+    W = np.full(shape, float(W0))
+    HWM = W.copy()
+    F = HWM * floor_mult
+    frozen = np.zeros(shape, dtype=bool)
+    ema = np.zeros(shape)
+    cooldown_left = np.zeros(shape)
+    last_C: Optional[np.ndarray] = None
+    hit_day = np.full(shape, -1, dtype=np.int64)
+    pass_constraints = np.ones(shape, dtype=bool)
+    max_dd = np.zeros(shape)
+    scale_ok = c["mom_scale"] > 0
+    safe_scale = np.where(scale_ok, c["mom_scale"], 1.0)
+
+    # Un chemin gelé garde W, HWM et cushion constants : drawdown, last_C et cible n'ont
+    # pas besoin de masque ; seuls le PnL, l'EMA et le cooldown sont filtrés par 'active'.
+    for day in range(1, min(signs.shape[1], horizon_days) + 1):
+        C = np.maximum(W - F, 0.0)
+
+        # update_on_state (hystérésis)
+        positive = W > 0
+        ratio = np.where(positive, C / np.where(positive, W, 1.0), 0.0)
+        if last_C is None:
+            last_C = C
+        frozen = np.where(frozen, ratio < c["tau_up"], ratio < c["tau_freeze"])
+        active = ~frozen
+
+        # lambda effectif, sizing, caps
+        mom = np.where(scale_ok, np.minimum(1.0, ema / safe_scale), 0.0)
+        lam = np.where(cooldown_left == 0, c["lam_base"] * (1.0 + c["beta"] * mom), c["lam_base"])
+        lam = np.minimum(lam, c["lam_cap"])
+        E = np.minimum(np.minimum(np.minimum(lam * f_kelly * C, C), W), c["max_E_to_W"] * W)
+        E *= active  # gelé : E = 0 -> W + 0.0 == W
+
+        # trade
+        W_prev = W
+        pnl = E * (signs[:, day - 1] * payoff)
+        W = W + pnl
+        HWM = np.maximum(HWM, W)
+        F = HWM * floor_mult
+
+        # contraintes FTMO & cible
+        total_dd = (HWM - W) / np.maximum(HWM, 1e-12)
+        np.maximum(max_dd, total_dd, out=max_dd)
+        loss = pnl < 0
+        daily_breach = loss & (np.abs(pnl) / np.maximum(W_prev, 1e-12) > max_daily_dd)
+        pass_constraints &= ~((total_dd > max_total_dd) | daily_breach)
+        hit_day[(hit_day < 0) & ((W - W0) / W0 >= 0.10)] = day
+
+        # update_on_trade_end (EMA & cooldown)
+        C_end = np.maximum(W - F, 0.0)
+        positive = W > 0
+        up = np.where(positive, np.maximum(C_end - last_C, 0.0) / np.where(positive, W, 1.0), 0.0)
+        ema = np.where(active, ema + c["ema_alpha"] * (up - ema), ema)
+        last_C = C_end
+        cooldown_left = np.where(loss, c["cooldown"], cooldown_left - (active & (cooldown_left > 0)))
+
+    hit = hit_day >= 0
+    return {
+        "final_W": W,
+        "hit_target": hit,
+        "days_to_target": hit_day,          # -1 si cible non atteinte
+        "pass_constraints": pass_constraints,
+        "success": hit & pass_constraints,
+        "max_dd": max_dd,
+    }
+
+
+def simulate_propamp_batch(signs, cfgs: Sequence[PropAmpConfig], W0: float = 100_000, alpha: float = 0.10,
+                           f_kelly: float = 0.10, payoff: float = 1.0, horizon_days: int = 30,
+                           max_total_dd: float = 0.10, max_daily_dd: float = 0.05,
+                           chunk_cells: int = DEFAULT_CHUNK_CELLS) -> Dict[str, np.ndarray]:
+    """
+    Évalue chaque config sur chaque chemin de 'signs' (n_paths, n_days), même logique que
+    tests/sim_soft_propamp_mc.simulate_soft_propamp. Retourne des tableaux (K, n_paths).
+    """
+    signs = np.asarray(signs, dtype=float)
+    if signs.ndim == 1:
+        signs = signs[None, :]
+    cfgs = list(cfgs)
+    per_block = max(1, int(chunk_cells) // max(1, signs.shape[0]))
+    parts = []
+    for k0 in range(0, len(cfgs), per_block):
+        cols = _config_columns(cfgs[k0:k0 + per_block])
+        parts.append(_simulate_block(signs, cols, W0, alpha, f_kelly, payoff, horizon_days, max_total_dd, max_daily_dd))
+    if not parts:
+        return _simulate_block(signs, _config_columns([]), W0, alpha, f_kelly, payoff, horizon_days,
+                               max_total_dd, max_daily_dd)
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+def summarize_propamp(res: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Résumé par config (taux en fraction, médianes) à partir de simulate_propamp_batch."""
+    out = []
+    for k in range(res["final_W"].shape[0]):
+        days = res["days_to_target"][k]
+        days = days[days >= 0]
+        out.append({
+            "success": float(res["success"][k].mean()),
+            "hit_target": float(res["hit_target"][k].mean()),
+            "pass_constraints": float(res["pass_constraints"][k].mean()),
+            "med_days": float(np.median(days)) if days.size else None,
+            "med_final": float(np.median(res["final_W"][k])),
+            "med_max_dd": float(np.median(res["max_dd"][k])),
+        })
+    return out
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Benchmarks des moteurs de simulation, historique JSON et détection de régressions.
+
+    python scripts/bench.py run                       # toute la suite -> logs/bench_history.json
+    python scripts/bench.py run --filter equity --repeat 20
+    python scripts/bench.py baseline                  # dernier run de l'historique -> baseline
+    python scripts/bench.py compare --threshold 0.15  # code retour 1 si régression
+
+Chaque cas mesure la latence (p50 / p99 sur 'repeat' exécutions après un échauffement),
+le débit (pas/s ou chemins/s au p50) et le pic mémoire Python (tracemalloc, run séparé
+pour ne pas fausser les temps). Les caches de résultats et de chocs sont vidés avant
+chaque exécution : on mesure le calcul, pas le cache.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+HISTORY = os.path.join("logs", "bench_history.json")
+BASELINE = os.path.join("logs", "bench_baseline.json")
+
+# Modules de simulate_equity (chacun seul, aucun, tous)
+MODULES = {
+    "none": {},
+    "vt": {"use_vt": True},
+    "kelly": {"use_kelly_cap": True, "kelly_cap": 0.5},
+    "cppi": {"use_vt": True, "use_cppi": True},
+    "soft": {"use_kelly_cap": True, "use_soft_barrier": True, "soft_barrier": 0.02},
+    "all": {"use_vt": True, "use_kelly_cap": True, "kelly_cap": 0.5, "use_cppi": True,
+            "use_soft_barrier": True, "soft_barrier": 0.02},
+}
+
+
+class Case:
+    """Un benchmark : fn() exécutée 'repeat' fois ; units = pas ou chemins traités par exécution."""
+
+    def __init__(self, name: str, fn: Callable[[], Any], units: int, unit: str,
+                 setup: Optional[Callable[[], None]] = None):
+        self.name, self.fn, self.units, self.unit, self.setup = name, fn, units, unit, setup
+
+
+def _clear_caches() -> None:
+    from backend.app.cache import RESULT_CACHE
+    from backend.app.shocks import SHOCK_STORE
+    RESULT_CACHE.clear()
+    SHOCK_STORE.clear()
+
+
+def build_cases() -> List[Case]:
+    from backend.app.main import MC_FIELDS, SimInput, compute_equity_kpis, drawdowns, simulate_equity
+    from backend.app.cppi import run_strategy
+    from tests.sim_soft_propamp_mc import simulate_soft_propamp
+
+    cases = []
+    for horizon, steps in (("short", 500), ("long", 20_000)):
+        for mod, flags in MODULES.items():
+            p = SimInput(seed=7, total_steps=steps, return_series=False, **flags)
+            cases.append(Case(f"equity.{horizon}.{mod}", lambda p=p: simulate_equity(p), steps, "steps"))
+    lean = SimInput(seed=7, total_steps=20_000, return_series=False, **MODULES["all"])
+    cases.append(Case("equity.long.all.lean", lambda: simulate_equity(lean, MC_FIELDS), 20_000, "steps"))
+
+    rng = np.random.default_rng(0)
+    equity = np.cumprod(1.0 + rng.normal(0.0002, 0.01, 100_000)).tolist()
+    cases.append(Case("kpi.compute_equity_kpis", lambda: compute_equity_kpis(equity, 0.05, 0.10, 50),
+                      len(equity), "steps"))
+    cases.append(Case("kpi.drawdowns", lambda: drawdowns(equity), len(equity), "steps"))
+
+    from fastapi.testclient import TestClient
+    from backend.app.main import app
+    client = TestClient(app)
+    payload = {"total_steps": 500, "use_vt": True, "use_cppi": True, "use_kelly_cap": True, "kelly_cap": 0.5}
+    for n in (100, 1000, 5000):
+        body = {"payload": payload, "n": n, "base_seed": 1}
+        cases.append(Case(f"simulate_mc.n{n}", lambda body=body: client.post("/simulate_mc", json=body).json(),
+                          n, "paths", setup=_clear_caches))
+
+    trades = np.random.default_rng(1).normal(0.1, 1.0, 1000)
+    for mode in ("hard", "soft"):
+        cases.append(Case(f"run_strategy.{mode}", lambda mode=mode: run_strategy(trades, freeze_mode=mode),
+                          len(trades), "steps"))
+    signs = np.where(np.random.default_rng(2).random((200, 30)) < 0.55, 1, -1)
+    cases.append(Case("simulate_soft_propamp", lambda: [simulate_soft_propamp(row) for row in signs],
+                      len(signs), "paths"))
+    return cases
+
+
+def measure(case: Case, repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    for _ in range(warmup):
+        if case.setup:
+            case.setup()
+        case.fn()
+    times = []
+    for _ in range(repeat):
+        if case.setup:
+            case.setup()
+        t0 = time.perf_counter()
+        case.fn()
+        times.append(time.perf_counter() - t0)
+
+    if case.setup:
+        case.setup()
+    tracemalloc.start()
+    case.fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p99 = (float(v) for v in np.quantile(times, [0.50, 0.99]))
+    return {
+        "unit": case.unit,
+        "units": case.units,
+        "repeat": repeat,
+        "p50_ms": p50 * 1e3,
+        "p99_ms": p99 * 1e3,
+        "throughput": case.units / p50 if p50 > 0 else float("inf"),   # unit/s
+        "peak_kb": peak / 1024.0,
+    }
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(cases: List[Case], repeat: int, echo: bool = True) -> Dict[str, Any]:
+    results = {}
+    for case in cases:
+        results[case.name] = r = measure(case, repeat)
+        if echo:
+            print(f"{case.name:32s} p50 {r['p50_ms']:9.2f} ms  p99 {r['p99_ms']:9.2f} ms  "
+                  f"{r['throughput']:12.0f} {r['unit']}/s  peak {r['peak_kb']:9.0f} KiB")
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git": _git_rev(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+
+
+def load_json(path: str, default: Any) -> Any:
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save_json(path: str, data: Any) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2)
+    os.replace(tmp, path)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Tuple[str, float, float, float, bool]]:
+    """
+    (cas, p50 baseline, p50 courant, variation relative, régression) pour les cas communs.
+    Régression si le p50 augmente de plus de 'threshold' (0.10 = +10 %).
+    """
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        delta = cur["p50_ms"] / base["p50_ms"] - 1.0 if base["p50_ms"] > 0 else 0.0
+        rows.append((name, base["p50_ms"], cur["p50_ms"], delta, delta > threshold))
+    return rows
+
+
+def cmd_run(args) -> None:
+    cases = [c for c in build_cases() if not args.filter or any(f in c.name for f in args.filter)]
+    record = run_suite(cases, args.repeat)
+    history = load_json(args.history, [])
+    history.append(record)
+    save_json(args.history, history)
+    print(f"-> {args.history} ({len(history)} runs)")
+
+
+def cmd_baseline(args) -> None:
+    history = load_json(args.history, [])
+    if not history:
+        sys.exit(f"historique vide: {args.history}")
+    save_json(args.baseline, history[args.index])
+    print(f"baseline <- run {history[args.index]['timestamp']} ({history[args.index]['git']}) -> {args.baseline}")
+
+
+def cmd_compare(args) -> None:
+    baseline = load_json(args.baseline, None)
+    history = load_json(args.history, [])
+    if baseline is None or not history:
+        sys.exit("baseline ou historique absent (lancer 'run' puis 'baseline')")
+    rows = compare(baseline, history[args.index], args.threshold)
+    regressions = [r for r in rows if r[4]]
+    for name, base, cur, delta, bad in rows:
+        print(f"{'REGRESSION' if bad else 'ok':10s} {name:32s} {base:9.2f} -> {cur:9.2f} ms  ({delta:+.1%})")
+    print(f"{len(regressions)} régression(s) au-delà de +{args.threshold:.0%} sur {len(rows)} cas")
+    sys.exit(1 if regressions else 0)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks des moteurs de simulation")
+    parser.add_argument("--history", default=HISTORY)
+    parser.add_argument("--baseline", default=BASELINE)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="exécute la suite et ajoute le run à l'historique")
+    run.add_argument("--repeat", type=int, default=10)
+    run.add_argument("--filter", nargs="*", default=None, help="sous-chaînes de noms de cas")
+    run.set_defaults(func=cmd_run)
+
+    base = sub.add_parser("baseline", help="fige un run de l'historique comme baseline")
+    base.add_argument("--index", type=int, default=-1)
+    base.set_defaults(func=cmd_baseline)
+
+    cmp_ = sub.add_parser("compare", help="compare un run de l'historique à la baseline")
+    cmp_.add_argument("--index", type=int, default=-1)
+    cmp_.add_argument("--threshold", type=float, default=0.10)
+    cmp_.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
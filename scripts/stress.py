@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Matrice de stress (familles de STRESS_PARAMS x presets x seeds) et requêtes sur les résultats.
+
+    python scripts/stress.py run --n 200 --workers 8 --out logs/stress.parquet
+    python scripts/stress.py query logs/stress.parquet --by family preset
+    python scripts/stress.py query logs/stress.parquet --by cell --where "family == 'jumps'"
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pandas as pd  # noqa: E402
+
+from backend.app.stress import (  # noqa: E402
+    FAMILIES, default_stress_params, load_presets, read_results, run_stress, summarize, write_results,
+)
+
+
+def cmd_run(args) -> None:
+    presets = load_presets(args.presets)
+    if args.preset:
+        missing = [p for p in args.preset if p not in presets]
+        if missing:
+            sys.exit(f"preset inconnu: {missing} (connus: {sorted(presets)})")
+        presets = {name: presets[name] for name in args.preset}
+    t0 = time.perf_counter()
+    df = run_stress(presets, default_stress_params(), n=args.n, base_seed=args.base_seed, steps=args.steps,
+                    workers=args.workers, families=args.family)
+    path = write_results(df, args.out)
+    print(f"{len(df)} cellules ({len(presets)} presets x {args.n} seeds) en {time.perf_counter() - t0:.1f}s -> {path}")
+    print(summarize(df, by=["family"]).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+
+def cmd_query(args) -> None:
+    out = summarize(read_results(args.path), by=args.by, where=args.where)
+    if args.sort:
+        out = out.sort_values(args.sort, ascending=args.asc)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(out.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Matrice de stress Monte Carlo")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="exécute la matrice et écrit les résultats")
+    run.add_argument("--n", type=int, default=100, help="seeds par cellule")
+    run.add_argument("--base-seed", type=int, default=0)
+    run.add_argument("--steps", type=int, default=None, help="total_steps (défaut : celui du preset)")
+    run.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    run.add_argument("--family", nargs="*", choices=sorted(FAMILIES), default=None)
+    run.add_argument("--preset", nargs="*", default=None)
+    run.add_argument("--presets", default=None, help="dossier des presets (défaut : presets/)")
+    run.add_argument("--out", default="logs/stress.parquet", help=".parquet / .feather (repli .csv sans pyarrow)")
+    run.set_defaults(func=cmd_run)
+
+    query = sub.add_parser("query", help="taux de pass / violations par cellule")
+    query.add_argument("path")
+    query.add_argument("--by", nargs="+", default=["family", "cell"])
+    query.add_argument("--where", default=None, help="expression pandas, ex. \"preset == 'ftmo-tight'\"")
+    query.add_argument("--sort", default=None)
+    query.add_argument("--asc", action="store_true")
+    query.set_defaults(func=cmd_query)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,5 +17,9 @@ setup(
         "httpx>=0.25.0",
         "watchfiles>=0.21.0",
     ],
+    extras_require={
+        # noyau compilé de simulate_equity (backend/app/kernel.py)
+        "fast": ["numba>=0.58"],
+    },
     python_requires=">=3.11",
 )
@@ -20,26 +20,9 @@ class MonteCarloConfig:
         return rng.integers(1, 1000000, size=self.n_runs).tolist()
     
     def get_stress_params(self) -> Dict[str, Any]:
-        """Paramètres de stress pour les tests"""
-        return {
-            "heavy_tail": {
-                "nu": [3, 4, 5],  # degrés de liberté Student-t
-                "p_tail": [0.05, 0.10, 0.15],  # probabilité queue
-                "tail_mult": [2.0, 3.0, 4.0]  # multiplicateur queue
-            },
-            "jumps": {
-                "p_jump": [0.005, 0.01, 0.02],  # probabilité saut
-                "jump_sigma": [0.03, 0.04, 0.06]  # volatilité saut
-            },
-            "vol_clustering": {
-                "lam": [0.90, 0.94, 0.98],  # persistance EWMA
-                "shock": [0.015, 0.02, 0.025]  # amplitude choc
-            },
-            "ftmo_limits": {
-                "dd_daily": [0.03, 0.05, 0.07],  # limites DD journalier
-                "dd_total": [0.08, 0.10, 0.12]   # limites DD total
-            }
-        }
+        """Paramètres de stress pour les tests (grille de backend.app.stress)"""
+        from backend.app.stress import default_stress_params
+        return default_stress_params()
     
     def get_run_config(self, run_id: int) -> Dict[str, Any]:
         """Configuration pour un run spécifique"""
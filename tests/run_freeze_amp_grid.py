@@ -3,9 +3,8 @@ import pandas as pd
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from engine.prop_amplifier import PropAmpConfig
-from tests.sim_freeze_modes import run_strategy     # soft/hard baseline
-from tests.sim_soft_propamp_mc import simulate_soft_propamp
+from engine.prop_amplifier import PropAmpConfig, simulate_propamp_batch, summarize_propamp
+from backend.app.cppi import run_cppi                # soft/hard baseline
 
 def mc_series(N, horizon, win_rate, payoff, seed=42):
     rng = np.random.default_rng(seed)
@@ -13,22 +12,18 @@ def mc_series(N, horizon, win_rate, payoff, seed=42):
     return signs
 
 def eval_soft(signs):
-    rows = []
-    for seq in signs:
-        W_hist = run_strategy(seq, freeze_mode="soft")
-        rows.append(dict(
-            final_W=W_hist[-1], pass_constraints=True, # déjà checkés dans la version MC complète si besoin
-            hit_target=((W_hist[-1]-100_000)/100_000)>=0.10,
-            days_to_target=None, success=False, max_dd=np.nan
-        ))
-    return pd.DataFrame(rows)
-
-def eval_soft_prop(signs, cfg: PropAmpConfig):
-    rows = []
-    for seq in signs:
-        out = simulate_soft_propamp(seq, cfg=cfg)
-        rows.append(out)
-    return pd.DataFrame(rows)
+    # tous les chemins en un appel (moteur CPPI vectorisé)
+    final_W = run_cppi(signs, freeze_mode="soft", keep_history=False)["final_capital"]
+    n = len(final_W)
+    return pd.DataFrame(dict(
+        final_W=final_W, pass_constraints=np.ones(n, dtype=bool), # déjà checkés dans la version MC complète si besoin
+        hit_target=((final_W-100_000)/100_000)>=0.10,
+        days_to_target=[None]*n, success=np.zeros(n, dtype=bool), max_dd=np.full(n, np.nan)
+    ))
+
+def eval_soft_prop_grid(signs, grid):
+    # toutes les combinaisons (config x chemin) en un appel, résumé par config
+    return summarize_propamp(simulate_propamp_batch(signs, grid))
 
 if __name__ == "__main__":
     N=2000; horizon=30; win_rate=0.55; payoff=1.0
@@ -54,15 +49,14 @@ if __name__ == "__main__":
     )
 
     rows = [base_summary]
-    for cfg in grid:
-        df = eval_soft_prop(signs, cfg)
+    for cfg, st in zip(grid, eval_soft_prop_grid(signs, grid)):
         rows.append(dict(
             mode=f"prop_amp_beta{cfg.beta}_cap{cfg.lam_cap}_Ecap{cfg.max_E_to_W}",
-            success=100*df["success"].mean(),
-            hit_target=100*df["hit_target"].mean(),
-            pass_constraints=100*df["pass_constraints"].mean(),
-            med_days=float(df["days_to_target"].median()) if df["days_to_target"].notna().any() else None,
-            med_final=float(df["final_W"].median())
+            success=100*st["success"],
+            hit_target=100*st["hit_target"],
+            pass_constraints=100*st["pass_constraints"],
+            med_days=st["med_days"],
+            med_final=st["med_final"]
         ))
 
     out = pd.DataFrame(rows)
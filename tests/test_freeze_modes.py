@@ -6,8 +6,12 @@ Valide la logique de protection du capital selon la philosophie du risque relati
 
 import numpy as np
 import json
+import os
+import sys
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
 def run_strategy(trades, W0=100_000, alpha=0.10, f=0.1, lam=0.5,
                  freeze_mode="hard", tau=0.05):
     """
@@ -175,6 +179,13 @@ def run_comparison_test():
     
     return analysis
 
+def run_mc_comparison(N_paths=5000, N_trades=30, win_rate=0.55, payoff=1.0, seed=42, **params):
+    """Hard vs soft sur N_paths chemins en un seul appel du moteur vectorisé"""
+    from backend.app.cppi import compare_modes
+    rng = np.random.default_rng(seed)
+    signs = (rng.random((N_paths, N_trades)) < win_rate).astype(int) * 2 - 1
+    return compare_modes(signs * payoff, **params)
+
 def save_results(analysis, filename=None):
     """Sauvegarde des résultats avec timestamp"""
     if filename is None:
@@ -261,6 +272,7 @@ if __name__ == "__main__":
     
     # Afficher le résumé
     print_summary(analysis)
+    print(f"\n🎲 MC hard vs soft (5000 chemins): {run_mc_comparison()}")
     
     # Sauvegarder les résultats
     filename = save_results(analysis)